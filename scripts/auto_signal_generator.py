@@ -6,10 +6,13 @@ Génère automatiquement des signaux quand des tokens en base montent ou baissen
 
 import json
 import time
-import requests
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from http_cache import cached_get
+from rate_limiter import PRIORITY_ALERT
+from token_metadata import lookup as lookup_metadata, remember_pairs
+
 BASE_DIR = Path("/data/.openclaw/workspace/lurker-project")
 TOKENS_FILE = BASE_DIR / "tokens" / "base.json"
 SIGNALS_DIR = BASE_DIR / "signals"
@@ -49,7 +52,7 @@ def get_token_price(token_address):
     """Get current price from DexScreener — also resolves symbol/name"""
     try:
         url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
-        resp = requests.get(url, timeout=15)
+        resp = cached_get(url, priority=PRIORITY_ALERT, timeout=15)
         if resp.status_code == 200:
             data = resp.json()
             pairs = data.get("pairs", [])
@@ -58,6 +61,7 @@ def get_token_price(token_address):
                 best = max(pairs, key=lambda x: float(x.get("volume", {}).get("h24", 0) or 0))
                 
                 # Resolve token symbol and name from pair data
+                remember_pairs([best])
                 base_token = best.get("baseToken", {})
                 resolved_symbol = base_token.get("symbol", "UNKNOWN")
                 resolved_name = base_token.get("name", "Unknown")
@@ -160,8 +164,13 @@ def check_all_tokens():
             if not current:
                 continue
             
-            # Update last check and resolve symbol if missing
+            # Update last check and resolve symbol if missing (metadata cache first)
             token_data["last_check"] = time.time()
+            if token_data.get("symbol") in ("UNKNOWN", None, ""):
+                cached = lookup_metadata(token_id) or {}
+                if cached.get("symbol"):
+                    token_data["symbol"] = cached["symbol"]
+                    token_data["name"] = cached.get("name") or token_data.get("name", "Unknown")
             if current.get("symbol") and token_data.get("symbol") in ("UNKNOWN", None, ""):
                 token_data["symbol"] = current["symbol"]
                 token_data["name"] = current.get("name", token_data.get("name", "Unknown"))
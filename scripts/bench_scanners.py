@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+LURKER offline scanner benchmark
+Record live traffic once, then replay it to measure scanners with no network:
+
+    python3 scripts/bench_scanners.py record data/fixtures/scanners.json.gz
+    python3 scripts/bench_scanners.py replay data/fixtures/scanners.json.gz --latency 40 --jitter 20
+
+Each scanner runs in a forked child against a throwaway copy of its state and
+output files (signals/, state/, cache/ are never touched). Reports wall time,
+HTTP request count and peak RSS per scanner.
+"""
+import argparse
+import importlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+# name: (module, function, kwargs)
+BENCHMARKS = {
+    "cio_v3": ("scanner_cio_v3", "scan", {}),
+    "cio_v3_async": ("scanner_cio_v3", "scan", {"use_async": True}),
+    "v2": ("scanner_v2", "main", {}),
+    "multi_api": ("scanner_multi_api", "run_scanner", {}),
+    "onchain": ("scanner_onchain", "scan", {}),
+    "base_rpc": ("scanner_base_rpc", "scan_fresh_tokens", {}),
+}
+
+
+def sandbox_module_paths(sandbox):
+    """Point every project-level Path constant of loaded scripts into `sandbox`"""
+    for module in list(sys.modules.values()):
+        module_file = getattr(module, "__file__", None) or ""
+        if Path(module_file).parent != SCRIPT_DIR:
+            continue
+        for attr, value in list(vars(module).items()):
+            if not isinstance(value, Path) or attr in ("SCRIPT_DIR", "PROJECT_DIR", "SCRIPTS_DIR"):
+                continue
+            try:
+                rel = value.resolve().relative_to(PROJECT_DIR.resolve())
+            except ValueError:
+                continue
+            if rel.parts[:1] == ("scripts",):
+                continue
+            target = sandbox / rel
+            if value.is_file() and not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(value, target)
+            setattr(module, attr, target)
+
+
+def sandbox_shared_stores(sandbox, rate_limit):
+    """Fresh limiter / cache / breaker / metadata / registry stores so runs don't share state.
+
+    Returns a function restoring the token registry singleton.
+    """
+    import circuit_breaker
+    import http_cache
+    import rate_limiter
+    import token_metadata
+    import token_registry
+    rate_limiter._limiter = rate_limiter.RateLimiter(
+        sandbox / "state" / "rate_limits.db", providers=None if rate_limit else {})
+    http_cache._cache = http_cache.HttpCache(sandbox / "cache" / "http_cache.db")
+    circuit_breaker._breaker = circuit_breaker.CircuitBreaker(sandbox / "state" / "circuit_breakers.json")
+    token_metadata._cache = token_metadata.TokenMetadataCache(sandbox / "cache" / "token_metadata.db",
+                                                              token_metadata.REGISTRY_FILE)
+    previous_registry = token_registry._registry
+    token_registry._registry = token_registry.TokenRegistry(sandbox / "state" / "token_registry.db",
+                                                            sandbox / "state" / "token_registry.json")
+
+    def restore():
+        token_registry._registry = previous_registry
+    return restore
+
+
+def run_child(name, mode, archive, args, result_file):
+    """Child process: sandbox, install transport, run one scanner, dump result"""
+    import http_fixtures
+    module_name, func_name, kwargs = BENCHMARKS[name]
+    sandbox = Path(tempfile.mkdtemp(prefix=f"lurker-bench-{name}-"))
+    result = {"name": name, "ok": False}
+    restore = None
+    try:
+        module = importlib.import_module(module_name)
+        sandbox_module_paths(sandbox)
+        restore = sandbox_shared_stores(sandbox, args.rate_limit)
+        if mode == "record":
+            transport = http_fixtures.recording(archive)
+        else:
+            transport = http_fixtures.replaying(archive, latency_ms=args.latency,
+                                                jitter_ms=args.jitter, seed=args.seed)
+        with transport as stats:
+            t0 = time.time()
+            getattr(module, func_name)(**kwargs)
+            result["wall_s"] = round(time.time() - t0, 3)
+        result.update(stats.as_dict())
+        result["ok"] = True
+    except BaseException as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+    finally:
+        if restore:
+            restore()
+        shutil.rmtree(sandbox, ignore_errors=True)
+        Path(result_file).write_text(json.dumps(result))
+
+
+def run_benchmark(name, mode, archive, args):
+    fd, result_file = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    pid = os.fork()
+    if pid == 0:
+        sys.stdout = open(os.devnull, "w") if args.quiet else sys.stdout
+        run_child(name, mode, archive, args, result_file)
+        os._exit(0)
+    _, _, rusage = os.wait4(pid, 0)
+    try:
+        result = json.loads(Path(result_file).read_text() or "{}")
+    except ValueError:
+        result = {"name": name, "ok": False, "error": "child crashed"}
+    os.unlink(result_file)
+    result["peak_rss_mb"] = round(rusage.ru_maxrss / 1024, 1)  # Linux reports KB
+    return result
+
+
+def print_report(results):
+    print()
+    print(f"{'scanner':<14} {'wall_s':>8} {'requests':>9} {'misses':>7} {'peak_rss_mb':>12}")
+    for r in results:
+        if not r.get("ok"):
+            print(f"{r['name']:<14} FAILED: {r.get('error', '?')[:80]}")
+            continue
+        print(f"{r['name']:<14} {r['wall_s']:>8.2f} {r['requests']:>9} {r['misses']:>7} {r['peak_rss_mb']:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record/replay benchmark for LURKER scanners")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("archive", help="Fixture archive (.json.gz); one per scanner is derived from it")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS),
+                        help="Run only these scanners (repeatable)")
+    parser.add_argument("--latency", type=float, default=None,
+                        help="Replay latency per request in ms (default: recorded latency)")
+    parser.add_argument("--jitter", type=float, default=0, help="Replay jitter +/- ms")
+    parser.add_argument("--seed", type=int, default=None, help="Jitter RNG seed")
+    parser.add_argument("--no-rate-limit", dest="rate_limit", action="store_false",
+                        help="Disable the shared rate limiter during the run")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    parser.add_argument("--quiet", action="store_true", help="Hide scanner output")
+    args = parser.parse_args()
+
+    archive = Path(args.archive)
+    results = []
+    for name in args.only or list(BENCHMARKS):
+        # One archive per scanner keeps replay sequences independent
+        scanner_archive = archive.with_name(archive.name.replace(".json.gz", "") + f".{name}.json.gz")
+        if args.mode == "replay" and not scanner_archive.exists():
+            results.append({"name": name, "ok": False, "error": f"missing {scanner_archive}"})
+            continue
+        print(f"[BENCH] {args.mode} {name} ({scanner_archive})")
+        results.append(run_benchmark(name, args.mode, scanner_archive, args))
+
+    print_report(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    return 0 if all(r.get("ok") for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
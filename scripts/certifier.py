@@ -9,10 +9,12 @@ import math
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+from holder_index import DEPLOY_MARGIN, estimate_block, get_index as get_holder_index
+from token_registry import get_registry
+
 # Config
 CIO_FILE = Path(__file__).parent.parent / "signals" / "cio_feed.json"
 LIFECYCLE_FILE = Path(__file__).parent.parent / "signals" / "lifecycle_feed.json"
-REGISTRY_FILE = Path(__file__).parent.parent / "state" / "token_registry.json"
 PULSE_FILE = Path(__file__).parent.parent / "signals" / "certified_feed.json"
 
 # Certification thresholds
@@ -34,6 +36,9 @@ CERT_72H = {
     "max_drawdown_pct": 50
 }
 
+# Registry price history carried into candidates
+REGISTRY_WINDOW_MS = 24 * 3600 * 1000
+
 # Bluechip symbols to exclude from top10 calculation
 EXCLUDE_FROM_TOP10 = {"LP", "POOL", "BURN", "DEAD", "ZERO", "ROUTER"}
 
@@ -48,43 +53,43 @@ def load_tokens():
             tokens.extend(lifecycle.get("candidates", []))
     
     # Also load from registry for completeness
-    if REGISTRY_FILE.exists():
-        with open(REGISTRY_FILE) as f:
-            registry = json.load(f)
-            for addr, data in registry.get("tokens", {}).items():
-                # Convert registry format to lifecycle format
-                price_history = data.get("price_history", [])
-                if not price_history:
-                    continue
-                
-                latest = price_history[-1]
-                first = price_history[0]
-                first_seen = data.get("first_seen_iso", "")
-                
-                # Calculate age
-                age_hours = 0
-                if first_seen:
-                    try:
-                        first_dt = datetime.fromisoformat(first_seen.replace('Z', '+00:00'))
-                        age_hours = (datetime.now() - first_dt).total_seconds() / 3600
-                    except:
-                        pass
-                
-                token = {
-                    "token": data.get("token", {}),
-                    "pool_address": addr,  # Use address as pool_address
-                    "created_at": first_seen,
-                    "age_hours": age_hours,
-                    "metrics": {
-                        "liq_usd": latest.get("liq", 0),
-                        "vol_24h_usd": latest.get("vol_5m", 0) * 288,  # Scale 5m to 24h approx
-                        "price_usd": latest.get("price", 0),
-                    },
-                    "price_history": price_history,
-                    "chain": "base",
-                    "dex": "unknown"
-                }
-                tokens.append(token)
+    registry = get_registry()
+    for addr, data in registry.iterate_by_age(history=False):
+        # Convert registry format to lifecycle format (last 24h of the series only)
+        last_ms = registry.series.last_point_ts(addr)
+        if last_ms is None:
+            continue
+        price_history = registry.series.load(addr, last_ms - REGISTRY_WINDOW_MS, None).points()
+        if not price_history:
+            continue
+        
+        latest = price_history[-1]
+        first_seen = data.get("first_seen_iso", "")
+        
+        # Calculate age
+        age_hours = 0
+        if first_seen:
+            try:
+                first_dt = datetime.fromisoformat(first_seen.replace('Z', '+00:00'))
+                age_hours = (datetime.now() - first_dt).total_seconds() / 3600
+            except:
+                pass
+        
+        token = {
+            "token": data.get("token", {}),
+            "pool_address": addr,  # Use address as pool_address
+            "created_at": first_seen,
+            "age_hours": age_hours,
+            "metrics": {
+                "liq_usd": latest.get("liq", 0),
+                "vol_24h_usd": latest.get("vol_5m", 0) * 288,  # Scale 5m to 24h approx
+                "price_usd": latest.get("price", 0),
+            },
+            "price_history": price_history,
+            "chain": "base",
+            "dex": "unknown"
+        }
+        tokens.append(token)
     
     return {"candidates": tokens}
 
@@ -116,17 +121,65 @@ def save_pulse(pulse):
     with open(PULSE_FILE, 'w') as f:
         json.dump(output, f, indent=2)
 
+def index_holders(candidates):
+    """Track every candidate token in the holder index and bring it up to date"""
+    from chain_rpc import get_rpc
+    rpc = get_rpc()
+    head = rpc.block_number()
+    index = get_holder_index()
+    for candidate in candidates:
+        token_addr = (candidate.get("token") or {}).get("address") or ""
+        if len(token_addr) != 42:
+            continue
+        if candidate.get("block_number"):
+            pool_block = candidate["block_number"]
+        else:
+            try:
+                created = datetime.fromisoformat(candidate["created_at"].replace('Z', '+00:00'))
+                if created.tzinfo is None:
+                    created = created.astimezone()
+                pool_block = estimate_block(created.timestamp(), head)
+            except (KeyError, ValueError):
+                continue
+        pool = candidate.get("pool_address") or ""
+        index.track(token_addr, max(0, pool_block - DEPLOY_MARGIN),
+                    exclude=[pool] if len(pool) == 42 and pool.lower() != token_addr.lower() else ())
+    index.update(rpc, head)
+
 def fetch_holders(token_address):
-    """Fetch holder data — MVP placeholder, returns mock data"""
-    # TODO: Integrate with Covalent/Moralis/Alchemy API
-    # For now, return placeholder with low confidence
+    """Holder count and top-10 share from the local Transfer index"""
+    stats = get_holder_index().stats(token_address)
+    if not stats or stats["last_block"] <= 0:
+        return {
+            "count": 0,
+            "top10_pct": 0,
+            "source": "placeholder",
+            "confidence": "low"
+        }
     return {
-        "count": 0,
-        "top10_pct": 0,
-        "source": "placeholder",
-        "confidence": "low"
+        "count": stats["count"],
+        "top10_pct": stats["top10_pct"],
+        "as_of_block": stats["last_block"],
+        "source": "transfer_index",
+        # Incomplete = indexed supply does not match totalSupply() yet
+        "confidence": "high" if stats["complete"] else "low"
     }
 
+def check_holders(holders, checks, result, suffix=""):
+    """Holder count / top-10 checks; returns checks passed, or None without reliable data"""
+    if not holders or holders.get("confidence") == "low":
+        return None
+    passed = 0
+    if holders.get("count", 0) >= checks["min_holders"]:
+        passed += 1
+    else:
+        result["reasons"].append(f"holders_too_low{suffix}")
+    if holders.get("top10_pct", 100) <= checks["max_top10_pct"]:
+        passed += 1
+    else:
+        result["reasons"].append(f"top10_too_high_{holders.get('top10_pct', 0):.0f}pct{suffix}")
+    return passed
+
 def calculate_certified_score(metrics, stage="48h"):
     """Calculate certification health score"""
     liq = metrics.get("liq_usd", 0)
@@ -192,15 +245,10 @@ def evaluate_for_certification(candidate):
         else:
             result["reasons"].append(f"txns_too_low")
         
-        # Holders check (if available)
-        holders = candidate.get("holders", {})
-        if holders.get("count", 0) >= checks["min_holders"]:
-            passed += 1
-        else:
-            if holders:
-                result["reasons"].append(f"holders_too_low")
+        # Holders / top-10 checks (if available)
+        passed += check_holders(candidate.get("holders"), checks, result) or 0
         
-        # Need at least 4/6 for 48h certification (holders optional)
+        # Need at least 4 of liq/vol/txns/holders/top10 for 48h certification
         if passed >= 4:
             result["qualified"] = True
             result["stage"] = "48h"
@@ -229,6 +277,11 @@ def evaluate_for_certification(candidate):
         else:
             result["reasons"].append(f"txns_too_low_72h")
         
+        # Holder checks must pass too when holder data is available
+        holder_passed = check_holders(candidate.get("holders"), checks, result, "_72h")
+        if holder_passed is not None and holder_passed < 2:
+            passed = 0
+        
         if passed >= 3:
             result["qualified"] = True
             result["stage"] = "72h"
@@ -246,21 +299,28 @@ def certify():
     
     existing_certified = {c["pool_address"].lower() for c in pulse["certified"]}
     
+    # Holder stats for every candidate from the incremental Transfer index
+    try:
+        index_holders(tokens_data.get("candidates", []))
+    except Exception as e:
+        print(f"[CERTIFIER] Holder index not updated: {e}")
+    
     new_certified = 0
     upgraded = 0
     
     for candidate in tokens_data.get("candidates", []):
         pool_addr = candidate["pool_address"].lower()
         
+        # Get holders data
+        holders = fetch_holders((candidate.get("token") or {}).get("address"))
+        candidate["holders"] = holders
+        
         # Evaluate
         result = evaluate_for_certification(candidate)
         
         if result["qualified"]:
             stage = result["stage"]
             
-            # Get holders data
-            holders = fetch_holders(candidate["token"]["address"])
-            
             # Create certified entry
             certified_entry = {
                 "kind": "CERTIFIED_SIGNAL",
@@ -272,7 +332,7 @@ def certify():
                 "dex": candidate["dex"],
                 "pool_address": candidate["pool_address"],
                 "token": candidate["token"],
-                "quote_token": candidate["quote_token"],
+                "quote_token": candidate.get("quote_token", {}),
                 "metrics": candidate["metrics"],
                 "holders": holders,
                 "scores": {
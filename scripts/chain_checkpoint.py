@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+LURKER chain checkpoint — reorg-safe scan cursor for block scanners
+Keeps two cursors plus the hashes of the last HASH_WINDOW scanned blocks:
+- scanned:   last block read (may be at the head, not final yet)
+- confirmed: last block at least CONFIRMATIONS deep; results up to it are final
+
+Each run first compares the stored hashes with the chain. On a mismatch the
+cursor is rewound to the fork point, so only the reorged tail is rescanned,
+and the keys of provisional results found in those blocks are handed back to
+be retracted. Results from blocks that are not deep enough yet stay pending
+in the checkpoint and are promoted (once, no rescan) when they get confirmed.
+
+Two modes:
+- head:      scan up to the chain head, emit provisional results early
+- confirmed: scan up to head - CONFIRMATIONS only, every result is final
+
+The checkpoint is a plain dict (to_dict / from state) so scanners can keep it
+inside their own state file.
+"""
+from datetime import datetime, timezone
+
+from chain_rpc import RpcError, TransportError
+
+CONFIRMATIONS = 12    # Base blocks (~24s) before a block is treated as final
+HASH_WINDOW = 64      # Recent block hashes kept to detect reorgs
+HASH_BATCH_SIZE = 50  # eth_getBlockByNumber calls per batched request
+
+MODE_HEAD = "head"
+MODE_CONFIRMED = "confirmed"
+MODES = (MODE_HEAD, MODE_CONFIRMED)
+
+
+class ChainCheckpoint:
+    def __init__(self, state=None, mode=MODE_HEAD, confirmations=CONFIRMATIONS, window=HASH_WINDOW):
+        if mode not in MODES:
+            raise ValueError(f"unknown scan mode {mode!r} (expected one of {MODES})")
+        state = state or {}
+        # "last_block" is the plain cursor older checkpoints stored
+        scanned = state.get("scanned", state.get("last_block"))
+        self.scanned = scanned
+        self.confirmed = state.get("confirmed", scanned)
+        self.hashes = {int(n): h for n, h in (state.get("hashes") or {}).items()}
+        self.pending = {int(n): list(keys) for n, keys in (state.get("pending") or {}).items()}
+        self.mode = mode
+        self.confirmations = confirmations
+        self.window = window
+
+    def to_dict(self):
+        return {
+            "scanned": self.scanned,
+            "confirmed": self.confirmed,
+            "mode": self.mode,
+            "confirmations": self.confirmations,
+            "hashes": {str(n): h for n, h in sorted(self.hashes.items())},
+            "pending": {str(n): keys for n, keys in sorted(self.pending.items())},
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def target(self, head):
+        """Last block to scan for this mode"""
+        return head if self.mode == MODE_HEAD else head - self.confirmations
+
+    def next_range(self, head, lookback, max_catchup):
+        """(from_block, to_block) after the cursor; first run reads the last `lookback` blocks"""
+        to_block = self.target(head)
+        if self.scanned is None:
+            return max(0, to_block - lookback + 1), to_block
+        start = self.scanned + 1
+        if to_block - start + 1 > max_catchup:
+            print(f"[CHECKPOINT] {to_block - start + 1} blocks behind, skipping to the last {max_catchup}")
+            start = to_block - max_catchup + 1
+        return start, to_block
+
+    def _fetch_hashes(self, rpc, block_nums):
+        """{block: hash or None} from batched eth_getBlockByNumber (no transactions)"""
+        found = {}
+        for i in range(0, len(block_nums), HASH_BATCH_SIZE):
+            chunk = block_nums[i:i + HASH_BATCH_SIZE]
+            try:
+                results = rpc.batch([("eth_getBlockByNumber", [hex(n), False]) for n in chunk])
+            except (RpcError, TransportError) as e:
+                print(f"[CHECKPOINT] Could not read block hashes {chunk[0]}-{chunk[-1]}: {e}")
+                results = [None] * len(chunk)
+            for n, block in zip(chunk, results):
+                found[n] = block.get("hash") if isinstance(block, dict) else None
+        return found
+
+    def check_reorg(self, rpc):
+        """Rewind past any reorg of the stored hash window; returns keys to retract"""
+        if not self.hashes:
+            return []
+        nums = sorted(self.hashes)
+        canonical = self._fetch_hashes(rpc, nums)
+        changed = [n for n in nums if canonical.get(n) and canonical[n] != self.hashes[n]]
+        if not changed:
+            return []
+        first = changed[0]
+        if first == nums[0]:
+            print(f"[CHECKPOINT] Reorg reaches past the {len(nums)}-block hash window, rewinding to its start")
+        print(f"[CHECKPOINT] Reorg detected at block {first}, rescanning from there")
+        return self.rewind(first - 1)
+
+    def rewind(self, block):
+        """Forget everything after `block`; returns the pending keys found after it"""
+        retracted = []
+        for n in sorted(self.pending):
+            if n > block:
+                retracted.extend(self.pending.pop(n))
+        self.hashes = {n: h for n, h in self.hashes.items() if n <= block}
+        if self.scanned is not None and self.scanned > block:
+            self.scanned = block
+        if self.confirmed is not None and self.confirmed > block:
+            print(f"[CHECKPOINT] WARNING: reorg below confirmed block {self.confirmed} "
+                  f"(consider more than {self.confirmations} confirmations)")
+            self.confirmed = block
+        return retracted
+
+    def advance(self, rpc, scanned_to, head, items=(), seen_hashes=None):
+        """Record that blocks up to `scanned_to` were read.
+
+        items: [(block_number, key), ...] found in the scanned range.
+        seen_hashes: {block_number: hash} of the data that was read (e.g. the
+        blockHash of logs); other window blocks are looked up in one batch.
+        Returns (confirmed_keys, provisional_keys): keys that became final in
+        this step (including pending ones promoted now) and keys still
+        provisional. Items after the last block whose hash could be recorded
+        are left out and will be rescanned.
+        """
+        seen_hashes = seen_hashes or {}
+        start = self.scanned + 1 if self.scanned is not None else scanned_to - self.window + 1
+        window_start = max(start, scanned_to - self.window + 1)
+        wanted = [n for n in range(window_start, scanned_to + 1) if n not in seen_hashes]
+        fetched = self._fetch_hashes(rpc, wanted) if wanted else {}
+        for n in range(window_start, scanned_to + 1):
+            block_hash = seen_hashes.get(n) or fetched.get(n)
+            if not block_hash:
+                # Hash unknown (node lagging): stop before this block
+                scanned_to = n - 1
+                break
+            self.hashes[n] = block_hash
+
+        if self.scanned is None or scanned_to > self.scanned:
+            self.scanned = scanned_to
+        confirmed_to = min(self.scanned, head - self.confirmations) if self.scanned is not None else None
+        confirmed_keys, provisional_keys = [], []
+        for n in sorted(self.pending):
+            if confirmed_to is not None and n <= confirmed_to:
+                confirmed_keys.extend(self.pending.pop(n))
+        for n, key in items:
+            if n > scanned_to:
+                continue
+            if confirmed_to is not None and n <= confirmed_to:
+                confirmed_keys.append(key)
+            else:
+                self.pending.setdefault(n, []).append(key)
+                provisional_keys.append(key)
+
+        if confirmed_to is not None and (self.confirmed is None or confirmed_to > self.confirmed):
+            self.confirmed = confirmed_to
+        if self.scanned is not None:
+            self.hashes = {n: h for n, h in self.hashes.items() if n > self.scanned - self.window}
+        return confirmed_keys, provisional_keys
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+LURKER chain RPC — raw JSON-RPC client for Base
+Single and batched calls over keep-alive sessions (one per thread), with
+failover across endpoints on transport errors, timeouts and HTTP 429/5xx.
+Node-side errors come back as RpcError so callers can react to them (e.g.
+log range limits).
+"""
+import os
+import threading
+
+import requests
+
+BASE_RPCS = [u for u in [os.getenv("BASE_RPC_URL")] if u] + [
+    "https://mainnet.base.org",
+    "https://base-rpc.publicnode.com",
+    "https://base.llamarpc.com",
+]
+TIMEOUT = 30
+
+
+class RpcError(Exception):
+    """Error object returned by the node"""
+
+    def __init__(self, error):
+        error = error if isinstance(error, dict) else {"message": str(error)}
+        self.code = error.get("code")
+        self.message = str(error.get("message", ""))
+        self.data = error.get("data")
+        super().__init__(f"{self.code}: {self.message}")
+
+
+class TransportError(Exception):
+    """Every endpoint failed at the HTTP level"""
+
+
+class ChainRpc:
+    def __init__(self, urls=None, timeout=TIMEOUT):
+        self.urls = list(urls or BASE_RPCS)
+        self.timeout = timeout
+        self.requests_made = 0
+        self._preferred = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _session(self):
+        if getattr(self._local, "session", None) is None:
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _post(self, payload):
+        """POST to the preferred endpoint, moving on to the next one on failure"""
+        errors = []
+        start = self._preferred
+        for i in range(len(self.urls)):
+            idx = (start + i) % len(self.urls)
+            url = self.urls[idx]
+            try:
+                with self._lock:
+                    self.requests_made += 1
+                r = self._session().post(url, json=payload, timeout=self.timeout)
+                if r.status_code == 429 or r.status_code >= 500:
+                    raise requests.HTTPError(f"HTTP {r.status_code}")
+                data = r.json()
+            except (requests.RequestException, ValueError) as e:
+                errors.append(f"{url}: {e}")
+                continue
+            self._preferred = idx
+            return data
+        raise TransportError("; ".join(errors))
+
+    def call(self, method, params=None):
+        data = self._post({"jsonrpc": "2.0", "method": method, "params": params or [], "id": 1})
+        if not isinstance(data, dict):
+            raise RpcError({"message": f"unexpected response {data!r:.200}"})
+        if data.get("error"):
+            raise RpcError(data["error"])
+        return data.get("result")
+
+    def batch(self, calls):
+        """[(method, params), ...] in one HTTP request; results in call order.
+
+        Failed entries are returned as RpcError instances instead of raising.
+        """
+        if not calls:
+            return []
+        payload = [{"jsonrpc": "2.0", "method": m, "params": p, "id": i}
+                   for i, (m, p) in enumerate(calls)]
+        data = self._post(payload)
+        if not isinstance(data, list):
+            # Whole batch rejected (batch too large, rate limit...)
+            raise RpcError((data or {}).get("error") or {"message": "batch rejected"})
+        results = [RpcError({"message": "missing from batch response"})] * len(calls)
+        for item in data:
+            i = item.get("id")
+            if isinstance(i, int) and 0 <= i < len(calls):
+                results[i] = RpcError(item["error"]) if item.get("error") else item.get("result")
+        return results
+
+    def block_number(self):
+        return int(self.call("eth_blockNumber"), 16)
+
+
+_rpc = None
+
+
+def get_rpc():
+    global _rpc
+    if _rpc is None:
+        _rpc = ChainRpc()
+    return _rpc
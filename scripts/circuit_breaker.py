@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+LURKER circuit breaker — per-provider, persisted across cron runs
+State lives in state/circuit_breakers.json so a provider found broken by one
+run is skipped by the following runs instead of paying the full retry backoff
+again.
+
+States:
+- closed: requests flow normally
+- open: provider skipped until the cool-down expires
+- half_open: cool-down expired, one cheap probe (single attempt, no backoff)
+  decides whether to close again or re-open
+"""
+import time
+from pathlib import Path
+
+from safe_state import StateCorruptError, StateFile
+
+STATE_FILE = Path(__file__).parent.parent / "state" / "circuit_breakers.json"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+FAILURE_THRESHOLD = 2   # Consecutive exhausted fetches before opening
+COOLDOWN_SECONDS = 600  # Skip window once open (2 cron cycles)
+PROBE_TIMEOUT = 120     # A half-open probe older than this is considered lost
+
+
+class CircuitBreaker:
+    """Open / half-open / closed breaker per provider, stored in one JSON file"""
+
+    def __init__(self, state_file=STATE_FILE, failure_threshold=FAILURE_THRESHOLD,
+                 cooldown=COOLDOWN_SECONDS):
+        self.store = StateFile(state_file, max_retries=5, retry_delay=0.2)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+    DEFAULT = {"schema": "lurker_circuit_breakers_v1", "providers": {}}
+
+    def _load(self):
+        return self.store.load(default=self.DEFAULT)
+
+    def _update(self, fn):
+        try:
+            return self.store.update(fn, default=self.DEFAULT)
+        except StateCorruptError as e:
+            # Breaker state is disposable: start over rather than block every fetch
+            print(f"[BREAKER] Resetting unreadable state: {e}")
+            self.store.save(self.DEFAULT)
+            return self.store.update(fn, default=self.DEFAULT)
+
+    def _entry(self, data, provider):
+        return data["providers"].setdefault(provider, {
+            "state": CLOSED, "failures": 0, "opened_at": None, "probe_started": None
+        })
+
+    def before_request(self, provider):
+        """Returns CLOSED (go ahead), HALF_OPEN (go ahead, single probe attempt) or OPEN (skip)"""
+        entry = self._load()["providers"].get(provider)
+        if not entry or entry["state"] == CLOSED:
+            return CLOSED
+
+        def claim_probe(data):
+            # Re-checked under the lock so only one run claims the probe
+            entry = data["providers"].get(provider)
+            if not entry or entry["state"] == CLOSED:
+                return CLOSED
+            now = time.time()
+            if entry["state"] == HALF_OPEN and now - (entry.get("probe_started") or 0) < PROBE_TIMEOUT:
+                return OPEN  # Another run is probing right now
+            if entry["state"] == OPEN and now - (entry.get("opened_at") or 0) < self.cooldown:
+                return OPEN
+            entry["state"] = HALF_OPEN
+            entry["probe_started"] = now
+            return HALF_OPEN
+        return self._update(claim_probe)
+
+    def record_success(self, provider):
+        entry = self._load()["providers"].get(provider)
+        if not entry or (entry["state"] == CLOSED and not entry["failures"]):
+            return
+
+        def close(data):
+            entry = data["providers"].get(provider)
+            if not entry:
+                return
+            if entry["state"] != CLOSED:
+                print(f"[BREAKER] {provider}: closed (provider recovered)")
+            entry.update(state=CLOSED, failures=0, opened_at=None, probe_started=None)
+        self._update(close)
+
+    def record_failure(self, provider):
+        def fail(data):
+            entry = self._entry(data, provider)
+            entry["failures"] += 1
+            if entry["state"] == HALF_OPEN or entry["failures"] >= self.failure_threshold:
+                if entry["state"] != OPEN:
+                    print(f"[BREAKER] {provider}: open for {self.cooldown}s "
+                          f"after {entry['failures']} failures")
+                entry.update(state=OPEN, opened_at=time.time(), probe_started=None)
+        self._update(fail)
+
+    def status(self):
+        return self._load()["providers"]
+
+
+_breaker = None
+
+
+def get_breaker():
+    global _breaker
+    if _breaker is None:
+        _breaker = CircuitBreaker()
+    return _breaker
+
+
+def before_request(provider):
+    return get_breaker().before_request(provider)
+
+
+def record(provider, ok):
+    if ok:
+        get_breaker().record_success(provider)
+    else:
+        get_breaker().record_failure(provider)
+
+
+if __name__ == "__main__":
+    for name, entry in sorted(get_breaker().status().items()):
+        print(f"{name}: {entry['state']} (failures={entry['failures']})")
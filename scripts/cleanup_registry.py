@@ -2,12 +2,15 @@
 """
 LURKER Token Registry Cleanup
 Removes stale/old tokens from registry to prevent bloat and improve discovery
+Only the removed tokens are deleted from the SQLite registry; the backup is an
+online copy of the database.
 """
-import json
+import math
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
-REGISTRY_FILE = Path(__file__).parent.parent / "state" / "token_registry.json"
+from token_registry import get_registry
+
 BACKUP_DIR = Path(__file__).parent.parent / "state" / "backups"
 
 # Cleanup thresholds
@@ -18,19 +21,16 @@ INACTIVE_THRESHOLD_DAYS = 7  # Consider inactive if no updates for 7 days
 
 def load_registry():
     try:
-        with open(REGISTRY_FILE, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
+        return {"tokens": dict(get_registry().iterate_by_age(newest_first=False, history=False))}
+    except Exception as e:
         print(f"[CLEANUP] Error loading registry: {e}")
         return None
 
 
 def save_backup(registry):
-    BACKUP_DIR.mkdir(parents=True, exist_ok=True)
     timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
-    backup_file = BACKUP_DIR / f"token_registry_backup_{timestamp}.json"
-    with open(backup_file, 'w') as f:
-        json.dump(registry, f, indent=2)
+    backup_file = BACKUP_DIR / f"token_registry_backup_{timestamp}.db"
+    get_registry().backup(backup_file)
     print(f"[CLEANUP] Backup saved: {backup_file}")
     return backup_file
 
@@ -43,17 +43,12 @@ def calculate_age_days(timestamp_str):
         return 9999  # Very old if can't parse
 
 
-def get_last_activity(token_data):
+def get_last_activity(token_addr, token_data):
     """Get the last activity timestamp for a token"""
     # Check price history
-    price_history = token_data.get("price_history", [])
-    if price_history:
-        last_price = price_history[-1].get("timestamp", "")
-        if last_price:
-            try:
-                return datetime.fromisoformat(last_price.replace('Z', '+00:00'))
-            except:
-                pass
+    last_ts = get_registry().series.last_point_ts(token_addr)
+    if last_ts:
+        return datetime.fromtimestamp(last_ts / 1000, tz=timezone.utc)
     
     # Check first_seen
     first_seen = token_data.get("first_seen_iso", "")
@@ -71,15 +66,15 @@ def should_remove_token(token_addr, token_data):
     
     # Keep if it has significant liquidity
     liq = 0
-    price_history = token_data.get("price_history", [])
-    if price_history:
-        liq = price_history[-1].get("liq", 0)
+    last = get_registry().series.last_point(token_addr)
+    if len(last) and not math.isnan(last.liq[0]):  # NaN: no liq recorded
+        liq = float(last.liq[0])
     
     if liq >= MIN_LIQ_FOR_RETENTION:
         return False, "has_liquidity"
     
     # Check last activity
-    last_activity = get_last_activity(token_data)
+    last_activity = get_last_activity(token_addr, token_data)
     if not last_activity:
         return True, "no_activity_data"
     
@@ -119,6 +114,7 @@ def cleanup_registry(registry):
     # Remove stale tokens
     for addr in to_remove:
         del tokens[addr]
+    registry["removed"] = to_remove
     
     removed_count = len(to_remove)
     remaining_count = len(tokens)
@@ -142,10 +138,11 @@ def cleanup_registry(registry):
 
 
 def save_registry(registry):
-    """Save the cleaned registry"""
-    with open(REGISTRY_FILE, 'w') as f:
-        json.dump(registry, f, indent=2)
-    print(f"[CLEANUP] Registry saved to {REGISTRY_FILE}")
+    """Delete the removed tokens and record the cleanup stats"""
+    store = get_registry()
+    store.delete(registry.get("removed", []))
+    store.set_meta("cleanup", registry["meta"])
+    print(f"[CLEANUP] Registry saved to {store.db_file}")
 
 
 def main():
@@ -168,6 +165,13 @@ def main():
     backup_file = save_backup(registry)
     print()
     
+    # Price history retention: raw 24h, then 5m buckets, then hourly
+    tokens, raw, five = get_registry().compact(limit=None)
+    if tokens:
+        print(f"[CLEANUP] Compacted price history of {tokens} tokens "
+              f"({raw} raw points, {five} 5m buckets rolled up)")
+        print()
+    
     # Clean up
     cleaned_registry, stats = cleanup_registry(registry)
     
@@ -191,7 +195,8 @@ def main():
     save_registry(cleaned_registry)
     
     # Calculate size reduction
-    original_size = REGISTRY_FILE.stat().st_size / (1024 * 1024) if REGISTRY_FILE.exists() else 0
+    db_file = get_registry().db_file
+    original_size = db_file.stat().st_size / (1024 * 1024) if db_file.exists() else 0
     print(f"[CLEANUP] Registry size: {original_size:.2f} MB")
     print()
     print(f"[CLEANUP] Backup saved at: {backup_file}")
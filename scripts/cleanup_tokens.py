@@ -5,31 +5,35 @@ Nettoie les feeds : retire les rugs des catégories actives, élimine les doublo
 """
 
 import json
+import shutil
+import time
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from safe_state import StateFile
+from safe_state import StateCorruptError, StateFile
 
 STATE_FILE = Path(__file__).parent.parent / "state" / "lurker_state.json"
+BACKUP_FILE = STATE_FILE.parent / "lurker_state_backup.json"
 
-def load_state():
-    if not STATE_FILE.exists():
-        return {"tokens": {}}
 
-    handler = StateFile(STATE_FILE, max_retries=5, retry_delay=0.2)
-    state = handler.load(default=None)
-    if state is None:
-        backup_file = STATE_FILE.parent / "lurker_state_backup.json"
-        if backup_file.exists():
-            print("[CLEANUP] Primary state unreadable, trying backup")
-            return StateFile(backup_file, max_retries=2, retry_delay=0.1).load(default={"tokens": {}})
-        return {"tokens": {}}
-    return state
+def _state():
+    return StateFile(STATE_FILE, max_retries=5, retry_delay=0.2)
 
 
-def save_state(state):
-    handler = StateFile(STATE_FILE, max_retries=5, retry_delay=0.2)
-    if not handler.save(state):
-        raise RuntimeError("failed to save state atomically")
+def run_cleanup():
+    """cleanup_tokens() as one transaction on the state file; returns (state, stats)"""
+    try:
+        # Pure computation over the whole file: run it unlocked, commit if nobody wrote meanwhile
+        return _state().update(cleanup_tokens, default={"tokens": {}, "meta": {}}, optimistic=True)
+    except StateCorruptError as e:
+        if not BACKUP_FILE.exists():
+            raise
+        kept = STATE_FILE.with_name(f"{STATE_FILE.name}.corrupt-{int(time.time())}")
+        shutil.copy2(STATE_FILE, kept)
+        print(f"[CLEANUP] Primary state unreadable ({e}), kept as {kept.name}, restoring from backup")
+        state, stats = cleanup_tokens(StateFile(BACKUP_FILE, max_retries=2, retry_delay=0.1).load(default={"tokens": {}}))
+        if not _state().save(state):
+            raise RuntimeError("failed to save state atomically")
+        return state, stats
 
 def is_token_rugged(token):
     """Détermine si un token est RUGGED"""
@@ -178,7 +182,7 @@ def cleanup_tokens(state):
     pumps = sum(1 for t in tokens.values() if t.get("performance", {}).get("status") == "pumping")
     dumps = sum(1 for t in tokens.values() if t.get("performance", {}).get("status") == "dumping")
     
-    state["meta"]["stats"] = {
+    state.setdefault("meta", {})["stats"] = {
         "by_category": categories,
         "pumps_24h": pumps,
         "dumps_24h": dumps,
@@ -202,12 +206,10 @@ def main():
     print("LURKER Core - Token Cleanup")
     print("="*70)
     
-    state = load_state()
-    print(f"Tokens avant cleanup: {len(state.get('tokens', {}))}")
+    state, stats = run_cleanup()
+    print(f"Tokens avant cleanup: {stats['total_before']}")
     print()
     
-    state, stats = cleanup_tokens(state)
-    
     print(f"Résultats:")
     print(f"  - Tokens avant: {stats['total_before']}")
     print(f"  - Tokens après: {stats['total_after']}")
@@ -224,8 +226,6 @@ def main():
             print(f"  ... et {len(stats['details']) - 20} autres")
         print()
     
-    save_state(state)
-    
     print(f"Catégories finales:")
     for cat, count in state["meta"]["stats"]["by_category"].items():
         if count > 0:
@@ -4,21 +4,22 @@ LURKER Core - Copycat Detector
 Détecte et marque automatiquement les tokens copycat
 """
 
-import json
 from datetime import datetime, timezone
 from pathlib import Path
 
+from safe_state import StateFile
+
 STATE_FILE = Path(__file__).parent.parent / "state" / "lurker_state.json"
 
-def load_state():
-    if STATE_FILE.exists():
-        with open(STATE_FILE) as f:
-            return json.load(f)
-    return {"tokens": {}}
+def _state():
+    return StateFile(STATE_FILE, max_retries=5, retry_delay=0.2)
 
-def save_state(state):
-    with open(STATE_FILE, 'w') as f:
-        json.dump(state, f, indent=2)
+def detect_and_update(state):
+    """Transaction body: mark copycats, refresh stats when anything changed"""
+    copycats = detect_copycats(state)
+    if copycats:
+        update_stats(state)
+    return copycats, len(state["tokens"]), state.get("meta", {}).get("stats", {}).get("rugged")
 
 def detect_copycats(state):
     """Détecte les copycats et les marque comme RUGGED"""
@@ -135,10 +136,8 @@ def main():
     print("LURKER Core - Copycat Detector")
     print("="*60)
     
-    state = load_state()
-    print(f"Tokens loaded: {len(state['tokens'])}")
-    
-    copycats = detect_copycats(state)
+    copycats, total, rugged = _state().update(detect_and_update, default={"tokens": {}}, optimistic=True)
+    print(f"Tokens loaded: {total}")
     
     if copycats:
         print(f"\n🚫 {len(copycats)} copycat(s) detected and moved to RUGGED:")
@@ -148,11 +147,8 @@ def main():
             print(f"    Liq: ${c['liq']:,.0f} (vs legit ${c['legit_liq']:,.0f})")
             print(f"    Reasons: {', '.join(c['reasons'])}")
         
-        state = update_stats(state)
-        save_state(state)
-        
         print(f"\n{'='*60}")
-        print(f"Total RUGGED: {state['meta']['stats']['rugged']}")
+        print(f"Total RUGGED: {rugged}")
     else:
         print("\n✅ No new copycats detected")
     
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+LURKER DexScreener client — batched token lookups
+Groups token addresses into multi-address /tokens/v1 requests (max 30 per call)
+and picks the best pair per token locally, instead of one /token-pairs call per token.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from urllib.parse import urlparse
+
+import requests
+
+from rate_limiter import PRIORITY_SCAN, limited_get
+from token_metadata import remember_pairs
+
+BASE_URL = "https://api.dexscreener.com"
+CHAIN = "base"
+TIMEOUT = 15
+TOKENS_BATCH_SIZE = 30  # DexScreener limit for comma-separated addresses
+ASYNC_WORKERS = 8       # Max in-flight requests for async scans
+PER_HOST_LIMIT = 4      # Max in-flight requests per API host
+
+
+def safe_num(x, default=0):
+    try:
+        return float(x) if x is not None else default
+    except:
+        return default
+
+
+def chunked(items, size):
+    """Split a list into consecutive chunks of at most `size` items"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def best_pair(pairs):
+    """Best pair by liquidity (same rule as the per-token scanners)"""
+    if not pairs:
+        return None
+    return max(pairs, key=lambda x: safe_num((x.get("liquidity") or {}).get("usd"), 0))
+
+
+def pick_best(by_token):
+    """{token: [pairs]} -> {token: best pair}, dropping tokens without pairs"""
+    best = {}
+    for addr, pairs in by_token.items():
+        pair = best_pair(pairs)
+        if pair:
+            best[addr] = pair
+    return best
+
+
+class DexScreenerClient:
+    """Thin DexScreener client sharing one HTTP session.
+
+    Requests are single-flight within a scan: the same URL, or the same token
+    across different batches, is fetched once and every caller gets the same
+    parsed result. Call begin_scan() to start from a clean slate.
+    """
+
+    def __init__(self, base_url=BASE_URL, chain=CHAIN, timeout=TIMEOUT,
+                 batch_size=TOKENS_BATCH_SIZE, session=None, priority=PRIORITY_SCAN):
+        self.base_url = base_url
+        self.chain = chain
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.priority = priority
+        self.session = session or requests.Session()
+        self.session.headers.setdefault("Accept", "application/json")
+        self.requests_made = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._flights = {}  # url -> Future of parsed JSON
+        self._tokens = {}   # token_address_lower -> Future of [pair, ...]
+
+    def begin_scan(self):
+        """Forget results of the previous scan"""
+        with self._lock:
+            self._flights = {}
+            self._tokens = {}
+            self.requests_made = 0
+            self.coalesced = 0
+
+    def _fetch(self, url):
+        with self._lock:  # Fetched from several threads at once
+            self.requests_made += 1
+        try:
+            r = limited_get(url, priority=self.priority, session=self.session, timeout=self.timeout)
+            r.raise_for_status()
+            return r.json()
+        except Exception as e:
+            print(f"[DEXSCREENER] Error {url}: {e}")
+            return None
+
+    def get_json(self, url):
+        with self._lock:
+            flight = self._flights.get(url)
+            owner = flight is None
+            if owner:
+                flight = self._flights[url] = Future()
+            else:
+                self.coalesced += 1
+        if owner:
+            flight.set_result(self._fetch(url))
+        return flight.result()
+
+    def tokens_url(self, addresses):
+        return f"{self.base_url}/tokens/v1/{self.chain}/{','.join(addresses)}"
+
+    def _unique(self, addresses):
+        wanted = []
+        seen = set()
+        for addr in addresses:
+            key = (addr or "").lower()
+            if key and key not in seen:
+                seen.add(key)
+                wanted.append(key)
+        return wanted
+
+    def _claim(self, addresses):
+        """Split tokens into ones this caller must fetch and futures for all of them"""
+        wanted = self._unique(addresses)
+        mine = []
+        futures = {}
+        with self._lock:
+            for addr in wanted:
+                fut = self._tokens.get(addr)
+                if fut is None:
+                    fut = self._tokens[addr] = Future()
+                    mine.append(addr)
+                else:
+                    self.coalesced += 1
+                futures[addr] = fut
+        return mine, futures
+
+    def _resolve(self, batch, pairs):
+        """Index a batch response per token and complete the claimed futures"""
+        by_token = {a: [] for a in batch}
+        if isinstance(pairs, dict):
+            pairs = pairs.get("pairs") or []
+        if isinstance(pairs, list):
+            remember_pairs(pairs)
+        for pair in pairs if isinstance(pairs, list) else []:
+            # Attach each pair to every requested token it contains (base or quote side)
+            for side in ("baseToken", "quoteToken"):
+                addr = ((pair.get(side) or {}).get("address") or "").lower()
+                if addr in by_token:
+                    by_token[addr].append(pair)
+        for addr, found in by_token.items():
+            self._tokens[addr].set_result(found)
+
+    def fetch_pairs_by_token(self, addresses):
+        """Fetch all pairs for many tokens in batched calls.
+
+        Returns {token_address_lower: [pair, ...]}, like one /token-pairs call per token.
+        """
+        mine, futures = self._claim(addresses)
+        for batch in chunked(mine, self.batch_size):
+            pairs = None
+            try:
+                pairs = self.get_json(self.tokens_url(batch))
+            finally:
+                self._resolve(batch, pairs)
+        return {addr: fut.result() for addr, fut in futures.items()}
+
+    def fetch_best_pairs(self, addresses):
+        """Best pair per token, {token_address_lower: pair}; tokens with no pairs are omitted"""
+        return pick_best(self.fetch_pairs_by_token(addresses))
+
+    async def fetch_pairs_by_token_async(self, addresses, pool):
+        """Same as fetch_pairs_by_token, with batches fetched concurrently through `pool`"""
+        mine, futures = self._claim(addresses)
+
+        async def run_batch(batch):
+            pairs = None
+            try:
+                pairs = await pool.get_json(self.tokens_url(batch))
+            finally:
+                self._resolve(batch, pairs)
+
+        await asyncio.gather(*(run_batch(batch) for batch in chunked(mine, self.batch_size)))
+        return {addr: await asyncio.wrap_future(fut) for addr, fut in futures.items()}
+
+    async def fetch_best_pairs_async(self, addresses, pool):
+        return pick_best(await self.fetch_pairs_by_token_async(addresses, pool))
+
+
+class AsyncFetchPool:
+    """Bounded-concurrency pool over a blocking client, with per-host limits.
+
+    Requests run in worker threads; at most `workers` are in flight overall and
+    at most `per_host` against any single host. Create one per event loop.
+    """
+
+    def __init__(self, client, workers=ASYNC_WORKERS, per_host=PER_HOST_LIMIT):
+        self.client = client
+        self.per_host = per_host
+        self._workers = asyncio.Semaphore(workers)
+        self._hosts = {}
+
+    def _host_slot(self, url):
+        host = urlparse(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return self._hosts[host]
+
+    async def get_json(self, url):
+        async with self._workers:
+            async with self._host_slot(url):
+                return await asyncio.to_thread(self.client.get_json, url)
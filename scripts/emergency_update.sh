@@ -17,6 +17,7 @@ python3 scripts/feed_sentinel.py
 
 echo ""
 echo "[3/4] Committing changes..."
+python3 scripts/token_registry.py export >/dev/null
 git add signals/cio_feed.json state/token_registry.json 2>/dev/null
 git diff --cached --quiet || git commit -m "fix: emergency manual update $(date +%H:%M)"
 
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+LURKER EVM ABI helpers — just enough ABI for raw JSON-RPC scanning
+Pure Python (no web3 / eth_abi needed): keccak256, event topics and decoding
+of the static words found in event logs, plus EventDecoder for full event ABIs.
+"""
+from functools import lru_cache
+
+_RC = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+]
+_ROT = [
+    [0, 36, 3, 41, 18],
+    [1, 44, 10, 45, 2],
+    [62, 6, 43, 15, 61],
+    [28, 55, 25, 21, 56],
+    [27, 20, 39, 8, 14],
+]
+_MASK = (1 << 64) - 1
+
+
+def _rol(v, n):
+    return ((v << n) | (v >> (64 - n))) & _MASK if n else v
+
+
+def _keccak_f(a):
+    for rc in _RC:
+        c = [a[x][0] ^ a[x][1] ^ a[x][2] ^ a[x][3] ^ a[x][4] for x in range(5)]
+        d = [c[(x - 1) % 5] ^ _rol(c[(x + 1) % 5], 1) for x in range(5)]
+        a = [[a[x][y] ^ d[x] for y in range(5)] for x in range(5)]
+        b = [[0] * 5 for _ in range(5)]
+        for x in range(5):
+            for y in range(5):
+                b[y][(2 * x + 3 * y) % 5] = _rol(a[x][y], _ROT[x][y])
+        a = [[b[x][y] ^ (~b[(x + 1) % 5][y] & b[(x + 2) % 5][y]) for y in range(5)] for x in range(5)]
+        a[0][0] ^= rc
+    return a
+
+
+def keccak256(data):
+    """Ethereum keccak256 (original Keccak padding, not NIST SHA3-256)"""
+    if isinstance(data, str):
+        data = data.encode()
+    rate = 136
+    pad = rate - len(data) % rate
+    if pad == 1:
+        padded = bytes(data) + b"\x81"  # Both pad bits share the last byte
+    else:
+        padded = bytes(data) + b"\x01" + b"\x00" * (pad - 2) + b"\x80"
+    state = [[0] * 5 for _ in range(5)]
+    for off in range(0, len(padded), rate):
+        block = padded[off:off + rate]
+        for i in range(rate // 8):
+            state[i % 5][i // 5] ^= int.from_bytes(block[8 * i:8 * i + 8], "little")
+        state = _keccak_f(state)
+    return b"".join(state[i % 5][i // 5].to_bytes(8, "little") for i in range(4))
+
+
+def event_topic(signature):
+    """topic0 of an event, e.g. event_topic("Transfer(address,address,uint256)")"""
+    return "0x" + keccak256(signature).hex()
+
+
+def words(data):
+    """Split hex ABI data into 32-byte words (as hex strings without 0x)"""
+    data = (data or "0x")[2:]
+    return [data[i:i + 64] for i in range(0, len(data), 64)]
+
+
+def word_to_address(word):
+    return "0x" + word[-40:]
+
+
+def word_to_int(word, signed=False):
+    value = int(word, 16)
+    if signed and value >= 1 << 255:
+        value -= 1 << 256
+    return value
+
+
+def word_to_bool(word):
+    return int(word, 16) != 0
+
+
+def hex_to_int(value):
+    return int(value, 16) if isinstance(value, str) else int(value or 0)
+
+
+@lru_cache(maxsize=4096)
+def to_checksum_address(address):
+    """EIP-55 mixed-case address"""
+    addr = address.lower().replace("0x", "", 1)
+    digest = keccak256(addr).hex()
+    return "0x" + "".join(c.upper() if int(digest[i], 16) >= 8 else c for i, c in enumerate(addr))
+
+
+def selector(signature):
+    """4-byte function selector as hex without 0x, e.g. selector("symbol()")"""
+    return keccak256(signature)[:4].hex()
+
+
+def encode_address(address):
+    return address.lower().replace("0x", "", 1).rjust(64, "0")
+
+
+def encode_uint(value):
+    return format(value, "064x")
+
+
+def encode_bytes(data):
+    """Dynamic `bytes` tail: length word + right-padded data"""
+    hex_data = data.hex()
+    return encode_uint(len(data)) + hex_data + "0" * ((-len(hex_data)) % 64)
+
+
+def decode_string(data):
+    """ABI `string` return value; also accepts bytes32 (non-standard tokens like MKR).
+
+    Returns None when the data is neither.
+    """
+    if len(data) == 32:
+        text = data.rstrip(b"\x00")
+    elif len(data) >= 64:
+        offset = int.from_bytes(data[:32], "big")
+        if offset + 32 > len(data):
+            return None
+        length = int.from_bytes(data[offset:offset + 32], "big")
+        text = data[offset + 32:offset + 32 + length]
+        if len(text) != length:
+            return None
+    else:
+        return None
+    try:
+        return text.decode("utf-8").strip("\x00").strip() or None
+    except UnicodeDecodeError:
+        return None
+
+
+def decode_uint(data):
+    return int.from_bytes(data[:32], "big") if len(data) >= 32 else None
+
+
+def _word_decoder(typ):
+    """Decoder for one 32-byte word of a static ABI type"""
+    if typ == "address":
+        return lambda w: to_checksum_address("0x" + w[12:].hex())
+    if typ == "bool":
+        return lambda w: any(w)
+    if typ.startswith("uint"):
+        return lambda w: int.from_bytes(w, "big")
+    if typ.startswith("int"):
+        return lambda w: int.from_bytes(w, "big", signed=True)
+    if typ.startswith("bytes") and typ != "bytes":
+        size = int(typ[5:])
+        return lambda w: "0x" + w[:size].hex()
+    raise ValueError(f"unsupported static type {typ}")
+
+
+def _word(data, offset):
+    word = data[offset:offset + 32]
+    if len(word) != 32:
+        raise ValueError(f"data too short for word at {offset}")
+    return word
+
+
+def _tail_decoder(typ):
+    """Decoder for a dynamic ABI type, given the data and the tail offset"""
+    def length_and_body(data, offset):
+        length = int.from_bytes(_word(data, offset), "big")
+        return length, offset + 32
+
+    if typ in ("string", "bytes"):
+        def decode(data, offset):
+            length, start = length_and_body(data, offset)
+            raw = data[start:start + length]
+            if len(raw) != length:
+                raise ValueError(f"{typ} runs past the end of data")
+            return raw.decode("utf-8", errors="replace") if typ == "string" else "0x" + raw.hex()
+        return decode
+    if typ.endswith("[]"):
+        item = _word_decoder(typ[:-2])
+
+        def decode(data, offset):
+            length, start = length_and_body(data, offset)
+            return [item(_word(data, start + 32 * i)) for i in range(length)]
+        return decode
+    raise ValueError(f"unsupported dynamic type {typ}")
+
+
+class EventDecoder:
+    """Event log decoder compiled once from its ABI.
+
+    inputs is [(type, name, indexed), ...] in declaration order. Supports
+    static types (address, bool, (u)intN, bytesN) plus string, bytes and
+    static arrays T[] in the data section; indexed dynamic values are returned
+    as their topic hash. Calling the decoder on a raw log returns {name: value}
+    and raises ValueError / IndexError on malformed logs.
+    """
+
+    def __init__(self, name, inputs):
+        self.name = name
+        self.signature = f"{name}({','.join(t for t, _, _ in inputs)})"
+        self.topic = event_topic(self.signature)
+        self._fields = []
+        topic_i, slot = 1, 0
+        for typ, field, indexed in inputs:
+            dynamic = typ in ("string", "bytes") or typ.endswith("[]")
+            if indexed:
+                decode = (lambda w: "0x" + w.hex()) if dynamic else _word_decoder(typ)
+                self._fields.append((field, True, topic_i, decode, False))
+                topic_i += 1
+            else:
+                decode = _tail_decoder(typ) if dynamic else _word_decoder(typ)
+                self._fields.append((field, False, 32 * slot, decode, dynamic))
+                slot += 1
+
+    def __call__(self, log):
+        topics = log.get("topics") or []
+        data = bytes.fromhex((log.get("data") or "0x")[2:])
+        out = {}
+        for field, indexed, pos, decode, dynamic in self._fields:
+            if indexed:
+                out[field] = decode(bytes.fromhex(topics[pos][2:]))
+            elif dynamic:
+                out[field] = decode(data, int.from_bytes(_word(data, pos), "big"))
+            else:
+                out[field] = decode(_word(data, pos))
+        return out
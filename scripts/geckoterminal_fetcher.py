@@ -4,12 +4,14 @@ GeckoTerminal API V2 Fetcher for LURKER
 Ref: https://api.geckoterminal.com/api/v2
 """
 import json
-import requests
 import time
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from rate_limiter import limited_get
+from token_metadata import get_cache as get_metadata_cache
+
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_DIR = SCRIPT_DIR.parent
 LOG_FILE = PROJECT_DIR / "logs" / "geckoterminal.log"
@@ -37,7 +39,7 @@ def fetch_with_retry(url: str, max_retries: int = 3) -> Optional[Dict]:
     """Fetch with rate limit handling"""
     for attempt in range(max_retries):
         try:
-            resp = requests.get(url, headers=HEADERS, timeout=20)
+            resp = limited_get(url, headers=HEADERS, timeout=20)
             
             if resp.status_code == 429:
                 wait = 10 * (attempt + 1)
@@ -67,6 +69,7 @@ def fetch_new_pools(limit: int = 20) -> List[Dict]:
         return []
     
     pools = []
+    metadata = []
     for pool in data.get("data", []):
         attrs = pool.get("attributes", {})
         
@@ -89,6 +92,7 @@ def fetch_new_pools(limit: int = 20) -> List[Dict]:
         
         # Extract token symbol from pool name (e.g., "DEGEN / WETH" -> "DEGEN")
         symbol = pool_name.split(" / ")[0] if "/" in pool_name else "UNKNOWN"
+        metadata.append({"address": base_addr, "symbol": symbol})
         
         # Get metrics
         liquidity = float(attrs.get("reserve_in_usd", 0) or 0)
@@ -109,6 +113,7 @@ def fetch_new_pools(limit: int = 20) -> List[Dict]:
             "source": "geckoterminal"
         })
     
+    get_metadata_cache().put_many(metadata, "geckoterminal")
     log(f"✅ Found {len(pools)} new pools")
     return pools
 
@@ -123,6 +128,7 @@ def fetch_trending_pools(limit: int = 20) -> List[Dict]:
         return []
     
     pools = []
+    metadata = []
     for pool in data.get("data", []):
         attrs = pool.get("attributes", {})
         
@@ -140,6 +146,7 @@ def fetch_trending_pools(limit: int = 20) -> List[Dict]:
             
         pool_name = attrs.get("name", "")
         symbol = pool_name.split(" / ")[0] if "/" in pool_name else "UNKNOWN"
+        metadata.append({"address": base_addr, "symbol": symbol})
         
         liquidity = float(attrs.get("reserve_in_usd", 0) or 0)
         volume_24h = float(attrs.get("volume_usd", {}).get("h24", 0) or 0)
@@ -159,6 +166,7 @@ def fetch_trending_pools(limit: int = 20) -> List[Dict]:
             "source": "geckoterminal"
         })
     
+    get_metadata_cache().put_many(metadata, "geckoterminal")
     log(f"✅ Found {len(pools)} trending pools")
     return pools
 
@@ -8,10 +8,12 @@ import sys
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
+from price_refresher import snapshot_price
+from token_registry import first_seen_ms, get_registry
+
 # Files
 CIO_FILE = Path(__file__).parent.parent / "signals" / "cio_feed.json"
 HALL_OF_FAME_FILE = Path(__file__).parent.parent / "signals" / "hall_of_fame.json"
-REGISTRY_FILE = Path(__file__).parent.parent / "state" / "token_registry.json"
 
 # Performance thresholds
 MIN_GAIN_PCT = 50  # 50% gain to enter Hall of Fame
@@ -46,28 +48,24 @@ def save_hall_of_fame(data):
         json.dump(data, f, indent=2)
 
 def load_registry():
-    """Load token registry with all seen tokens"""
-    if REGISTRY_FILE.exists():
-        with open(REGISTRY_FILE) as f:
-            return json.load(f)
-    return {"tokens": {}}
+    """Token registry with all seen tokens (SQLite, records read on demand)"""
+    return get_registry()
 
-def calculate_performance(token_data):
-    """Calculate performance metrics for a token"""
-    history = token_data.get("price_history", [])
-    if len(history) < 2:
+def calculate_performance(token_data, token_addr=None):
+    """Calculate performance metrics for a token since it was first seen (registry price series)"""
+    series = get_registry().series.load(token_addr or token_data.get("address"), first_seen_ms(token_data))
+    prices = series.positive_prices()  # NaN (no price recorded) and zero prices left out
+    if len(prices) < 2:
         return None
     
-    first_price = history[0].get("price", 0)
-    last_price = history[-1].get("price", 0)
-    
-    if first_price == 0:
-        return None
+    first_price = float(prices[0])
+    # Latest price from the market snapshot when it is fresh
+    last_price = snapshot_price(token_addr or token_data.get("address")) or float(prices[-1])
     
     gain_pct = ((last_price - first_price) / first_price) * 100
     
     # Find max gain (peak)
-    max_price = max(h.get("price", 0) for h in history)
+    max_price = max(series.max_price() or 0, last_price)
     max_gain_pct = ((max_price - first_price) / first_price) * 100 if first_price > 0 else 0
     
     return {
@@ -82,7 +80,7 @@ def update_tracking(hof, registry):
     """Update tokens being tracked"""
     tracking = []
     
-    for token_addr, token_data in registry.get("tokens", {}).items():
+    for token_addr, token_data in registry.iterate_by_age(history=False):
         # Skip if already certified or rejected
         if any(c["token"]["address"].lower() == token_addr for c in hof["certified"]):
             continue
@@ -101,7 +99,7 @@ def update_tracking(hof, registry):
             continue
         
         # Only track if has price history
-        perf = calculate_performance(token_data)
+        perf = calculate_performance(token_data, token_addr)
         if perf is None:
             continue
         
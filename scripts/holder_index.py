@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+LURKER holder index — holder count and top-10 concentration from Transfer logs
+Incremental ERC20 Transfer indexer for tracked tokens, stored in
+cache/holder_index.db:
+- balances: one row per (token, holder) with a non-zero balance; balances are
+  32-byte big-endian blobs so the (token, balance) index sorts numerically
+- tokens:   cursor (last indexed block), supply, and the holder count / top-10
+  share recomputed after each update, so stats() is a single row read
+
+Each update reads only the blocks after a token's cursor, up to the confirmed
+head (CONFIRMATIONS deep, so reorgs never touch indexed balances), with one
+eth_getLogs pass per group of tokens sharing a cursor. Tokens are tracked from
+a start block shortly before their pool was created; the indexed supply is
+then checked against totalSupply() (one Multicall3 batch) and a token whose
+history started earlier is re-indexed from further back.
+
+    python3 holder_index.py update
+    python3 holder_index.py stats <token_address>
+"""
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from chain_checkpoint import CONFIRMATIONS
+from chain_rpc import get_rpc
+from evm_abi import decode_uint, event_topic, selector
+from log_scanner import LogScanner
+from multicall import aggregate3
+
+DB_FILE = Path(__file__).parent.parent / "cache" / "holder_index.db"
+
+TRANSFER_TOPIC = event_topic("Transfer(address,address,uint256)")
+TOTAL_SUPPLY = bytes.fromhex(selector("totalSupply()"))
+ZERO_ADDRESS = "0x" + "0" * 40
+BURN_ADDRESSES = {"0x000000000000000000000000000000000000dead", ZERO_ADDRESS}
+
+TOP_N = 10
+ADDRESS_BATCH = 50              # Tokens per eth_getLogs address filter
+MAX_BLOCKS_PER_UPDATE = 200000  # Per group and update; backfills continue next cycle
+DEPLOY_MARGIN = 1800            # Blocks (~1h) before pool creation to start a token from
+BACKFILL_STEP = 43200           # ~24h of blocks, doubled per backfill attempt
+MAX_BACKFILL_ATTEMPTS = 3
+BLOCK_TIME = 2
+
+_ZERO = bytes(32)
+
+
+def _to_blob(value):
+    return value.to_bytes(32, "big")
+
+
+def _from_blob(blob):
+    return int.from_bytes(blob, "big") if blob else 0
+
+
+def _holder(topic):
+    return "0x" + topic[-40:].lower()
+
+
+class HolderIndex:
+    def __init__(self, db_file=DB_FILE):
+        self.db_file = Path(db_file)
+        self._conn = None
+        self._lock = threading.RLock()
+
+    def _db(self):
+        if self._conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_file), timeout=10,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS tokens (
+                id INTEGER PRIMARY KEY,
+                address TEXT UNIQUE NOT NULL,
+                start_block INTEGER NOT NULL,
+                last_block INTEGER NOT NULL,
+                supply BLOB NOT NULL,
+                rows INTEGER NOT NULL DEFAULT 0,
+                holders INTEGER NOT NULL DEFAULT 0,
+                top10_pct REAL NOT NULL DEFAULT 0,
+                excluded TEXT NOT NULL DEFAULT '[]',
+                complete INTEGER NOT NULL DEFAULT 0,
+                backfills INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL
+            )""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS balances (
+                token_id INTEGER NOT NULL,
+                holder BLOB NOT NULL,
+                balance BLOB NOT NULL,
+                PRIMARY KEY (token_id, holder)
+            ) WITHOUT ROWID""")
+            conn.execute("CREATE INDEX IF NOT EXISTS balances_top ON balances (token_id, balance)")
+            self._conn = conn
+        return self._conn
+
+    def _transaction(self, fn, *args):
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(db, *args)
+                db.execute("COMMIT")
+                return result
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def track(self, address, start_block, exclude=()):
+        """Start indexing `address` from `start_block` (no-op if already tracked);
+        `exclude` (e.g. its pools) is left out of the holder count and top-10"""
+        address = address.lower()
+        exclude = {a.lower() for a in exclude if a}
+
+        def run(db):
+            row = db.execute("SELECT excluded FROM tokens WHERE address = ?", (address,)).fetchone()
+            if row is None:
+                db.execute("INSERT INTO tokens (address, start_block, last_block, supply, excluded) "
+                           "VALUES (?, ?, ?, ?, ?)",
+                           (address, start_block, start_block - 1, _ZERO, json.dumps(sorted(exclude))))
+                return True
+            merged = set(json.loads(row[0])) | exclude
+            if len(merged) != len(json.loads(row[0])):
+                db.execute("UPDATE tokens SET excluded = ? WHERE address = ?",
+                           (json.dumps(sorted(merged)), address))
+            return False
+        return self._transaction(run)
+
+    def reset(self, address, start_block):
+        """Drop a token's balances and index it again from `start_block`"""
+        def run(db):
+            row = db.execute("SELECT id FROM tokens WHERE address = ?", (address.lower(),)).fetchone()
+            if row:
+                db.execute("DELETE FROM balances WHERE token_id = ?", (row[0],))
+                db.execute("UPDATE tokens SET start_block = ?, last_block = ?, supply = ?, rows = 0, "
+                           "holders = 0, top10_pct = 0, complete = 0, backfills = backfills + 1 "
+                           "WHERE id = ?", (start_block, start_block - 1, _ZERO, row[0]))
+        self._transaction(run)
+
+    def _apply(self, db, token_id, logs, last_block):
+        """Apply Transfer logs of one token and refresh its cached stats"""
+        deltas = defaultdict(int)
+        minted = 0
+        for log in logs:
+            topics = log.get("topics") or []
+            data = log.get("data") or "0x"
+            if len(topics) != 3 or len(data) < 66:
+                continue  # ERC721-style or malformed Transfer
+            sender, receiver = _holder(topics[1]), _holder(topics[2])
+            value = int(data[2:66], 16)
+            if sender == ZERO_ADDRESS:
+                minted += value
+            else:
+                deltas[sender] -= value
+            if receiver == ZERO_ADDRESS:
+                minted -= value
+            else:
+                deltas[receiver] += value
+
+        row = db.execute("SELECT supply, rows, excluded FROM tokens WHERE id = ?", (token_id,)).fetchone()
+        supply, rows, excluded = _from_blob(row[0]) + minted, row[1], json.loads(row[2])
+        holders = [bytes.fromhex(h[2:]) for h, d in deltas.items() if d]
+        current = {}
+        for i in range(0, len(holders), 500):
+            chunk = holders[i:i + 500]
+            current.update(db.execute(
+                f"SELECT holder, balance FROM balances WHERE token_id = ? AND holder IN ({','.join('?' * len(chunk))})",
+                [token_id] + chunk).fetchall())
+        negative = False
+        upserts, deletes = [], []
+        for holder in holders:
+            old = _from_blob(current.get(holder))
+            new = old + deltas["0x" + holder.hex()]
+            if new < 0:
+                negative = True  # History before start_block is missing
+                new = 0
+            if new:
+                upserts.append((token_id, holder, _to_blob(new)))
+                rows += 0 if old else 1
+            elif old:
+                deletes.append((token_id, holder))
+                rows -= 1
+        db.executemany("INSERT OR REPLACE INTO balances (token_id, holder, balance) VALUES (?, ?, ?)", upserts)
+        db.executemany("DELETE FROM balances WHERE token_id = ? AND holder = ?", deletes)
+
+        # Cached stats: holder count and top-N share (O(log n) here, O(1) for readers)
+        skip = set(excluded) | BURN_ADDRESSES
+        skip_blobs = [bytes.fromhex(a[2:]) for a in skip]
+        skipped = db.execute(
+            f"SELECT holder, balance FROM balances WHERE token_id = ? AND holder IN ({','.join('?' * len(skip_blobs))})",
+            [token_id] + skip_blobs).fetchall()
+        burned = sum(_from_blob(b) for h, b in skipped if "0x" + h.hex() in BURN_ADDRESSES)
+        top = db.execute("SELECT holder, balance FROM balances WHERE token_id = ? ORDER BY balance DESC LIMIT ?",
+                         (token_id, TOP_N + len(skip))).fetchall()
+        top_sum = sum(sorted((_from_blob(b) for h, b in top if "0x" + h.hex() not in skip), reverse=True)[:TOP_N])
+        circulating = supply - burned
+        top10_pct = round(100 * top_sum / circulating, 2) if circulating > 0 else 0
+        db.execute("UPDATE tokens SET last_block = ?, supply = ?, rows = ?, holders = ?, top10_pct = ?, "
+                   "complete = CASE WHEN ? THEN 0 ELSE complete END, updated_at = ? WHERE id = ?",
+                   (last_block, _to_blob(max(supply, 0)), rows, rows - len(skipped), top10_pct,
+                    negative, time.time(), token_id))
+
+    def update(self, rpc=None, head=None, log_scanner=None):
+        """Index every tracked token up to the confirmed head; returns logs applied"""
+        rpc = rpc or get_rpc()
+        log_scanner = log_scanner or LogScanner(rpc)
+        head = (head if head is not None else rpc.block_number()) - CONFIRMATIONS
+        with self._lock:
+            tokens = self._db().execute(
+                "SELECT id, address, last_block FROM tokens WHERE last_block < ?", (head,)).fetchall()
+        groups = defaultdict(list)
+        for token_id, address, last_block in tokens:
+            groups[last_block].append((token_id, address))
+
+        applied = 0
+        for last_block, members in sorted(groups.items()):
+            from_block = last_block + 1
+            to_block = min(head, from_block + MAX_BLOCKS_PER_UPDATE - 1)
+            for i in range(0, len(members), ADDRESS_BATCH):
+                batch = members[i:i + ADDRESS_BATCH]
+                logs, scanned_to = log_scanner.get_logs(from_block, to_block,
+                                                        address=[a for _, a in batch],
+                                                        topics=[TRANSFER_TOPIC])
+                if scanned_to < from_block:
+                    continue
+                by_token = defaultdict(list)
+                for log in logs:
+                    by_token[log.get("address", "").lower()].append(log)
+                for token_id, address in batch:
+                    self._transaction(self._apply, token_id, by_token.get(address, []), scanned_to)
+                applied += len(logs)
+        self.verify_supply(rpc, head)
+        return applied
+
+    def verify_supply(self, rpc, head):
+        """Mark caught-up tokens complete when indexed supply == totalSupply();
+        re-index tokens whose history starts before their start block"""
+        with self._lock:
+            tokens = self._db().execute(
+                "SELECT address, start_block, supply, backfills FROM tokens WHERE last_block = ?",
+                (head,)).fetchall()
+        if not tokens:
+            return
+        results = aggregate3([(address, TOTAL_SUPPLY) for address, _, _, _ in tokens], rpc, block=hex(head))
+        for (address, start_block, supply, backfills), result in zip(tokens, results):
+            if not result or not result[0]:
+                continue
+            complete = decode_uint(result[1]) == _from_blob(supply)
+            if not complete and start_block > 0 and backfills < MAX_BACKFILL_ATTEMPTS:
+                start = max(0, start_block - BACKFILL_STEP * 2 ** backfills)
+                print(f"[HOLDERS] {address}: supply mismatch, re-indexing from block {start}")
+                self.reset(address, start)
+                continue
+            self._transaction(lambda db: db.execute(
+                "UPDATE tokens SET complete = ? WHERE address = ? AND last_block = ?",
+                (int(complete), address, head)))
+
+    def stats(self, address):
+        """{"count", "top10_pct", "last_block", "complete"} for a tracked token, or None"""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT holders, top10_pct, last_block, complete FROM tokens WHERE address = ?",
+                ((address or "").lower(),)).fetchone()
+        if row is None:
+            return None
+        return {"count": row[0], "top10_pct": row[1], "last_block": row[2], "complete": bool(row[3])}
+
+    def top_holders(self, address, n=TOP_N):
+        """[(holder, balance), ...] largest first, excluded addresses included"""
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT id FROM tokens WHERE address = ?", ((address or "").lower(),)).fetchone()
+            if row is None:
+                return []
+            return [("0x" + h.hex(), _from_blob(b)) for h, b in db.execute(
+                "SELECT holder, balance FROM balances WHERE token_id = ? ORDER BY balance DESC LIMIT ?",
+                (row[0], n))]
+
+
+_index = None
+
+
+def get_index():
+    global _index
+    if _index is None:
+        _index = HolderIndex()
+    return _index
+
+
+def estimate_block(timestamp, head, head_timestamp=None):
+    """Block number around a unix timestamp, from Base's fixed block time"""
+    head_timestamp = head_timestamp or time.time()
+    return max(0, head - int((head_timestamp - timestamp) / BLOCK_TIME))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "update":
+        started = time.time()
+        count = get_index().update()
+        print(f"[HOLDERS] Applied {count} transfers in {time.time() - started:.1f}s")
+    elif len(sys.argv) > 2 and sys.argv[1] == "stats":
+        print(json.dumps(get_index().stats(sys.argv[2]), indent=2))
+    else:
+        print("Usage: holder_index.py update | stats <token_address>")
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+LURKER HTTP response cache — persistent, shared by all trackers/scanners
+SQLite store in cache/http_cache.db with:
+- per-endpoint TTLs (fresh entries are served without any network call)
+- ETag / Last-Modified revalidation of stale entries when the server supports it
+- LRU eviction bounded by total body size
+- hit/miss counters (persisted, see `python3 http_cache.py stats`)
+Requests that do hit the network go through rate_limiter.limited_get.
+"""
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+from rate_limiter import PRIORITY_SCAN, limited_get
+
+DB_FILE = Path(__file__).parent.parent / "cache" / "http_cache.db"
+
+# (url prefix, ttl seconds) — first match wins
+ENDPOINT_TTLS = [
+    ("https://api.dexscreener.com/latest/dex/tokens/", 60),
+    ("https://api.dexscreener.com/latest/dex/pairs/", 60),
+    ("https://api.dexscreener.com/tokens/v1/", 60),
+    ("https://api.dexscreener.com/token-pairs/v1/", 60),
+    ("https://api.dexscreener.com/token-profiles/", 120),
+    ("https://api.dexscreener.com/token-boosts/", 120),
+    ("https://api.geckoterminal.com/api/v2/networks/base/new_pools", 60),
+    ("https://api.geckoterminal.com/api/v2/networks/base/trending_pools", 120),
+    ("https://api.geckoterminal.com/api/v2/networks/base/tokens/", 120),
+]
+DEFAULT_TTL = 30
+MAX_BYTES = 64 * 1024 * 1024  # LRU bound on stored bodies
+
+
+def ttl_for(url):
+    for prefix, ttl in ENDPOINT_TTLS:
+        if url.startswith(prefix):
+            return ttl
+    return DEFAULT_TTL
+
+
+class CachedResponse:
+    """Minimal requests.Response stand-in for cache hits"""
+
+    def __init__(self, status_code, body, headers=None, from_cache=False):
+        self.status_code = status_code
+        self.content = body
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class HttpCache:
+    """Persistent GET cache; safe to share between threads and processes"""
+
+    def __init__(self, db_file=DB_FILE, max_bytes=MAX_BYTES):
+        self.db_file = Path(db_file)
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "stored": 0, "evicted": 0}
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self):
+        if self._conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_file), timeout=10,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+            conn.execute("""CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )""")
+            self._conn = conn
+        return self._conn
+
+    def _count(self, name):
+        self.stats[name] += 1
+        self._db().execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+    def _lookup(self, url):
+        row = self._db().execute(
+            "SELECT status, body, etag, last_modified, fetched_at FROM entries WHERE url = ?",
+            (url,)).fetchone()
+        if row:
+            self._db().execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), url))
+        return row
+
+    def _store(self, url, resp):
+        body = resp.content
+        now = time.time()
+        db = self._db()
+        db.execute(
+            "INSERT OR REPLACE INTO entries "
+            "(url, status, body, etag, last_modified, fetched_at, last_access, size) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, resp.status_code, body, resp.headers.get("ETag"),
+             resp.headers.get("Last-Modified"), now, now, len(body)))
+        self._count("stored")
+        self._evict()
+
+    def _evict(self):
+        db = self._db()
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in db.execute("SELECT url, size FROM entries ORDER BY last_access").fetchall():
+            db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            self._count("evicted")
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def get(self, url, ttl=None, priority=PRIORITY_SCAN, timeout=10, headers=None):
+        """GET `url`, serving fresh cache entries and revalidating stale ones.
+
+        Only 200 responses are cached. Cache failures fall back to a plain request.
+        """
+        ttl = ttl_for(url) if ttl is None else ttl
+        try:
+            with self._lock:
+                row = self._lookup(url)
+                if row and time.time() - row[4] < ttl:
+                    self._count("hits")
+                    return CachedResponse(row[0], row[1], from_cache=True)
+        except sqlite3.Error as e:
+            print(f"[CACHE] Unavailable ({e}), fetching {url}")
+            return limited_get(url, priority=priority, timeout=timeout, headers=headers)
+
+        req_headers = dict(headers or {})
+        if row and row[2]:
+            req_headers["If-None-Match"] = row[2]
+        if row and row[3]:
+            req_headers["If-Modified-Since"] = row[3]
+        resp = limited_get(url, priority=priority, timeout=timeout, headers=req_headers or None)
+
+        try:
+            with self._lock:
+                if resp.status_code == 304 and row:
+                    self._db().execute("UPDATE entries SET fetched_at = ? WHERE url = ?",
+                                       (time.time(), url))
+                    self._count("revalidated")
+                    return CachedResponse(row[0], row[1], from_cache=True)
+                self._count("misses")
+                if resp.status_code == 200:
+                    self._store(url, resp)
+        except sqlite3.Error as e:
+            print(f"[CACHE] Could not store {url}: {e}")
+        return resp
+
+    def totals(self):
+        """Persisted counters across all processes"""
+        return dict(self._db().execute("SELECT name, value FROM counters").fetchall())
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = HttpCache()
+    return _cache
+
+
+def cached_get(url, ttl=None, priority=PRIORITY_SCAN, timeout=10, headers=None):
+    """Module-level shortcut for HttpCache.get on the shared cache"""
+    return get_cache().get(url, ttl=ttl, priority=priority, timeout=timeout, headers=headers)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "stats":
+        cache = get_cache()
+        totals = cache.totals()
+        lookups = totals.get("hits", 0) + totals.get("revalidated", 0) + totals.get("misses", 0)
+        served = totals.get("hits", 0) + totals.get("revalidated", 0)
+        entries, size = cache._db().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        print(f"Entries: {entries} ({size / 1024:.0f} KB)")
+        for name in ("hits", "revalidated", "misses", "stored", "evicted"):
+            print(f"  {name}: {totals.get(name, 0)}")
+        if lookups:
+            print(f"Hit rate: {served / lookups:.1%}")
+    else:
+        print("Usage: http_cache.py stats")
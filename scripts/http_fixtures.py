@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+LURKER HTTP fixtures — record real API/RPC traffic, replay it offline
+Hooks requests.Session.request, so everything built on requests is covered:
+plain requests.get/post, rate_limiter.limited_get, http_cache and web3's
+HTTPProvider (JSON-RPC).
+
+- recording(path): pass requests through and capture them into a gzip archive
+- replaying(path): serve captured responses with configurable latency/jitter;
+  unknown requests fail like an offline network (ConnectionError)
+
+JSON-RPC bodies are matched without their "id" fields and replayed responses
+get the ids of the live request, so batch calls replay correctly.
+"""
+import gzip
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+SCHEMA = "lurker_http_fixtures_v1"
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Retry-After")
+
+
+def _rpc_ids(payload):
+    if isinstance(payload, list):
+        return [p.get("id") if isinstance(p, dict) else None for p in payload]
+    if isinstance(payload, dict):
+        return [payload.get("id")]
+    return []
+
+
+def _strip_ids(payload):
+    if isinstance(payload, list):
+        return [_strip_ids(p) for p in payload]
+    if isinstance(payload, dict):
+        return {k: v for k, v in payload.items() if k != "id"}
+    return payload
+
+
+def _request_body(kwargs):
+    """Parsed JSON request body (json= or data=), or raw text, or None"""
+    if kwargs.get("json") is not None:
+        return kwargs["json"]
+    data = kwargs.get("data")
+    if data is None:
+        return None
+    if isinstance(data, bytes):
+        data = data.decode("utf-8", errors="replace")
+    if isinstance(data, str):
+        try:
+            return json.loads(data)
+        except ValueError:
+            return data
+    return data
+
+
+def request_key(method, url, body):
+    key = f"{method.upper()} {url}"
+    if body is not None:
+        key += " " + json.dumps(_strip_ids(body), sort_keys=True, separators=(",", ":"))
+    return key
+
+
+def _with_params(url, params):
+    if not params:
+        return url
+    return requests.Request("GET", url, params=params).prepare().url
+
+
+class FixtureArchive:
+    """Recorded responses keyed by request; several responses per key replay in order"""
+
+    def __init__(self, entries=None):
+        self.entries = entries or []
+        self._lock = threading.Lock()
+        self._by_key = {}
+        self._cursor = {}
+        for entry in self.entries:
+            self._by_key.setdefault(entry["key"], []).append(entry)
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("schema") != SCHEMA:
+            raise ValueError(f"{path}: not a {SCHEMA} archive")
+        return cls(data["entries"])
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "schema": SCHEMA,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "count": len(self.entries),
+            "entries": self.entries,
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+
+    def add(self, entry):
+        with self._lock:
+            self.entries.append(entry)
+            self._by_key.setdefault(entry["key"], []).append(entry)
+
+    def next(self, key):
+        """Next recorded response for `key` (the last one repeats), or None"""
+        with self._lock:
+            recorded = self._by_key.get(key)
+            if not recorded:
+                return None
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+            return recorded[min(i, len(recorded) - 1)]
+
+
+class TransportStats:
+    def __init__(self):
+        self.requests = 0
+        self.misses = 0
+        self.by_host = {}
+        self._lock = threading.Lock()
+
+    def count(self, url, miss=False):
+        host = urlparse(url).netloc
+        with self._lock:
+            self.requests += 1
+            self.misses += int(miss)
+            self.by_host[host] = self.by_host.get(host, 0) + 1
+
+    def as_dict(self):
+        return {"requests": self.requests, "misses": self.misses, "by_host": dict(self.by_host)}
+
+
+def _build_response(entry, url, live_ids):
+    body = entry["body"]
+    recorded_ids = entry.get("request_ids") or []
+    if live_ids and recorded_ids and live_ids != recorded_ids:
+        # Give JSON-RPC responses the ids of the live request
+        id_map = dict(zip(map(json.dumps, recorded_ids), live_ids))
+        try:
+            parsed = json.loads(body)
+            items = parsed if isinstance(parsed, list) else [parsed]
+            for item in items:
+                if isinstance(item, dict) and json.dumps(item.get("id")) in id_map:
+                    item["id"] = id_map[json.dumps(item.get("id"))]
+            body = json.dumps(parsed)
+        except ValueError:
+            pass
+    resp = requests.Response()
+    resp.status_code = entry["status"]
+    resp.reason = entry.get("reason", "")
+    resp.headers = CaseInsensitiveDict(entry.get("headers") or {})
+    resp._content = body.encode("utf-8")
+    resp.encoding = "utf-8"
+    resp.url = url
+    return resp
+
+
+@contextmanager
+def recording(path):
+    """Capture every requests call made inside the block into a gzip archive at `path`"""
+    archive = FixtureArchive()
+    stats = TransportStats()
+    original = requests.Session.request
+
+    def record_request(session, method, url, **kwargs):
+        started = time.time()
+        resp = original(session, method, url, **kwargs)
+        full_url = _with_params(url, kwargs.get("params"))
+        body = _request_body(kwargs)
+        stats.count(full_url)
+        archive.add({
+            "key": request_key(method, full_url, body),
+            "method": method.upper(),
+            "url": full_url,
+            "request_ids": _rpc_ids(body),
+            "status": resp.status_code,
+            "reason": resp.reason,
+            "headers": {h: resp.headers[h] for h in KEPT_HEADERS if h in resp.headers},
+            "body": resp.content.decode("utf-8", errors="replace"),
+            "elapsed_ms": int((time.time() - started) * 1000),
+        })
+        return resp
+
+    requests.Session.request = record_request
+    try:
+        yield stats
+    finally:
+        requests.Session.request = original
+        archive.save(path)
+        print(f"[FIXTURES] Recorded {len(archive.entries)} responses -> {path}")
+
+
+@contextmanager
+def replaying(path_or_archive, latency_ms=None, jitter_ms=0, seed=None):
+    """Serve requests made inside the block from a recorded archive.
+
+    latency_ms=None replays the recorded latency; otherwise each response waits
+    latency_ms +/- jitter_ms.
+    """
+    archive = (path_or_archive if isinstance(path_or_archive, FixtureArchive)
+               else FixtureArchive.load(path_or_archive))
+    stats = TransportStats()
+    rng = random.Random(seed)
+    original = requests.Session.request
+
+    def replay_request(session, method, url, **kwargs):
+        full_url = _with_params(url, kwargs.get("params"))
+        body = _request_body(kwargs)
+        entry = archive.next(request_key(method, full_url, body))
+        stats.count(full_url, miss=entry is None)
+        if entry is None:
+            raise requests.exceptions.ConnectionError(f"No fixture for {method.upper()} {full_url}")
+        delay = entry.get("elapsed_ms", 0) if latency_ms is None else latency_ms
+        delay += rng.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        return _build_response(entry, full_url, _rpc_ids(body))
+
+    requests.Session.request = replay_request
+    try:
+        yield stats
+    finally:
+        requests.Session.request = original
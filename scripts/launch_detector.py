@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+LURKER launch detector — bundle / sniper detection from first-block buyers
+For every new pool, looks at its first FIRST_BLOCKS blocks once they exist:
+- one eth_getLogs pass (address filter = pools + their tokens, topics = Transfer
+  OR the Swap variants) covers all matured pools at once
+- buyers are the receivers of the token leaving the pool; the buy txs are read
+  in one JSON-RPC batch to get who paid for each buy (tx sender) and its nonce
+- buyers are clustered by paying sender: one sender buying into several
+  wallets (or one tx spreading the buy over several wallets) is a bundle;
+  buyers in the creation block are snipers; buys sent from accounts with
+  almost no history are fresh wallets
+Results use the existing risk format ({"level", "factors"}) with the factors
+bundle_alert and signal_quality_scorer already react to (bundle_farming,
+bot_wallets, suspicious_balances). Pools are analyzed once: pending pools and
+results are cached in state/launch_analysis.json.
+
+Native ETH funding does not emit logs, so the tx sender stands in for the
+funding source.
+"""
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from chain_rpc import RpcError, TransportError
+from evm_abi import decode_uint, event_topic, hex_to_int, selector
+from log_scanner import LogScanner
+from multicall import aggregate3
+from safe_state import StateFile
+
+STATE_FILE = Path(__file__).parent.parent / "state" / "launch_analysis.json"
+
+FIRST_BLOCKS = 10          # Blocks after pool creation that count as launch (~20s)
+POOLS_PER_QUERY = 50       # Pools (plus their tokens) per eth_getLogs address filter
+TX_BATCH_SIZE = 100        # eth_getTransactionByHash calls per batch
+MAX_RESULTS = 2000         # Cached analyses kept
+PENDING_TTL = 43200        # Blocks (~24h) a pool may wait before it is dropped
+
+BUNDLE_MIN_WALLETS = 3     # Wallets bought for by one sender
+BUNDLE_MIN_SHARE = 20.0    # % of launch buys taken by the largest cluster
+SNIPER_MIN_BUYERS = 3      # Distinct buyers in the creation block
+SNIPER_SUPPLY_PCT = 10.0   # % of total supply taken in the creation block
+FRESH_NONCE = 2            # Sender nonce at or below this = fresh wallet
+FRESH_MIN_SHARE = 50.0     # % of launch buyers paid for by fresh wallets
+
+TRANSFER = event_topic("Transfer(address,address,uint256)")
+SWAP_TOPICS = [
+    event_topic("Swap(address,uint256,uint256,uint256,uint256,address)"),  # Uniswap v2
+    event_topic("Swap(address,address,uint256,uint256,uint256,uint256)"),  # Aerodrome
+    event_topic("Swap(address,address,int256,int256,uint160,uint128,int24)"),  # Uniswap v3
+]
+TOTAL_SUPPLY = bytes.fromhex(selector("totalSupply()"))
+
+
+def _state():
+    return StateFile(STATE_FILE, max_retries=5, retry_delay=0.2)
+
+
+def _addr(topic):
+    return "0x" + topic[-40:].lower()
+
+
+def pool_entry(pool):
+    """Queue entry for a scanner_onchain pool record (base token = non-quote side)"""
+    base = pool.get("base_token") or pool["token0"]
+    return {"pool": pool["pool_address"].lower(), "token": base.lower(), "block": pool["block_number"]}
+
+
+def fetch_senders(rpc, tx_hashes):
+    """{tx_hash: (from, nonce)} with batched eth_getTransactionByHash"""
+    hashes = sorted(set(tx_hashes))
+    senders = {}
+    for i in range(0, len(hashes), TX_BATCH_SIZE):
+        chunk = hashes[i:i + TX_BATCH_SIZE]
+        try:
+            results = rpc.batch([("eth_getTransactionByHash", [h]) for h in chunk])
+        except (RpcError, TransportError) as e:
+            print(f"[LAUNCH] Could not read {len(chunk)} txs: {e}")
+            continue
+        for h, tx in zip(chunk, results):
+            if isinstance(tx, dict) and tx.get("from"):
+                senders[h] = (tx["from"].lower(), hex_to_int(tx.get("nonce")))
+    return senders
+
+
+def analyze(entry, logs, senders, total_supply):
+    """Risk for one pool from its launch-window logs"""
+    pool, token, start = entry["pool"], entry["token"], entry["block"]
+    end = start + FIRST_BLOCKS - 1
+    buys = []  # (block, tx, wallet, amount)
+    swaps_per_tx = defaultdict(int)
+    for log in logs:
+        block = hex_to_int(log.get("blockNumber"))
+        if block < start or block > end:
+            continue
+        topics = log.get("topics") or []
+        address = (log.get("address") or "").lower()
+        if address == pool and topics and topics[0] in SWAP_TOPICS:
+            swaps_per_tx[log.get("transactionHash")] += 1
+        elif (address == token and len(topics) == 3 and topics[0] == TRANSFER
+              and _addr(topics[1]) == pool and _addr(topics[2]) != pool):
+            buys.append((block, log.get("transactionHash"), _addr(topics[2]), int(log["data"][2:66] or "0", 16)))
+
+    total_bought = sum(b[3] for b in buys) or 1
+    clusters = defaultdict(lambda: {"wallets": set(), "amount": 0, "txs": set()})
+    for block, tx, wallet, amount in buys:
+        sender = senders.get(tx, (wallet, None))[0]
+        cluster = clusters[sender]
+        cluster["wallets"].add(wallet)
+        cluster["amount"] += amount
+        cluster["txs"].add(tx)
+    bundles = [
+        {"sender": sender, "wallets": len(c["wallets"]), "txs": len(c["txs"]),
+         "share_pct": round(100 * c["amount"] / total_bought, 1)}
+        for sender, c in clusters.items()
+        if len(c["wallets"] - {sender}) >= BUNDLE_MIN_WALLETS
+        or (len(c["wallets"]) > 1 and any(swaps_per_tx[t] > 1 for t in c["txs"]))
+    ]
+    bundles.sort(key=lambda b: -b["share_pct"])
+
+    snipers = {wallet for block, _, wallet, _ in buys if block == start}
+    sniped = sum(amount for block, _, _, amount in buys if block == start)
+    sniper_supply_pct = round(100 * sniped / total_supply, 1) if total_supply else None
+    payers = {senders[tx] for _, tx, _, _ in buys if tx in senders}
+    fresh = {sender for sender, nonce in payers if nonce is not None and nonce <= FRESH_NONCE}
+    fresh_pct = round(100 * len(fresh) / len(payers), 1) if payers else 0
+
+    factors = []
+    if bundles and bundles[0]["share_pct"] >= BUNDLE_MIN_SHARE:
+        factors.append("bundle_farming")
+    if len(snipers) >= SNIPER_MIN_BUYERS or (len(payers) >= SNIPER_MIN_BUYERS and fresh_pct >= FRESH_MIN_SHARE):
+        factors.append("bot_wallets")
+    if sniper_supply_pct is not None and sniper_supply_pct >= SNIPER_SUPPLY_PCT:
+        factors.append("suspicious_balances")
+    level = "high" if "bundle_farming" in factors else "medium" if factors else "low"
+    return {
+        "level": level,
+        "factors": factors,
+        "launch": {
+            "from_block": start,
+            "blocks": FIRST_BLOCKS,
+            "buys": len(buys),
+            "buyers": len({b[2] for b in buys}),
+            "first_block_buyers": len(snipers),
+            "first_block_supply_pct": sniper_supply_pct,
+            "fresh_wallet_pct": fresh_pct,
+            "bundles": bundles[:5],
+            "analyzed_at": datetime.now(timezone.utc).isoformat(),
+        },
+    }
+
+
+def analyze_pools(entries, rpc, log_scanner=None):
+    """{pool: risk} for queue entries whose launch window is complete"""
+    if not entries:
+        return {}
+    log_scanner = log_scanner or LogScanner(rpc)
+    results = {}
+    for i in range(0, len(entries), POOLS_PER_QUERY):
+        batch = entries[i:i + POOLS_PER_QUERY]
+        from_block = min(e["block"] for e in batch)
+        to_block = max(e["block"] for e in batch) + FIRST_BLOCKS - 1
+        addresses = sorted({e["pool"] for e in batch} | {e["token"] for e in batch})
+        logs, scanned_to = log_scanner.get_logs(from_block, to_block, address=addresses,
+                                                topics=[[TRANSFER] + SWAP_TOPICS])
+        by_address = defaultdict(list)
+        for log in logs:
+            by_address[(log.get("address") or "").lower()].append(log)
+
+        buy_txs = [log.get("transactionHash") for e in batch for log in by_address[e["token"]]
+                   if len(log.get("topics") or []) == 3 and _addr(log["topics"][1]) == e["pool"]]
+        senders = fetch_senders(rpc, buy_txs)
+        supplies = aggregate3([(e["token"], TOTAL_SUPPLY) for e in batch], rpc)
+        for e, supply in zip(batch, supplies):
+            if e["block"] + FIRST_BLOCKS - 1 > scanned_to:
+                continue  # Logs incomplete, retried next run
+            total_supply = decode_uint(supply[1]) if supply and supply[0] else None
+            results[e["pool"]] = analyze(e, by_address[e["pool"]] + by_address[e["token"]],
+                                         senders, total_supply)
+    return results
+
+
+def process(new_pools, rpc, head):
+    """Queue new pools, analyze every pool whose launch window is complete.
+
+    Returns {pool_address_lower: risk} for pools analyzed in this call.
+    """
+    def queue(state):
+        pending = state.setdefault("pending", {})
+        done = state.setdefault("results", {})
+        for pool in new_pools:
+            if len(pool.get("pool_address") or "") != 42:
+                continue  # Uniswap v4 pool ids: swaps go through the PoolManager
+            entry = pool_entry(pool)
+            if entry["pool"] not in done:
+                pending.setdefault(entry["pool"], entry)
+        return [e for e in pending.values() if e["block"] + FIRST_BLOCKS - 1 <= head]
+
+    # The RPC work runs between two short transactions so parallel scanners don't lose entries
+    ready = _state().update(queue)
+    if not ready:
+        return {}
+    started = time.time()
+    results = analyze_pools(ready, rpc)
+
+    def record(state):
+        pending = state.setdefault("pending", {})
+        done = state.setdefault("results", {})
+        for pool, risk in results.items():
+            pending.pop(pool, None)
+            done[pool] = risk
+        for pool, entry in list(pending.items()):
+            if head - entry["block"] > PENDING_TTL:
+                pending.pop(pool)
+        if len(done) > MAX_RESULTS:
+            oldest = sorted(done, key=lambda p: done[p]["launch"]["from_block"])[:len(done) - MAX_RESULTS]
+            for pool in oldest:
+                done.pop(pool)
+        return len(pending)
+    pending = _state().update(record)
+    flagged = sum(1 for r in results.values() if r["factors"])
+    print(f"[LAUNCH] {len(results)}/{len(ready)} launches analyzed, {flagged} flagged, "
+          f"{pending} pending ({time.time() - started:.1f}s)")
+    return results
+
+
+def cached_risk(pool_address):
+    """Cached analysis for a pool, or None"""
+    state = _state().load(default={}) or {}
+    return (state.get("results") or {}).get((pool_address or "").lower())
@@ -4,29 +4,33 @@ LURKER Lifecycle Core
 Manages token lifecycle categories
 """
 
-import json
 import os
+import shutil
+import time
 from datetime import datetime, timezone, timedelta
 
+from safe_state import StateCorruptError, StateFile
+
 LURKER_DIR = "/data/.openclaw/workspace/lurker-project"
 STATE_FILE = f"{LURKER_DIR}/lurker_state.json"
 
-def load_state():
-    """Load lurker state"""
-    if not os.path.exists(STATE_FILE):
-        return {"tokens": {}, "last_update": datetime.now(timezone.utc).isoformat()}
-    
-    try:
-        with open(STATE_FILE, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"[{datetime.now()}] Error loading state: {e}")
-        return {"tokens": {}, "last_update": datetime.now(timezone.utc).isoformat()}
+def update_state(fn):
+    """Run fn(state) as one locked read-modify-write of lurker state.
 
-def save_state(state):
-    """Save lurker state"""
-    with open(STATE_FILE, 'w') as f:
-        json.dump(state, f, indent=2)
+    A corrupt state file is kept as <name>.corrupt-<ts> and the run starts
+    from a fresh state, as before the switch to update()."""
+    default = {"tokens": {}, "last_update": datetime.now(timezone.utc).isoformat()}
+    state_file = StateFile(STATE_FILE, max_retries=5, retry_delay=0.2)
+    try:
+        return state_file.update(fn, default=default)
+    except StateCorruptError as e:
+        kept = f"{STATE_FILE}.corrupt-{int(time.time())}"
+        shutil.copy2(STATE_FILE, kept)
+        print(f"[{datetime.now()}] Error loading state: {e}, kept as {os.path.basename(kept)}")
+        result = fn(default)
+        if not state_file.save(default):
+            raise RuntimeError("failed to save state atomically")
+        return result
 
 def update_categories(state):
     """Update token categories based on age and metrics"""
@@ -65,11 +69,9 @@ def update_categories(state):
 def main():
     print(f"[{datetime.now()}] Starting Lifecycle Core...")
     
-    state = load_state()
-    updated = update_categories(state)
-    save_state(state)
+    updated, total = update_state(lambda state: (update_categories(state), len(state['tokens'])))
     
-    print(f"[{datetime.now()}] Updated {updated} tokens, total: {len(state['tokens'])}")
+    print(f"[{datetime.now()}] Updated {updated} tokens, total: {total}")
 
 if __name__ == "__main__":
     main()
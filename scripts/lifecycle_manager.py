@@ -9,6 +9,8 @@ from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from token_registry import get_registry
+
 # Fichiers
 CIO_FEED = Path("signals/cio_feed.json")
 WATCH_FEED = Path("signals/watch_feed.json")
@@ -18,6 +20,9 @@ CERTIFIED_FEED = Path("signals/certified_feed.json")
 LIFECYCLE_FEED = Path("signals/lifecycle_feed.json")
 ALERTS_FILE = Path("state/volume_alerts.json")
 
+# Historique de prix du registry repris dans les tokens (dernières 24h)
+REGISTRY_WINDOW_MS = 24 * 3600 * 1000
+
 def load_json(path: Path) -> dict:
     if path.exists():
         with open(path) as f:
@@ -29,19 +34,26 @@ def save_json(path: Path, data: dict):
     with open(path, 'w') as f:
         json.dump(data, f, indent=2)
 
+def token_prices(token: dict):
+    """(prix > 0 dans l'ordre, plus haut) : série columnar du registry, sinon price_history du token"""
+    addr = (token.get('token') or {}).get('address') or token.get('address')
+    if addr:
+        series = get_registry().series.load(addr)
+        if len(series):
+            # Les buckets compactés gardent leur plus haut à part du prix de clôture
+            return series.positive_prices(), series.max_price()
+    prices = [p.get('price', 0) for p in token.get('price_history', []) if p.get('price', 0) > 0]
+    return prices, max(prices, default=None)
+
 def is_token_pump_and_dump(token: dict) -> bool:
     """Détecte les tokens qui ont pompé puis dumpé (pattern P&D)"""
-    price_history = token.get('price_history', [])
-    if len(price_history) < 3:
-        return False
-    
-    prices = [p.get('price', 0) for p in price_history if p.get('price', 0) > 0]
+    prices, peak = token_prices(token)
     if len(prices) < 3:
         return False
     
-    first_price = prices[0]
-    max_price = max(prices)
-    current_price = prices[-1]
+    first_price = float(prices[0])
+    max_price = float(peak)
+    current_price = float(prices[-1])
     
     if first_price == 0:
         return False
@@ -321,23 +333,21 @@ def check_dump_warning(token_data: dict) -> Optional[dict]:
         }
     return None
 
-REGISTRY_FILE = Path("state/token_registry.json")
-
 def load_registry():
-    """Charge le token registry avec tous les tokens vus"""
-    if REGISTRY_FILE.exists():
-        with open(REGISTRY_FILE) as f:
-            return json.load(f)
-    return {"tokens": {}}
+    """Token registry avec tous les tokens vus (SQLite, lu à la demande)"""
+    return get_registry()
 
 def registry_to_token_format(registry_data):
     """Convertit les données du registry au format token des feeds"""
     tokens = []
-    for addr, data in registry_data.get("tokens", {}).items():
+    for addr, data in registry_data.iterate_by_age(history=False):
         token_info = data.get("token", {})
-        price_history = data.get("price_history", [])
-        
-        if not token_info or not price_history:
+        # Seules les dernières 24h de la série sont lues, pas tout l'historique
+        last_ms = registry_data.series.last_point_ts(addr)
+        if not token_info or last_ms is None:
+            continue
+        price_history = registry_data.series.load(addr, last_ms - REGISTRY_WINDOW_MS, None).points()
+        if not price_history:
             continue
         
         # Calculer l'âge
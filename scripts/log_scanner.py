@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+LURKER log scanner — eth_getLogs over large block ranges
+Splits [from_block, to_block] into chunks fetched concurrently with raw
+eth_getLogs calls (address + topic filters). The chunk size adapts as it goes:
+- halved when the provider rejects a range (too many results, range too wide,
+  response too large, timeout) and the rejected chunk is retried in halves
+- doubled while responses stay well under TARGET_LOGS
+Rate-limit errors do not shrink the range: the chunk is retried after a
+backoff (RATE_LIMIT_BACKOFF, doubled per attempt).
+
+Progress is reported as the highest block below which every chunk is done, so
+callers can checkpoint partial scans and resume after a failure.
+"""
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from chain_rpc import RpcError, TransportError, get_rpc
+from evm_abi import hex_to_int
+
+INITIAL_SPAN = 2000   # Blocks per eth_getLogs call to start with
+MIN_SPAN = 1
+MAX_SPAN = 50000
+TARGET_LOGS = 2000    # Shrink above this many logs per response, grow below a quarter of it
+WORKERS = 4           # Chunks in flight
+MAX_RETRIES = 3       # Per chunk, for errors that are not range limits
+RATE_LIMIT_BACKOFF = 1.0  # Seconds before retrying a rate-limited chunk, doubled per attempt
+
+# Phrases providers use when a getLogs range or result set is too large
+RANGE_ERRORS = (
+    "block range", "too many results", "response size", "query returned more than",
+    "range is too large", "range too large", "timeout", "timed out",
+)
+# Phrases of rate-limit errors (some providers reuse -32005 for them)
+RATE_LIMIT_ERRORS = (
+    "rate limit", "rate-limit", "too many requests", "request rate", "exceeded the quota",
+    "capacity", "throttl",
+)
+
+
+def is_rate_limited(error):
+    if isinstance(error, RpcError) and error.code == 429:
+        return True
+    return any(s in str(error).lower() for s in RATE_LIMIT_ERRORS + ("429",))
+
+
+def is_range_error(error):
+    if is_rate_limited(error):
+        return False
+    if isinstance(error, RpcError):
+        return error.code == -32005 or any(s in error.message.lower() for s in RANGE_ERRORS)
+    return any(s in str(error).lower() for s in ("timeout", "timed out"))
+
+
+def log_sort_key(log):
+    return (hex_to_int(log.get("blockNumber")), hex_to_int(log.get("logIndex")))
+
+
+class LogScanner:
+    def __init__(self, rpc=None, span=INITIAL_SPAN, min_span=MIN_SPAN, max_span=MAX_SPAN,
+                 target_logs=TARGET_LOGS, workers=WORKERS, max_retries=MAX_RETRIES,
+                 rate_limit_backoff=RATE_LIMIT_BACKOFF):
+        self.rpc = rpc or get_rpc()
+        self.span = span
+        self.min_span = min_span
+        self.max_span = max_span
+        self.target_logs = target_logs
+        self.workers = workers
+        self.max_retries = max_retries
+        self.rate_limit_backoff = rate_limit_backoff
+        self.calls = 0
+        self.splits = 0
+
+    def _fetch(self, start, end, address, topics):
+        params = {"fromBlock": hex(start), "toBlock": hex(end)}
+        if address:
+            params["address"] = address
+        if topics:
+            params["topics"] = topics
+        self.calls += 1
+        return self.rpc.call("eth_getLogs", [params]) or []
+
+    def _adapt(self, n_logs):
+        if n_logs > self.target_logs:
+            self.span = max(self.min_span, self.span // 2)
+        elif n_logs < self.target_logs // 4:
+            self.span = min(self.max_span, self.span * 2)
+
+    def get_logs(self, from_block, to_block, address=None, topics=None, on_progress=None):
+        """Logs in [from_block, to_block], sorted by (block, logIndex).
+
+        Returns (logs, scanned_to). scanned_to < to_block when a chunk could not
+        be fetched; logs then only cover [from_block, scanned_to].
+        on_progress(block) is called whenever the contiguous done range grows.
+        """
+        if from_block > to_block:
+            return [], to_block
+        started = time.time()
+        self.calls = self.splits = 0
+        cursor = from_block
+        retry = deque()
+        attempts = {}
+        done = {}  # chunk start -> (end, logs)
+        scanned_to = from_block - 1
+        failed = None
+
+        def next_chunk():
+            nonlocal cursor
+            if retry:
+                return retry.popleft()
+            if cursor > to_block:
+                return None
+            chunk = (cursor, min(to_block, cursor + self.span - 1))
+            cursor = chunk[1] + 1
+            return chunk
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running = {}
+            while failed is None:
+                while len(running) < self.workers:
+                    chunk = next_chunk()
+                    if chunk is None:
+                        break
+                    running[pool.submit(self._fetch, chunk[0], chunk[1], address, topics)] = chunk
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    start, end = running.pop(future)
+                    try:
+                        logs = future.result()
+                    except (RpcError, TransportError) as e:
+                        if is_range_error(e) and end > start:
+                            mid = (start + end) // 2
+                            retry.appendleft((mid + 1, end))
+                            retry.appendleft((start, mid))
+                            self.span = max(self.min_span, (end - start + 1) // 2)
+                            self.splits += 1
+                            continue
+                        attempts[(start, end)] = attempts.get((start, end), 0) + 1
+                        if attempts[(start, end)] > self.max_retries:
+                            print(f"[LOGS] Giving up on blocks {start}-{end}: {e}")
+                            failed = (start, end)
+                            break
+                        if is_rate_limited(e):
+                            delay = self.rate_limit_backoff * 2 ** (attempts[(start, end)] - 1)
+                            print(f"[LOGS] Rate limited on blocks {start}-{end}, retrying in {delay:.0f}s")
+                            time.sleep(delay)
+                        retry.append((start, end))
+                        continue
+                    done[start] = (end, logs)
+                    self._adapt(len(logs))
+
+                # Advance the contiguous done range
+                advanced = False
+                while scanned_to + 1 in done:
+                    scanned_to = done[scanned_to + 1][0]
+                    advanced = True
+                if advanced and on_progress:
+                    on_progress(scanned_to)
+            for future in running:
+                future.cancel()
+
+        logs = []
+        for start, (end, chunk_logs) in done.items():
+            if end <= scanned_to:
+                logs.extend(chunk_logs)
+        logs.sort(key=log_sort_key)
+        print(f"[LOGS] {len(logs)} logs from blocks {from_block}-{scanned_to} "
+              f"({self.calls} calls, {self.splits} splits, span {self.span}, {time.time() - started:.1f}s)")
+        return logs, scanned_to
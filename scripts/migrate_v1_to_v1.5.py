@@ -8,6 +8,8 @@ import json
 from datetime import datetime, timezone
 from pathlib import Path
 
+from token_metadata import lookup as lookup_metadata
+
 FEEDS = [
     "signals/cio_feed.json",
     "signals/watch_feed.json", 
@@ -119,8 +121,11 @@ def convert_token(token, category):
                  token.get("timestamp", 
                  token.get("created_at", datetime.now(timezone.utc).isoformat()))))
     
-    # Nettoyer symbol
-    symbol = token_data.get("symbol", "UNKNOWN")
+    # Nettoyer symbol (cache de métadonnées si le feed ne l'a pas)
+    cached = lookup_metadata(token_data.get("address", "")) or {}
+    symbol = token_data.get("symbol")
+    if symbol in (None, "", "UNKNOWN"):
+        symbol = cached.get("symbol") or "UNKNOWN"
     if isinstance(symbol, str):
         symbol = symbol.replace('$', '').upper()
     
@@ -130,7 +135,7 @@ def convert_token(token, category):
     return {
         "address": token_data.get("address", ""),
         "symbol": symbol,
-        "name": token_data.get("name", symbol),
+        "name": token_data.get("name") or cached.get("name") or symbol,
         "pair_address": pair_data.get("address", pair_data.get("pairAddress", "")),
         "dex": pair_data.get("dex", pair_data.get("dexId", "uniswap")),
         "source": token.get("source", "migrated"),
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+LURKER Multicall3 — many contract reads per eth_call
+aggregate3 with allowFailure=true, so one reverting or non-standard token only
+loses its own result. Chunks of calls are sent as one JSON-RPC batch, so a
+whole scan's reads cost a single HTTP round trip in the common case.
+"""
+from chain_rpc import RpcError, get_rpc
+from evm_abi import (decode_string, decode_uint, encode_address, encode_bytes,
+                     encode_uint, selector)
+
+MULTICALL3 = "0xcA11bde05977b3631167028862bE2a173976CA11"  # Same address on every chain
+AGGREGATE3 = selector("aggregate3((address,bool,bytes)[])")
+CHUNK_SIZE = 200  # Sub-calls per eth_call (keeps calldata and gas well under node limits)
+
+SYMBOL = bytes.fromhex(selector("symbol()"))
+NAME = bytes.fromhex(selector("name()"))
+DECIMALS = bytes.fromhex(selector("decimals()"))
+
+
+def encode_aggregate3(calls):
+    """calls: [(target, calldata_bytes), ...] -> aggregate3 calldata (hex with 0x)"""
+    heads = []
+    tails = []
+    offset = 32 * len(calls)
+    for target, calldata in calls:
+        tuple_hex = encode_address(target) + encode_uint(1) + encode_uint(96) + encode_bytes(calldata)
+        heads.append(encode_uint(offset))
+        tails.append(tuple_hex)
+        offset += len(tuple_hex) // 2
+    return "0x" + AGGREGATE3 + encode_uint(32) + encode_uint(len(calls)) + "".join(heads) + "".join(tails)
+
+
+def decode_aggregate3(result_hex):
+    """aggregate3 return data -> [(success, return_bytes), ...]"""
+    data = bytes.fromhex((result_hex or "0x")[2:])
+    array = int.from_bytes(data[:32], "big")
+    count = int.from_bytes(data[array:array + 32], "big")
+    base = array + 32
+    results = []
+    for i in range(count):
+        start = base + int.from_bytes(data[base + 32 * i:base + 32 * i + 32], "big")
+        success = int.from_bytes(data[start:start + 32], "big") != 0
+        ret = start + int.from_bytes(data[start + 32:start + 64], "big")
+        length = int.from_bytes(data[ret:ret + 32], "big")
+        results.append((success, data[ret + 32:ret + 32 + length]))
+    return results
+
+
+def aggregate3(calls, rpc=None, block="latest", chunk_size=CHUNK_SIZE):
+    """Run [(target, calldata_bytes), ...]; returns [(success, return_bytes), ...] in order.
+
+    A chunk whose eth_call fails as a whole yields None for each of its calls
+    (outcome unknown, unlike a sub-call that reverted).
+    """
+    rpc = rpc or get_rpc()
+    chunks = [calls[i:i + chunk_size] for i in range(0, len(calls), chunk_size)]
+    payload = [("eth_call", [{"to": MULTICALL3, "data": encode_aggregate3(chunk)}, block])
+                for chunk in chunks]
+    try:
+        replies = rpc.batch(payload)
+    except Exception as e:
+        print(f"[MULTICALL] Batch failed: {e}")
+        replies = [e] * len(chunks)
+    results = []
+    for chunk, reply in zip(chunks, replies):
+        decoded = None
+        if not isinstance(reply, Exception):
+            try:
+                decoded = decode_aggregate3(reply)
+            except (ValueError, IndexError) as e:
+                print(f"[MULTICALL] Undecodable reply: {e}")
+        elif isinstance(reply, RpcError):
+            print(f"[MULTICALL] eth_call failed: {reply}")
+        if not decoded or len(decoded) != len(chunk):
+            decoded = [None] * len(chunk)
+        results.extend(decoded)
+    return results
+
+
+def fetch_erc20_metadata(addresses, rpc=None):
+    """{address_lower: {"symbol", "name", "decimals"}} for many tokens at once.
+
+    Fields a token does not implement (or returns garbage for) are None; tokens
+    whose reads could not be made at all are left out.
+    """
+    tokens = list(dict.fromkeys(a.lower() for a in addresses if a))
+    calls = []
+    for addr in tokens:
+        calls += [(addr, SYMBOL), (addr, NAME), (addr, DECIMALS)]
+    results = aggregate3(calls, rpc)
+    metadata = {}
+    for i, addr in enumerate(tokens):
+        if None in results[3 * i:3 * i + 3]:
+            continue
+        (ok_s, symbol), (ok_n, name), (ok_d, decimals) = results[3 * i:3 * i + 3]
+        metadata[addr] = {
+            "symbol": decode_string(symbol) if ok_s else None,
+            "name": decode_string(name) if ok_n else None,
+            "decimals": decode_uint(decimals) if ok_d else None,
+        }
+    return metadata
@@ -4,15 +4,17 @@ LURKER Post-Signal Performance Tracker v2.0
 Tracks performance of all signaled tokens over time
 """
 import json
-import requests
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from http_cache import cached_get
+from price_refresher import snapshot_pair
+from rate_limiter import PRIORITY_TRACKER
+
 # Config
 PERFORMANCE_DIR = Path(__file__).parent.parent / "signals" / "performance"
 CIO_FEED_FILE = Path(__file__).parent.parent / "signals" / "cio_feed.json"
-REGISTRY_FILE = Path(__file__).parent.parent / "state" / "token_registry.json"
 
 # Performance tracking settings
 TRACKING_DURATION_HOURS = 72  # Track for 3 days
@@ -39,18 +41,21 @@ def fetch_token_price(token_address: str, chain: str = "base") -> Optional[Dict]
         return None
     
     try:
-        url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
-        resp = requests.get(url, timeout=10)
-        if resp.status_code != 200:
-            return None
-        
-        data = resp.json()
-        pairs = data.get("pairs", [])
-        if not pairs:
-            return None
-        
-        # Get best pair by liquidity
-        best = max(pairs, key=lambda x: float(x.get("liquidity", {}).get("usd", 0) or 0))
+        # Shared market snapshot first, the API only when it is stale
+        best = snapshot_pair(token_address)
+        if not best:
+            url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
+            resp = cached_get(url, priority=PRIORITY_TRACKER, timeout=10)
+            if resp.status_code != 200:
+                return None
+
+            data = resp.json()
+            pairs = data.get("pairs", [])
+            if not pairs:
+                return None
+
+            # Get best pair by liquidity
+            best = max(pairs, key=lambda x: float(x.get("liquidity", {}).get("usd", 0) or 0))
         
         return {
             "price_usd": float(best.get("priceUsd", 0) or 0),
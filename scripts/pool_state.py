@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+LURKER pool state — on-chain reserves and price for tracked pools
+Reads pool state straight from the chain with Multicall3, hundreds of pools per
+JSON-RPC batch: getReserves() for Aerodrome / v2-style pools, slot0() and
+liquidity() for Uniswap v3 (and Slipstream) pools, plus the pool's token
+balances for v3 TVL. Amounts are converted to USD with cached quote prices
+(stables at $1, WETH / cbBTC / cbETH from DexScreener, refreshed every
+QUOTE_TTL seconds and shared through state/quote_prices.json) and written to
+the same metrics fields DexScreener enrichment fills (price_usd, liq_usd).
+
+    python3 pool_state.py          # refresh signals/cio_feed.json once
+    python3 pool_state.py --loop   # refresh once per block
+"""
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from chain_rpc import get_rpc
+from dexscreener_client import DexScreenerClient, best_pair
+from evm_abi import decode_uint, encode_address, selector
+from multicall import MULTICALL3, aggregate3
+from rate_limiter import PRIORITY_TRACKER
+from safe_state import StateFile
+from token_metadata import get_cache as get_metadata_cache
+
+PROJECT_DIR = Path(__file__).parent.parent
+CIO_FILE = PROJECT_DIR / "signals" / "cio_feed.json"
+QUOTE_FILE = PROJECT_DIR / "state" / "quote_prices.json"
+
+QUOTE_TTL = 300   # Seconds a WETH / cbBTC / cbETH USD price is reused
+BLOCK_TIME = 2    # Base block time; --loop refreshes at this pace
+
+GET_RESERVES = bytes.fromhex(selector("getReserves()"))
+SLOT0 = bytes.fromhex(selector("slot0()"))
+LIQUIDITY = bytes.fromhex(selector("liquidity()"))
+BALANCE_OF = bytes.fromhex(selector("balanceOf(address)"))
+GET_BLOCK_NUMBER = bytes.fromhex(selector("getBlockNumber()"))
+CALLS_PER_POOL = 5
+
+# Quote tokens on Base (lowercase) -> symbol
+STABLES = {
+    "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913": "USDC",
+    "0xd9aaec86b65d86f6a7b5b1b0c42ffa531710b6ca": "USDbC",
+    "0x50c5725949a6f0c72e6c4a641f24049a917db0cb": "DAI",
+    "0xfde4c96c8593536e31f229ea8f37b2ada2699bb2": "USDT",
+}
+VOLATILE_QUOTES = {
+    "0x4200000000000000000000000000000000000006": "WETH",
+    "0xcbb7c0000ab88b473b1f5afd9ef808440eed33bf": "cbBTC",
+    "0x2ae3f1ec7f1f5012cfeab0185bfc7aa3cf0dec22": "cbETH",
+}
+
+_quotes = {"ts": 0, "prices": {}}
+
+
+def _state(path):
+    return StateFile(path, max_retries=5, retry_delay=0.2)
+
+
+def _is_pool_address(addr):
+    # Uniswap v4 pools (e.g. Clanker) are 32-byte ids with no contract to call
+    return isinstance(addr, str) and addr.startswith("0x") and len(addr) == 42
+
+
+def quote_prices(client=None):
+    """{quote_token_lower: usd}; volatile quotes cached for QUOTE_TTL seconds"""
+    if time.time() - _quotes["ts"] > QUOTE_TTL:
+        cached = _state(QUOTE_FILE).load(default={}) or {}
+        if time.time() - cached.get("updated_ts", 0) <= QUOTE_TTL:
+            _quotes.update(ts=cached["updated_ts"], prices=cached.get("prices", {}))
+        else:
+            client = client or DexScreenerClient(priority=PRIORITY_TRACKER)
+            client.begin_scan()
+            prices = {}
+            for addr, pairs in client.fetch_pairs_by_token(list(VOLATILE_QUOTES)).items():
+                own = [p for p in pairs if ((p.get("baseToken") or {}).get("address") or "").lower() == addr]
+                pair = best_pair(own)
+                try:
+                    prices[addr] = float(pair["priceUsd"]) if pair and pair.get("priceUsd") else None
+                except (TypeError, ValueError):
+                    prices[addr] = None
+            prices = {a: p for a, p in prices.items() if p}
+            if prices:
+                _quotes.update(ts=time.time(), prices=prices)
+                _state(QUOTE_FILE).save({
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                    "updated_ts": _quotes["ts"],
+                    "prices": prices,
+                })
+            elif cached.get("prices"):
+                print("[POOLS] Quote price refresh failed, keeping stale prices")
+                _quotes.update(ts=time.time() - QUOTE_TTL + 30, prices=cached["prices"])
+    return dict(_quotes["prices"], **{addr: 1.0 for addr in STABLES})
+
+
+def read_pools(pools, rpc=None):
+    """Raw state of [(pool_address, token_a, token_b), ...] in one Multicall3 pass.
+
+    Returns {pool_lower: {"kind", "token0", "token1", "amount0", "amount1",
+    "price0_in_1", "liquidity", "block"}} with decimal-adjusted amounts;
+    pools that are neither v2- nor v3-style (or whose tokens lack decimals)
+    are left out.
+    """
+    pools = [(p.lower(), *sorted((a.lower(), b.lower())))
+             for p, a, b in pools if _is_pool_address(p) and a and b]
+    pools = list({p[0]: p for p in pools}.values())
+    if not pools:
+        return {}
+    rpc = rpc or get_rpc()
+    metadata = get_metadata_cache().resolve([t for _, t0, t1 in pools for t in (t0, t1)], rpc,
+                                            require=("decimals",))
+    decimals = {addr.lower(): meta.get("decimals") for addr, meta in metadata.items()}
+
+    calls = [(MULTICALL3, GET_BLOCK_NUMBER)]
+    for pool, token0, token1 in pools:
+        calls += [(pool, GET_RESERVES), (pool, SLOT0), (pool, LIQUIDITY),
+                  (token0, BALANCE_OF + bytes.fromhex(encode_address(pool))),
+                  (token1, BALANCE_OF + bytes.fromhex(encode_address(pool)))]
+    results = aggregate3(calls, rpc)
+    block = decode_uint(results[0][1]) if results[0] and results[0][0] else None
+
+    states = {}
+    for i, (pool, token0, token1) in enumerate(pools):
+        reserves, slot0, liquidity, balance0, balance1 = results[1 + CALLS_PER_POOL * i:1 + CALLS_PER_POOL * (i + 1)]
+        d0, d1 = decimals.get(token0), decimals.get(token1)
+        if d0 is None or d1 is None or reserves is None or slot0 is None:
+            continue
+        state = {"token0": token0, "token1": token1, "block": block, "liquidity": None}
+        if reserves[0] and len(reserves[1]) >= 64:
+            state["kind"] = "v2"
+            state["amount0"] = decode_uint(reserves[1][:32]) / 10 ** d0
+            state["amount1"] = decode_uint(reserves[1][32:64]) / 10 ** d1
+            state["price0_in_1"] = state["amount1"] / state["amount0"] if state["amount0"] else None
+        elif slot0[0] and len(slot0[1]) >= 32:
+            sqrt_price = decode_uint(slot0[1]) / 2 ** 96
+            state["kind"] = "v3"
+            state["price0_in_1"] = sqrt_price ** 2 * 10 ** (d0 - d1) if sqrt_price else None
+            state["liquidity"] = decode_uint(liquidity[1]) if liquidity and liquidity[0] else None
+            state["amount0"] = decode_uint(balance0[1]) / 10 ** d0 if balance0 and balance0[0] else 0.0
+            state["amount1"] = decode_uint(balance1[1]) / 10 ** d1 if balance1 and balance1[0] else 0.0
+        else:
+            continue
+        states[pool] = state
+    return states
+
+
+def price_pool(state, quotes):
+    """{"base_token", "price_usd", "liq_usd"} from a read_pools state, or None
+    when neither side is a priced quote token"""
+    token0, token1, price = state["token0"], state["token1"], state["price0_in_1"]
+    if not price:
+        return None
+    # Price against a stable when the pool has one, else against any quote
+    for quote in (token1, token0):
+        if quote in STABLES and quotes.get(quote):
+            break
+    else:
+        quote = token1 if quotes.get(token1) else token0 if quotes.get(token0) else None
+    if quote is None:
+        return None
+    base = token0 if quote == token1 else token1
+    base_in_quote = price if quote == token1 else 1 / price
+    quote_usd = quotes[quote]
+    price_usd = base_in_quote * quote_usd
+    amount_base = state["amount0"] if base == token0 else state["amount1"]
+    amount_quote = state["amount1"] if base == token0 else state["amount0"]
+    return {
+        "base_token": base,
+        "price_usd": price_usd,
+        "liq_usd": round(amount_base * price_usd + amount_quote * quote_usd, 2),
+    }
+
+
+def pool_metrics(pools, rpc=None, client=None):
+    """{pool_lower: {"price_usd", "liq_usd", "base_token", "kind", "block"}} for
+    [(pool_address, token_a, token_b), ...], one RPC batch for all pools"""
+    states = read_pools(pools, rpc)
+    if not states:
+        return {}
+    quotes = quote_prices(client)
+    metrics = {}
+    for pool, state in states.items():
+        priced = price_pool(state, quotes)
+        if priced:
+            metrics[pool] = dict(priced, kind=state["kind"], block=state["block"])
+    return metrics
+
+
+def refresh_feed(feed_file=CIO_FILE, rpc=None, last_block=None):
+    """Update price_usd / liq_usd of every CIO candidate from chain state.
+
+    The chain is read before the feed is locked; only the metric fields are
+    then written, matched by pool address, in one update() so candidates that
+    scanner_onchain / scanner_cio_v3 save meanwhile (through StateFile) are
+    kept; writers that bypass StateFile are not covered. Returns the block read
+    (None when nothing was read); skips writing when it equals `last_block`.
+    """
+    feed_state = _state(feed_file)
+    feed = feed_state.load(default=None)
+    if not feed or not feed.get("candidates"):
+        return None
+    pools = [(c.get("pool_address"), (c.get("token") or {}).get("address"),
+              (c.get("quote_token") or {}).get("address")) for c in feed["candidates"]]
+    started = time.time()
+    metrics = pool_metrics(pools, rpc)
+    block = next((m["block"] for m in metrics.values() if m["block"]), None)
+    if not metrics or (block is not None and block == last_block):
+        return block
+    updated_at = datetime.now(timezone.utc).isoformat()
+
+    def apply(data):
+        updated = 0
+        for candidate in data.get("candidates") or []:
+            m = metrics.get((candidate.get("pool_address") or "").lower())
+            if not m:
+                continue
+            candidate.setdefault("metrics", {}).update(price_usd=m["price_usd"], liq_usd=m["liq_usd"])
+            candidate["onchain"] = {"block": m["block"], "kind": m["kind"], "updated_at": updated_at}
+            updated += 1
+        return updated
+    updated = feed_state.update(apply, optimistic=True)
+    print(f"[POOLS] {updated}/{len(pools)} pools priced on-chain at block {block} "
+          f"in {time.time() - started:.1f}s")
+    return block
+
+
+def main():
+    rpc = get_rpc()
+    if "--loop" not in sys.argv:
+        refresh_feed(rpc=rpc)
+        return
+    last_block = None
+    while True:
+        started = time.time()
+        try:
+            last_block = refresh_feed(rpc=rpc, last_block=last_block) or last_block
+        except Exception as e:
+            print(f"[POOLS] Refresh failed: {e}")
+        time.sleep(max(0.5, BLOCK_TIME - (time.time() - started)))
+
+
+if __name__ == "__main__":
+    main()
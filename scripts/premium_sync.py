@@ -11,6 +11,11 @@ import requests
 from datetime import datetime, timezone
 from pathlib import Path
 
+from http_cache import cached_get
+from price_refresher import snapshot_pair
+from safe_state import StateFile
+from rate_limiter import PRIORITY_ALERT
+
 BASE_DIR = Path("/data/.openclaw/workspace/lurker-project")
 STATE_FILE = BASE_DIR / "state" / "lurker_state.json"
 PREMIUM_FILE = BASE_DIR / "state" / "premium_tracker.json"
@@ -26,38 +31,39 @@ MIN_VOL = 50000
 MIN_HOLDERS = 50
 MIN_AGE_HOURS = 2
 
+# tracked_tokens fields this sync refreshes; premium_tracker owns the rest
+SYNC_FIELDS = ("liquidity", "volume_24h", "last_price", "last_check")
+
 def load_json(path):
     if path.exists():
         with open(path) as f:
             return json.load(f)
     return None
 
-def save_json(path, data):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, 'w') as f:
-        json.dump(data, f, indent=2)
-
 def get_price_change(token_addr):
-    """Get current price and 1h change from DexScreener"""
+    """Get current price and 1h change (market snapshot first, then DexScreener)"""
     try:
-        url = f"https://api.dexscreener.com/tokens/base/{token_addr}"
-        resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
-            if "pair" in data:
-                pair = data["pair"]
-                price = float(pair.get("priceUsd", 0))
-                change_1h = float(pair.get("priceChange", {}).get("h1", 0))
-                volume = float(pair.get("volume", {}).get("h24", 0))
-                liquidity = float(pair.get("liquidity", {}).get("usd", 0))
-                return {
-                    "price": price,
-                    "change_1h": change_1h,
-                    "volume_24h": volume,
-                    "liquidity": liquidity,
-                    "buys": pair.get("txns", {}).get("h24", {}).get("buys", 0),
-                    "sells": pair.get("txns", {}).get("h24", {}).get("sells", 0)
-                }
+        pair = snapshot_pair(token_addr)
+        if not pair:
+            url = f"https://api.dexscreener.com/latest/dex/tokens/{token_addr}"
+            resp = cached_get(url, priority=PRIORITY_ALERT, timeout=10)
+            pairs = (resp.json().get("pairs") or []) if resp.status_code == 200 else []
+            if pairs:
+                # Best pair by liquidity, same lookup as the other trackers
+                pair = max(pairs, key=lambda x: float((x.get("liquidity") or {}).get("usd", 0) or 0))
+        if pair:
+            price = float(pair.get("priceUsd", 0))
+            change_1h = float(pair.get("priceChange", {}).get("h1", 0))
+            volume = float(pair.get("volume", {}).get("h24", 0))
+            liquidity = float(pair.get("liquidity", {}).get("usd", 0))
+            return {
+                "price": price,
+                "change_1h": change_1h,
+                "volume_24h": volume,
+                "liquidity": liquidity,
+                "buys": pair.get("txns", {}).get("h24", {}).get("buys", 0),
+                "sells": pair.get("txns", {}).get("h24", {}).get("sells", 0)
+            }
     except Exception as e:
         print(f"Error fetching price for {token_addr}: {e}")
     return None
@@ -116,6 +122,10 @@ def sync_tokens():
     
     tokens = state.get("tokens", {})
     tracked = premium.get("tracked_tokens", {})
+    added = set()    # Tokens this sync starts tracking (written whole)
+    refreshed = set()  # Tracked tokens whose SYNC_FIELDS this sync refreshed
+    alerts_before = {kind: len(premium.get(kind, [])) for kind in ("pump_alerts", "dump_alerts")}
+    notified_before = len(notified.get("notified", []))
     
     new_premium = 0
     
@@ -139,6 +149,7 @@ def sync_tokens():
         if liq >= MIN_LIQ and vol >= MIN_VOL and age_hours >= MIN_AGE_HOURS:
             if addr not in tracked:
                 # New premium token!
+                added.add(addr)
                 tracked[addr] = {
                     "symbol": token.get("symbol", addr[:8]),
                     "address": addr,
@@ -167,6 +178,7 @@ def sync_tokens():
                     print(f"[SYNC] New premium: {token.get('symbol')} - ${liq:,.0f} liq")
             else:
                 # Update tracked token
+                refreshed.add(addr)
                 tracked[addr].update({
                     "liquidity": liq,
                     "volume_24h": vol,
@@ -213,9 +225,24 @@ def sync_tokens():
                             send_telegram(msg)
                             notified.setdefault("notified", []).append(addr)
     
-    # Save states
-    save_json(PREMIUM_FILE, premium)
-    save_json(NOTIFIED_FILE, notified)
+    # Save states: merge our changes into the files as they are now (premium_tracker writes too)
+    def merge_premium(current):
+        entries = current.setdefault("tracked_tokens", {})
+        for addr in added:
+            entries.setdefault(addr, tracked[addr])
+        for addr in refreshed:
+            if addr in entries:  # Not re-added if premium_tracker dropped it meanwhile
+                entries[addr].update({k: tracked[addr][k] for k in SYNC_FIELDS})
+        for kind, count in alerts_before.items():
+            current.setdefault(kind, []).extend(premium.get(kind, [])[count:])
+
+    def merge_notified(current):
+        sent = current.setdefault("notified", [])
+        sent.extend(a for a in notified.get("notified", [])[notified_before:] if a not in sent)
+
+    StateFile(PREMIUM_FILE, max_retries=5, retry_delay=0.2).update(
+        merge_premium, default={"tracked_tokens": {}, "pump_alerts": [], "dump_alerts": []})
+    StateFile(NOTIFIED_FILE, max_retries=5, retry_delay=0.2).update(merge_notified, default={"notified": []})
     
     print(f"[SYNC] Done. Tracked: {len(tracked)}, New premium: {new_premium}")
     
@@ -6,11 +6,14 @@ Generates premium signals for paid subscribers
 """
 import json
 import time
-import requests
 from datetime import datetime, timezone
 from pathlib import Path
 import os
+from dexscreener_client import best_pair
+from http_cache import cached_get
 from safe_state import StateFile
+from price_refresher import snapshot_pair
+from rate_limiter import PRIORITY_ALERT
 
 # Config
 BASE_DIR = Path("/data/.openclaw/workspace/lurker-project")
@@ -49,30 +52,30 @@ def default_tracker_state():
     }
 
 
+def _tracker_file():
+    return StateFile(STATE_DIR / "premium_tracker.json", max_retries=5, retry_delay=0.2)
+
+
 def load_tracker_state():
     """Load or create premium tracker state"""
-    STATE_FILE = STATE_DIR / "premium_tracker.json"
-    if not STATE_FILE.exists():
-        return default_tracker_state()
-    return StateFile(STATE_FILE, max_retries=5, retry_delay=0.2).load(default=default_tracker_state())
+    return _tracker_file().load(default=default_tracker_state())
 
 
-def save_tracker_state(state):
-    """Save premium tracker state"""
-    STATE_FILE = STATE_DIR / "premium_tracker.json"
-    STATE_DIR.mkdir(parents=True, exist_ok=True)
-    if not StateFile(STATE_FILE, max_retries=5, retry_delay=0.2).save(state):
-        raise RuntimeError("failed to save premium tracker state atomically")
+def update_tracker_state(fn):
+    """Run fn(state) as one locked read-modify-write of the tracker state"""
+    return _tracker_file().update(fn, default=default_tracker_state())
 
 def get_token_data_from_dexscreener(token_address):
-    """Fetch token data from DexScreener"""
+    """Best pair from the shared market snapshot, falling back to DexScreener"""
+    pair = snapshot_pair(token_address)
+    if pair:
+        return pair
     try:
-        url = f"https://api.dexscreener.com/tokens/base/{token_address}"
-        resp = requests.get(url, timeout=10)
+        # Same cached lookup as premium_sync (/tokens/base/ has no "pair" field)
+        url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
+        resp = cached_get(url, priority=PRIORITY_ALERT, timeout=10)
         if resp.status_code == 200:
-            data = resp.json()
-            if "pair" in data:
-                return data["pair"]
+            return best_pair(resp.json().get("pairs") or [])
     except Exception as e:
         print(f"Error fetching {token_address}: {e}")
     return None
@@ -175,11 +178,12 @@ def scan_consistent_tokens():
 
 def run_tracker_cycle():
     """Run one cycle of premium tracking"""
-    state = load_tracker_state()
-    tracked = state.get("tracked_tokens", {})
+    # Prices are fetched on a snapshot; only the results are written under the lock
+    tracked = load_tracker_state().get("tracked_tokens", {})
     
     print(f"[PREMIUM TRACKER] Checking {len(tracked)} tracked tokens...")
     
+    checked = {}
     new_pumps = []
     new_dumps = []
     
@@ -189,8 +193,7 @@ def run_tracker_cycle():
         current_price, alert = check_token_price(addr, last_price)
         
         if current_price:
-            token_data["last_price"] = current_price
-            token_data["last_check"] = iso()
+            checked[addr] = {"last_price": current_price, "last_check": iso()}
         
         if alert:
             alert["token"] = token_data.get("symbol", addr)
@@ -203,20 +206,25 @@ def run_tracker_cycle():
                 new_dumps.append(alert)
                 print(f"  📉 DUMP: {alert['token']} {alert['change_pct']}%")
     
-    # Save updated state
-    state["tracked_tokens"] = tracked
-    state["last_scan"] = iso()
-    save_tracker_state(state)
-    
     # Generate alerts
-    if new_pumps or new_dumps:
-        generate_premium_alerts(new_pumps, new_dumps, state)
+    alert_files = generate_premium_alerts(new_pumps, new_dumps)
+    
+    def apply(state):
+        current = state.setdefault("tracked_tokens", {})
+        for addr, fields in checked.items():
+            if addr in current:  # Untracked meanwhile: leave it out
+                current[addr].update(fields)
+        for kind, path in alert_files:
+            state.setdefault(kind, []).append(path)
+        state["last_scan"] = iso()
+    update_tracker_state(apply)
     
     return len(new_pumps), len(new_dumps)
 
-def generate_premium_alerts(pumps, dumps, state):
-    """Generate premium alert files"""
+def generate_premium_alerts(pumps, dumps):
+    """Generate premium alert files; returns [(state list, file path), ...]"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    files = []
     
     if pumps:
         pump_file = SIGNALS_DIR / f"PREMIUM_PUMP_{timestamp}.json"
@@ -229,7 +237,7 @@ def generate_premium_alerts(pumps, dumps, state):
                 "generated_at": iso()
             }, f, indent=2)
         print(f"  ✅ Saved premium pump alert: {pump_file}")
-        state["pump_alerts"].append(str(pump_file))
+        files.append(("pump_alerts", str(pump_file)))
     
     if dumps:
         dump_file = SIGNALS_DIR / f"PREMIUM_DUMP_{timestamp}.json"
@@ -242,9 +250,9 @@ def generate_premium_alerts(pumps, dumps, state):
                 "generated_at": iso()
             }, f, indent=2)
         print(f"  ✅ Saved premium dump alert: {dump_file}")
-        state["dump_alerts"].append(str(dump_file))
+        files.append(("dump_alerts", str(dump_file)))
     
-    save_tracker_state(state)
+    return files
 
 def main():
     """Main premium tracker loop"""
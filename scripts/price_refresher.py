@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+LURKER price refresher — one batched price pass for every tracker
+Collects the tracked addresses (token registry, premium tracker, performance
+files), refreshes them through DexScreener /tokens/v1 batches of 30 and
+publishes state/market_snapshot.json. Each pass also appends a price point
+(price, liquidity, 5m volume) to the registry's price series of every
+registry token it priced. premium_tracker, premium_sync,
+performance_tracker_v2, update_performance, hall_of_fame and top_performers
+read prices from that snapshot and only call the API when it is missing or
+stale, so a cycle costs ceil(tokens / 30) calls instead of one per token per
+module.
+
+    python3 price_refresher.py          # one cycle
+    python3 price_refresher.py --loop   # refresh every REFRESH_INTERVAL seconds
+"""
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dexscreener_client import DexScreenerClient, best_pair
+from rate_limiter import PRIORITY_TRACKER
+from safe_state import StateFile
+from token_registry import get_registry
+
+PROJECT_DIR = Path(__file__).parent.parent
+SNAPSHOT_FILE = PROJECT_DIR / "state" / "market_snapshot.json"
+PREMIUM_FILE = PROJECT_DIR / "state" / "premium_tracker.json"
+PERFORMANCE_DIR = PROJECT_DIR / "signals" / "performance"
+PERFORMANCE_TRACKER_FILE = PROJECT_DIR / "state" / "performance_tracker.json"
+LATEST_SIGNAL_FILE = PROJECT_DIR / "signals" / "latest.json"
+
+REFRESH_INTERVAL = 60                  # Seconds between cycles in --loop mode
+SNAPSHOT_MAX_AGE = 2 * REFRESH_INTERVAL  # Readers fall back to the API past this
+
+# Pair fields kept in the snapshot (same shape as a DexScreener pair)
+PAIR_FIELDS = (
+    "chainId", "dexId", "url", "pairAddress", "baseToken", "quoteToken",
+    "priceNative", "priceUsd", "txns", "volume", "priceChange", "liquidity",
+    "fdv", "marketCap", "pairCreatedAt",
+)
+
+_cache = {"mtime": None, "data": None}
+
+
+def _state(path):
+    return StateFile(path, max_retries=5, retry_delay=0.2)
+
+
+def _is_address(addr):
+    return isinstance(addr, str) and addr.startswith("0x") and len(addr) == 42
+
+
+def tracked_addresses():
+    """Union of every address some tracker refreshes, lowercased"""
+    found = set()
+
+    found.update(get_registry().addresses())
+
+    premium = _state(PREMIUM_FILE).load(default={}) or {}
+    found.update((premium.get("tracked_tokens") or {}).keys())
+
+    if PERFORMANCE_DIR.exists():
+        for path in PERFORMANCE_DIR.glob("*.json"):
+            data = _state(path).load(default={}) or {}
+            if data.get("status") != "expired":
+                found.add(data.get("token_address") or path.stem)
+
+    tracker = _state(PERFORMANCE_TRACKER_FILE).load(default={}) or {}
+    found.update(s.get("address") for s in tracker.get("signals", []))
+
+    latest = _state(LATEST_SIGNAL_FILE).load(default={}) or {}
+    if latest.get("status") == "posted":
+        found.add((latest.get("token") or {}).get("address"))
+
+    return sorted({a.lower() for a in found if _is_address(a)})
+
+
+def compact_pair(pair):
+    return {k: pair[k] for k in PAIR_FIELDS if k in pair}
+
+
+def _float(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def record_prices(tokens, now_ms=None):
+    """Append one price point per registry token priced in this pass"""
+    registry = get_registry()
+    known = set(registry.addresses())
+    now_ms = now_ms or int(time.time() * 1000)
+    points = []
+    for addr, pair in tokens.items():
+        price = _float(pair.get("priceUsd"))
+        if addr not in known or not price:
+            continue
+        points.append((addr, {
+            "timestamp": now_ms,
+            "price": price,
+            "liq": _float((pair.get("liquidity") or {}).get("usd")),
+            "vol_5m": _float((pair.get("volume") or {}).get("m5")),
+        }))
+    if points:
+        registry.append_price_points(points)
+    return len(points)
+
+
+def refresh(client=None, addresses=None):
+    """Refresh all tracked tokens in batches and publish the snapshot"""
+    client = client or DexScreenerClient(priority=PRIORITY_TRACKER)
+    client.begin_scan()
+    addresses = tracked_addresses() if addresses is None else addresses
+    started = time.time()
+
+    by_token = client.fetch_pairs_by_token(addresses)
+    tokens = {}
+    for addr, pairs in by_token.items():
+        # Only pairs where the token is the base side carry its USD price
+        own = [p for p in pairs if ((p.get("baseToken") or {}).get("address") or "").lower() == addr]
+        pair = best_pair(own)
+        if pair:
+            tokens[addr] = compact_pair(pair)
+
+    snapshot = {
+        "schema": "lurker_market_snapshot_v1",
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "updated_ts": time.time(),
+        "requested": len(addresses),
+        "api_calls": client.requests_made,
+        "tokens": tokens,
+    }
+    if not _state(SNAPSHOT_FILE).save(snapshot):
+        raise RuntimeError("failed to save market snapshot atomically")
+    recorded = record_prices(tokens, int(snapshot["updated_ts"] * 1000))
+    print(f"[PRICES] {len(tokens)}/{len(addresses)} tokens priced with "
+          f"{client.requests_made} API calls in {time.time() - started:.1f}s "
+          f"({recorded} registry price points)")
+    return snapshot
+
+
+def load_snapshot():
+    """Current snapshot, re-read only when the file changed"""
+    try:
+        mtime = SNAPSHOT_FILE.stat().st_mtime
+    except OSError:
+        return None
+    if _cache["mtime"] != mtime:
+        _cache["data"] = _state(SNAPSHOT_FILE).load(default=None)
+        _cache["mtime"] = mtime
+    return _cache["data"]
+
+
+def snapshot_pair(token_address, max_age=SNAPSHOT_MAX_AGE):
+    """Best pair for a token from a fresh snapshot, or None (caller should fetch)"""
+    snapshot = load_snapshot()
+    if not snapshot or time.time() - snapshot.get("updated_ts", 0) > max_age:
+        return None
+    return snapshot.get("tokens", {}).get((token_address or "").lower())
+
+
+def snapshot_price(token_address, max_age=SNAPSHOT_MAX_AGE):
+    pair = snapshot_pair(token_address, max_age)
+    try:
+        return float(pair["priceUsd"]) if pair and pair.get("priceUsd") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def main():
+    client = DexScreenerClient(priority=PRIORITY_TRACKER)
+    if "--loop" not in sys.argv:
+        refresh(client)
+        return
+    while True:
+        started = time.time()
+        try:
+            refresh(client)
+        except Exception as e:
+            print(f"[PRICES] Refresh failed: {e}")
+        time.sleep(max(1, REFRESH_INTERVAL - (time.time() - started)))
+
+
+if __name__ == "__main__":
+    main()
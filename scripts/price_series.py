@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+LURKER price series — columnar per-token price history
+Price points (epoch ms + price, liq, vol_5m) are stored column by column in
+chunks of up to CHUNK_POINTS points: each chunk row holds packed int64
+timestamps and float64 columns (NaN = missing), keyed by (address,
+start_ts). Appending rewrites only the last chunk of a token; range queries
+seek the chunk index and bisect inside the boundary chunks, so reading the
+last hour of a long history is O(log n).
+
+History is tiered so a long-lived token stays bounded:
+- raw points for RAW_RETENTION (24h)
+- 5-minute OHLC buckets up to FIVE_MIN_RETENTION (7 days)
+- hourly OHLC buckets beyond that
+Compaction is incremental: appending to a token rolls its expired points up
+(at most once per COMPACT_EVERY), and compact_due() sweeps tokens that no
+longer receive points. load() stitches the tiers together; rollup points are
+stamped with their bucket start, price is the bucket close and high / low
+keep the extremes.
+
+Series columns are NumPy arrays when NumPy is installed, array('q') /
+array('d') otherwise. The store lives in the token registry database
+(token_registry.get_registry().series).
+"""
+import math
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+CHUNK_POINTS = 512
+COLUMNS = ("price", "liq", "vol_5m")
+ROLLUP_COLUMNS = ("open", "high", "low", "close", "liq", "vol_5m")
+NAN = float("nan")
+_LITTLE = sys.byteorder == "little"
+
+FIVE_MIN = 300_000
+HOUR = 3_600_000
+RAW_RETENTION = 24 * HOUR
+FIVE_MIN_RETENTION = 7 * 24 * HOUR
+COMPACT_EVERY = HOUR      # Expired data a token may carry before an append compacts it
+COMPACT_BATCH = 200       # Tokens per compact_due() call
+
+RAW = {"table": "price_chunks", "columns": COLUMNS, "tier": None}
+TIER_5M = {"table": "price_rollups", "columns": ROLLUP_COLUMNS, "tier": FIVE_MIN}
+TIER_1H = {"table": "price_rollups", "columns": ROLLUP_COLUMNS, "tier": HOUR}
+
+
+def to_epoch_ms(value):
+    """Epoch ms from an ISO string, epoch seconds or epoch ms; None if unparseable"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value if value > 1e11 else value * 1000)
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def _pack(typecode, values):
+    packed = array(typecode, values)
+    if not _LITTLE:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack(typecode, blob):
+    values = array(typecode)
+    values.frombytes(blob)
+    if not _LITTLE:
+        values.byteswap()
+    return values
+
+
+def _value(point, key):
+    try:
+        value = point.get(key)
+        return float(value) if value is not None else NAN
+    except (TypeError, ValueError):
+        return NAN
+
+
+def _last_known(a, b):
+    return b if not math.isnan(b) else a
+
+
+def rollup(rows, bucket_ms, ohlc=False):
+    """{bucket_start: (open, high, low, close, liq, vol_5m)} from {ts: row}.
+
+    Rows are raw (price, liq, vol_5m) tuples, or OHLC tuples when `ohlc`.
+    """
+    buckets = {}
+    for ts in sorted(rows):
+        row = rows[ts]
+        if ohlc:
+            o, h, l, c, liq, vol = row
+        else:
+            o = h = l = c = row[0]
+            liq, vol = row[1], row[2]
+        key = ts - ts % bucket_ms
+        b = buckets.get(key)
+        if b is None:
+            buckets[key] = (o, h, l, c, liq, vol)
+        else:
+            buckets[key] = (b[0], max(b[1], h), min(b[2], l), c, _last_known(b[4], liq), _last_known(b[5], vol))
+    return buckets
+
+
+def _combine(old, new):
+    """Merge a late bucket into an existing one (open / close stay, extremes widen)"""
+    return (old[0], max(old[1], new[1]), min(old[2], new[2]), old[3],
+            _last_known(old[4], new[4]), _last_known(old[5], new[5]))
+
+
+class Series:
+    """Sorted price points of one token, as parallel columns"""
+
+    def __init__(self, ts=None, price=None, liq=None, vol_5m=None, high=None, low=None):
+        self.ts = ts if ts is not None else array("q")
+        self.price = price if price is not None else array("d")
+        self.liq = liq if liq is not None else array("d")
+        self.vol_5m = vol_5m if vol_5m is not None else array("d")
+        self.high = high if high is not None else self.price
+        self.low = low if low is not None else self.price
+
+    def __len__(self):
+        return len(self.ts)
+
+    def _slice(self, start, end):
+        return Series(self.ts[start:end], self.price[start:end], self.liq[start:end],
+                      self.vol_5m[start:end], self.high[start:end], self.low[start:end])
+
+    def since(self, start_ms):
+        """Points at or after start_ms"""
+        return self._slice(bisect_left(self.ts, start_ms), len(self))
+
+    def between(self, start_ms, end_ms):
+        """Points in [start_ms, end_ms]"""
+        return self._slice(bisect_left(self.ts, start_ms), bisect_right(self.ts, end_ms))
+
+    def last(self, n):
+        return self._slice(max(0, len(self) - n), len(self))
+
+    def price_at(self, ms):
+        """Last known (non-NaN) price at or before ms, None when there is none"""
+        for i in range(bisect_right(self.ts, ms) - 1, -1, -1):
+            price = float(self.price[i])
+            if not math.isnan(price):
+                return price
+        return None
+
+    def positive_prices(self):
+        """Prices > 0 in time order"""
+        if NUMPY_AVAILABLE and isinstance(self.price, np.ndarray):
+            return self.price[self.price > 0]
+        return array("d", (p for p in self.price if p > 0))
+
+    def max_price(self):
+        """Highest price (bucket highs included), NaN ignored; None when there is none"""
+        if NUMPY_AVAILABLE and isinstance(self.high, np.ndarray):
+            highs = self.high[~np.isnan(self.high)]
+            return float(highs.max()) if len(highs) else None
+        return max((float(h) for h in self.high if not math.isnan(h)), default=None)
+
+    @property
+    def last_ts(self):
+        return int(self.ts[-1]) if len(self) else None
+
+    def points(self):
+        """Old-style [{"timestamp": ms, "price", "liq", "vol_5m"}, ...] (NaN fields left out)"""
+        out = []
+        for i in range(len(self)):
+            point = {"timestamp": int(self.ts[i])}
+            for key in COLUMNS:
+                value = float(getattr(self, key)[i])
+                if not math.isnan(value):
+                    point[key] = value
+            out.append(point)
+        return out
+
+
+class PriceSeriesStore:
+    """Chunked columnar series in a SQLite database.
+
+    `connect` returns the (shared) connection and `lock` guards it; writes
+    made through the _ methods join the caller's transaction.
+    """
+
+    def __init__(self, connect, lock):
+        self._connect = connect
+        self._lock = lock
+
+    @staticmethod
+    def create_tables(db):
+        db.execute("""CREATE TABLE IF NOT EXISTS price_chunks (
+            address TEXT NOT NULL,
+            start_ts INTEGER NOT NULL,
+            end_ts INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            ts BLOB NOT NULL,
+            price BLOB NOT NULL,
+            liq BLOB NOT NULL,
+            vol_5m BLOB NOT NULL,
+            PRIMARY KEY (address, start_ts)
+        ) WITHOUT ROWID""")
+        db.execute("""CREATE TABLE IF NOT EXISTS price_rollups (
+            address TEXT NOT NULL,
+            tier INTEGER NOT NULL,
+            start_ts INTEGER NOT NULL,
+            end_ts INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            ts BLOB NOT NULL,
+            open BLOB NOT NULL,
+            high BLOB NOT NULL,
+            low BLOB NOT NULL,
+            close BLOB NOT NULL,
+            liq BLOB NOT NULL,
+            vol_5m BLOB NOT NULL,
+            PRIMARY KEY (address, tier, start_ts)
+        ) WITHOUT ROWID""")
+
+    # --- chunk primitives, shared by the raw table and the rollup tiers ---
+
+    @staticmethod
+    def _where(spec, address):
+        if spec["tier"] is None:
+            return "address = ?", [address]
+        return "address = ? AND tier = ?", [address, spec["tier"]]
+
+    def _select(self, db, spec, address, start_ms=None, end_ms=None, extra=""):
+        where, params = self._where(spec, address)
+        if start_ms is not None:
+            where += " AND end_ts >= ?"
+            params.append(start_ms)
+        if end_ms is not None:
+            where += " AND start_ts <= ?"
+            params.append(end_ms)
+        cols = ", ".join(("start_ts", "ts") + spec["columns"])
+        return db.execute(f"SELECT {cols} FROM {spec['table']} WHERE {where} {extra or 'ORDER BY start_ts'}",
+                          params).fetchall()
+
+    @staticmethod
+    def _decode(rows):
+        """{ts: (col, ...)} from chunk rows"""
+        decoded = {}
+        for row in rows:
+            cols = [_unpack("d", blob) for blob in row[2:]]
+            for i, ms in enumerate(_unpack("q", row[1])):
+                decoded[ms] = tuple(c[i] for c in cols)
+        return decoded
+
+    def _delete_chunks(self, db, spec, address, starts):
+        where, params = self._where(spec, address)
+        db.executemany(f"DELETE FROM {spec['table']} WHERE {where} AND start_ts = ?",
+                       [params + [s] for s in starts])
+
+    def _insert(self, db, spec, address, rows):
+        """Write {ts: row} as new chunks"""
+        ts = sorted(rows)
+        width = len(spec["columns"])
+        prefix = [address] if spec["tier"] is None else [address, spec["tier"]]
+        marks = ", ".join("?" * (len(prefix) + 4 + width))
+        for i in range(0, len(ts), CHUNK_POINTS):
+            part = ts[i:i + CHUNK_POINTS]
+            db.execute(f"INSERT OR REPLACE INTO {spec['table']} VALUES ({marks})",
+                       prefix + [part[0], part[-1], len(part), _pack("q", part)]
+                       + [_pack("d", [rows[ms][j] for ms in part]) for j in range(width)])
+
+    def _merge(self, db, spec, address, new, combine=None):
+        """Merge {ts: row} into a series, rewriting only the chunks it overlaps"""
+        if not new:
+            return 0
+        first, last = min(new), max(new)
+        # The chunk starting at or before the oldest new point, plus later ones up to the newest
+        head = self._select(db, spec, address, end_ms=first, extra="ORDER BY start_ts DESC LIMIT 1")
+        lower = head[0][0] if head else first
+        where, params = self._where(spec, address)
+        cols = ", ".join(("start_ts", "ts") + spec["columns"])
+        later = db.execute(f"SELECT {cols} FROM {spec['table']} WHERE {where} AND start_ts > ? AND start_ts <= ?",
+                           params + [lower, last]).fetchall()
+        rows = head + later
+        merged = self._decode(rows)
+        for ms, row in new.items():
+            merged[ms] = combine(merged[ms], row) if combine and ms in merged else row
+        self._delete_chunks(db, spec, address, [r[0] for r in rows])
+        self._insert(db, spec, address, merged)
+        return len(new)
+
+    def _take_before(self, db, spec, address, cutoff):
+        """Remove and return {ts: row} of the points older than cutoff"""
+        rows = self._select(db, spec, address, end_ms=cutoff - 1)
+        if not rows:
+            return {}
+        decoded = self._decode(rows)
+        taken = {ms: row for ms, row in decoded.items() if ms < cutoff}
+        kept = {ms: row for ms, row in decoded.items() if ms >= cutoff}
+        self._delete_chunks(db, spec, address, [r[0] for r in rows])
+        if kept:
+            self._insert(db, spec, address, kept)
+        return taken
+
+    # --- reads ---
+
+    def _load_spec(self, db, spec, address, start_ms, end_ms, before=None):
+        end = end_ms if before is None else min(x for x in (end_ms, before - 1) if x is not None)
+        rows = self._decode(self._select(db, spec, address, start_ms, end))
+        return {ms: row for ms, row in rows.items()
+                if (start_ms is None or ms >= start_ms) and (end is None or ms <= end)}
+
+    def load(self, address, start_ms=None, end_ms=None):
+        """Series of a token, optionally limited to [start_ms, end_ms], all tiers stitched"""
+        address = (address or "").lower()
+        with self._lock:
+            db = self._connect()
+            # A coarser tier only covers what precedes the finer one (late points may overlap)
+            raw_from = db.execute("SELECT MIN(start_ts) FROM price_chunks WHERE address = ?",
+                                  (address,)).fetchone()[0]
+            five_from = db.execute("SELECT MIN(start_ts) FROM price_rollups WHERE address = ? AND tier = ?",
+                                   (address, FIVE_MIN)).fetchone()[0]
+            raw = self._load_spec(db, RAW, address, start_ms, end_ms)
+            five = self._load_spec(db, TIER_5M, address, start_ms, end_ms, before=raw_from)
+            hourly = self._load_spec(db, TIER_1H, address, start_ms, end_ms,
+                                     before=min(x for x in (five_from, raw_from, 2 ** 62) if x is not None))
+        ts = array("q")
+        cols = {key: array("d") for key in ("price", "liq", "vol_5m", "high", "low")}
+        for rows in (hourly, five):
+            for ms in sorted(rows):
+                o, h, l, c, liq, vol = rows[ms]
+                ts.append(ms)
+                for key, value in zip(("price", "liq", "vol_5m", "high", "low"), (c, liq, vol, h, l)):
+                    cols[key].append(value)
+        for ms in sorted(raw):
+            price, liq, vol = raw[ms]
+            ts.append(ms)
+            for key, value in zip(("price", "liq", "vol_5m", "high", "low"), (price, liq, vol, price, price)):
+                cols[key].append(value)
+        if NUMPY_AVAILABLE:
+            return Series(np.frombuffer(ts, dtype=np.int64),
+                          *(np.frombuffer(cols[k], dtype=np.float64) for k in ("price", "liq", "vol_5m", "high", "low")))
+        return Series(ts, *(cols[k] for k in ("price", "liq", "vol_5m", "high", "low")))
+
+    def last_point_ts(self, address):
+        """Timestamp (ms) of a token's newest point, None without history"""
+        address = (address or "").lower()
+        with self._lock:
+            db = self._connect()
+            row = db.execute("SELECT MAX(end_ts) FROM price_chunks WHERE address = ?", (address,)).fetchone()
+            if row and row[0] is not None:
+                return row[0]
+            row = db.execute("SELECT MAX(end_ts) FROM price_rollups WHERE address = ?", (address,)).fetchone()
+        return row[0] if row else None
+
+    def last_point(self, address):
+        """Series holding only a token's newest point (empty without history)"""
+        ms = self.last_point_ts(address)
+        return self.load(address, ms, ms) if ms is not None else Series()
+
+    def stats(self):
+        """Points stored per tier"""
+        with self._lock:
+            db = self._connect()
+            raw = db.execute("SELECT COALESCE(SUM(n), 0) FROM price_chunks").fetchone()[0]
+            tiers = dict(db.execute("SELECT tier, SUM(n) FROM price_rollups GROUP BY tier").fetchall())
+        return {"raw": raw, "5m": tiers.get(FIVE_MIN, 0), "1h": tiers.get(HOUR, 0)}
+
+    # --- writes (inside the caller's transaction) ---
+
+    def _append(self, db, points, now_ms=None):
+        """Add [(address, point), ...]; same-timestamp points replace older ones"""
+        by_address = {}
+        for address, point in points:
+            ms = to_epoch_ms(point.get("timestamp"))
+            if ms is not None:
+                by_address.setdefault(address.lower(), {})[ms] = tuple(_value(point, k) for k in COLUMNS)
+        now_ms = now_ms or int(time.time() * 1000)
+        count = 0
+        for address, new in by_address.items():
+            count += self._merge(db, RAW, address, new)
+            oldest = db.execute("SELECT MIN(start_ts) FROM price_chunks WHERE address = ?", (address,)).fetchone()[0]
+            if oldest is not None and oldest < now_ms - RAW_RETENTION - COMPACT_EVERY:
+                self._compact(db, address, now_ms)
+        return count
+
+    def _compact(self, db, address, now_ms):
+        """Roll expired raw points into 5m buckets and expired 5m buckets into hourly ones"""
+        cutoff = now_ms - RAW_RETENTION
+        raw = self._take_before(db, RAW, address, cutoff - cutoff % FIVE_MIN)
+        self._merge(db, TIER_5M, address, rollup(raw, FIVE_MIN), _combine)
+        cutoff = now_ms - FIVE_MIN_RETENTION
+        five = self._take_before(db, TIER_5M, address, cutoff - cutoff % HOUR)
+        self._merge(db, TIER_1H, address, rollup(five, HOUR, ohlc=True), _combine)
+        return len(raw), len(five)
+
+    def _delete(self, db, addresses):
+        db.executemany("DELETE FROM price_chunks WHERE address = ?", [(a.lower(),) for a in addresses])
+        db.executemany("DELETE FROM price_rollups WHERE address = ?", [(a.lower(),) for a in addresses])
+
+    def compact_due(self, write, now_ms=None, limit=COMPACT_BATCH):
+        """Compact up to `limit` tokens (all with None) holding expired data.
+
+        `write(fn)` runs fn(conn) in a transaction (TokenRegistry._write).
+        Returns (tokens, raw points rolled up, 5m buckets rolled up).
+        """
+        now_ms = now_ms or int(time.time() * 1000)
+        raw_cutoff = now_ms - RAW_RETENTION
+        five_cutoff = now_ms - FIVE_MIN_RETENTION
+        with self._lock:
+            due = [r[0] for r in self._connect().execute("""
+                SELECT address FROM price_chunks WHERE start_ts < ? - ? % ?
+                UNION SELECT address FROM price_rollups WHERE tier = ? AND start_ts < ? - ? % ?
+                LIMIT ?""", (raw_cutoff, raw_cutoff, FIVE_MIN, FIVE_MIN, five_cutoff, five_cutoff, HOUR,
+                             -1 if limit is None else limit)).fetchall()]
+        moved = [0, 0]
+        for address in due:
+            raw, five = write(lambda db: self._compact(db, address, now_ms))
+            moved[0] += raw
+            moved[1] += five
+        return len(due), moved[0], moved[1]
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+LURKER shared rate limiter — cross-process token buckets per provider
+Every scanner/tracker draws from one SQLite-backed budget per provider
+(state/rate_limits.db), so jobs running side by side from cron and
+stable_launcher stop tripping 429s independently.
+
+Priority classes: alert > tracker > scan. Lower classes must leave a reserve
+in the bucket that only higher classes may spend, so alert-critical price
+checks go first when the budget is tight.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+
+DB_FILE = Path(__file__).parent.parent / "state" / "rate_limits.db"
+
+# provider: (tokens refilled per second, bucket capacity)
+PROVIDERS = {
+    "dexscreener": (4.0, 20),     # ~300 req/min on pairs/tokens endpoints
+    "geckoterminal": (0.5, 5),    # 30 req/min on the free tier
+    "coingecko": (0.25, 5),       # ~15 req/min without key
+    "birdeye": (1.0, 5),
+}
+
+HOST_PROVIDERS = {
+    "api.dexscreener.com": "dexscreener",
+    "api.geckoterminal.com": "geckoterminal",
+    "api.coingecko.com": "coingecko",
+    "api.birdeye.so": "birdeye",
+}
+
+PRIORITY_ALERT = "alert"      # Price checks that drive user-facing alerts
+PRIORITY_TRACKER = "tracker"  # Performance / registry refreshes
+PRIORITY_SCAN = "scan"        # Discovery scans
+
+# Share of the bucket each class must leave untouched
+PRIORITY_RESERVE = {
+    PRIORITY_ALERT: 0.0,
+    PRIORITY_TRACKER: 0.25,
+    PRIORITY_SCAN: 0.5,
+}
+
+MAX_WAIT = 60            # Give up waiting after this many seconds and proceed
+DEFAULT_PENALTY = 10     # Pause after a 429 without Retry-After
+
+
+class RateLimiter:
+    """Token buckets shared by all processes through one SQLite file"""
+
+    def __init__(self, db_file=DB_FILE, providers=None):
+        self.db_file = Path(db_file)
+        self.providers = PROVIDERS if providers is None else providers
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self):
+        if self._conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_file), timeout=10,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS buckets (
+                provider TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )""")
+            self._conn = conn
+        return self._conn
+
+    def _take(self, provider, priority, cost, now):
+        """Refill and try to take `cost` tokens; returns seconds to wait (0 = granted)"""
+        rate, capacity = self.providers[provider]
+        floor = capacity * PRIORITY_RESERVE.get(priority, PRIORITY_RESERVE[PRIORITY_SCAN])
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT tokens, updated_at FROM buckets WHERE provider = ?",
+                             (provider,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+            if tokens - cost >= floor:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (floor + cost - tokens) / rate
+            db.execute("INSERT OR REPLACE INTO buckets (provider, tokens, updated_at) VALUES (?, ?, ?)",
+                       (provider, tokens, now))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return wait
+
+    def acquire(self, provider, priority=PRIORITY_SCAN, cost=1, max_wait=MAX_WAIT):
+        """Block until the provider budget allows one request.
+
+        Returns True when granted, False when max_wait expired (the caller may
+        still proceed). Unknown providers and limiter failures never block.
+        """
+        if provider not in self.providers:
+            return True
+        deadline = time.time() + max_wait
+        while True:
+            try:
+                with self._lock:
+                    wait = self._take(provider, priority, cost, time.time())
+            except sqlite3.Error as e:
+                print(f"[RATE] Limiter unavailable ({e}), not throttling {provider}")
+                return True
+            if wait <= 0:
+                return True
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                print(f"[RATE] {provider} budget exhausted, proceeding after {max_wait}s")
+                return False
+            time.sleep(min(wait, remaining, 5))
+
+    def penalize(self, provider, seconds=DEFAULT_PENALTY):
+        """Drain the bucket below zero so every process pauses ~`seconds`"""
+        if provider not in self.providers:
+            return
+        rate, _ = self.providers[provider]
+        try:
+            with self._lock:
+                self._db().execute(
+                    "INSERT OR REPLACE INTO buckets (provider, tokens, updated_at) VALUES (?, ?, ?)",
+                    (provider, -rate * seconds, time.time()))
+        except sqlite3.Error as e:
+            print(f"[RATE] Could not record 429 for {provider}: {e}")
+
+
+_limiter = None
+
+
+def get_limiter():
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter()
+    return _limiter
+
+
+def provider_for_url(url):
+    return HOST_PROVIDERS.get(urlparse(url).netloc.lower())
+
+
+def retry_after(resp):
+    try:
+        return max(1, int(resp.headers.get("Retry-After", DEFAULT_PENALTY)))
+    except (TypeError, ValueError):
+        return DEFAULT_PENALTY
+
+
+def acquire(provider, priority=PRIORITY_SCAN):
+    return get_limiter().acquire(provider, priority)
+
+
+def limited_get(url, priority=PRIORITY_SCAN, provider=None, session=None, **kwargs):
+    """requests.get through the shared per-provider budget.
+
+    A 429 drains the provider bucket for Retry-After seconds so the other
+    processes back off too. The response is returned unchanged.
+    """
+    provider = provider or provider_for_url(url)
+    limiter = get_limiter()
+    if provider:
+        limiter.acquire(provider, priority)
+    resp = (session or requests).get(url, **kwargs)
+    if provider and resp.status_code == 429:
+        limiter.penalize(provider, retry_after(resp))
+    return resp
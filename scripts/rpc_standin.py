@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+LURKER local JSON-RPC stand-in — serve recorded Base blocks offline
+Record a block range from a real node once, then point the RPC scanners at a
+local server that answers from the recording (single and batched requests):
+
+    python3 scripts/rpc_standin.py record data/fixtures/blocks.json.gz --blocks 300
+    python3 scripts/rpc_standin.py serve data/fixtures/blocks.json.gz --port 8545 --block-time 2
+    BASE_RPC_URL=http://127.0.0.1:8545 python3 scripts/scanner_base_rpc.py
+
+Supported methods: eth_chainId, eth_blockNumber, eth_getBlockByNumber and
+eth_getLogs (logs recorded with --log-address). The same port also speaks
+WebSocket (ws://host:port/) with eth_subscribe "logs" / "newHeads": each
+subscription is pushed the recorded logs / headers of every block the head
+passes; --ws-drop-every closes connections after N seconds to exercise
+reconnects. --max-log-range / --max-logs
+reject large getLogs queries the way public providers do. With --block-time
+the head starts at the first recorded block and advances one block every N
+seconds (Base produces a block every ~2s), so repeated scanner runs see a
+moving chain; otherwise the head is the last block.
+"""
+import argparse
+import gzip
+import json
+import random
+import secrets
+import select
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+from ws_rpc import OP_CLOSE, OP_PING, OP_PONG, OP_TEXT, WsClosed, accept_key, read_frame, send_frame
+
+SCHEMA = "lurker_rpc_blocks_v1"
+BASE_CHAIN_ID = "0x2105"
+RECORD_BATCH_SIZE = 10
+RECORD_LOG_SPAN = 500
+
+
+class BlockStore:
+    """Recorded blocks by number plus the simulated chain head"""
+
+    def __init__(self, blocks, chain_id=BASE_CHAIN_ID, block_time=None, logs=None):
+        self.blocks = {int(n): b for n, b in blocks.items()}
+        self.logs = sorted(logs or [], key=lambda l: (int(l["blockNumber"], 16), int(l["logIndex"], 16)))
+        self.max_log_range = None
+        self.max_logs = None
+        self.chain_id = chain_id
+        self.first = min(self.blocks) if self.blocks else 0
+        self.last = max(self.blocks) if self.blocks else 0
+        self.block_time = block_time
+        self.started = time.time()
+
+    @classmethod
+    def load(cls, path, block_time=None):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("schema") != SCHEMA:
+            raise ValueError(f"{path}: not a {SCHEMA} file")
+        return cls(data["blocks"], data.get("chain_id", BASE_CHAIN_ID), block_time, data.get("logs"))
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump({
+                "schema": SCHEMA,
+                "chain_id": self.chain_id,
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+                "blocks": {str(n): b for n, b in sorted(self.blocks.items())},
+                "logs": self.logs,
+            }, f, separators=(",", ":"))
+
+    def head(self):
+        if not self.block_time:
+            return self.last
+        return min(self.last, self.first + int((time.time() - self.started) / self.block_time))
+
+    def block(self, tag, full_txs):
+        num = self.head() if tag == "latest" else int(tag, 16)
+        if num > self.head():
+            return None
+        block = self.blocks.get(num)
+        if block is None or full_txs:
+            return block
+        return dict(block, transactions=[tx["hash"] if isinstance(tx, dict) else tx
+                                         for tx in block.get("transactions", [])])
+
+    def _block_param(self, value, default):
+        if value in (None, "latest"):
+            return default
+        if value == "earliest":
+            return 0
+        return int(value, 16)
+
+    def get_logs(self, flt):
+        """Filter recorded logs like a node; raises RpcFailure on provider limits"""
+        head = self.head()
+        start = self._block_param(flt.get("fromBlock"), head)
+        end = min(self._block_param(flt.get("toBlock"), head), head)
+        if self.max_log_range and end - start + 1 > self.max_log_range:
+            raise RpcFailure(-32005, f"exceed maximum block range: {self.max_log_range}")
+        addresses = flt.get("address")
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        addresses = {a.lower() for a in addresses} if addresses else None
+        topics = flt.get("topics") or []
+        found = []
+        for log in self.logs:
+            num = int(log["blockNumber"], 16)
+            if num < start or num > end:
+                continue
+            if addresses and log["address"].lower() not in addresses:
+                continue
+            if not all(_topic_matches(want, log["topics"], i) for i, want in enumerate(topics)):
+                continue
+            found.append(log)
+            if self.max_logs and len(found) > self.max_logs:
+                raise RpcFailure(-32005, f"query returned more than {self.max_logs} results")
+        return found
+
+
+class RpcFailure(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _topic_matches(want, topics, i):
+    if want is None:
+        return True
+    if i >= len(topics):
+        return False
+    options = want if isinstance(want, list) else [want]
+    return topics[i].lower() in {t.lower() for t in options}
+
+
+def handle_call(store, call):
+    method = call.get("method")
+    params = call.get("params") or []
+    reply = {"jsonrpc": "2.0", "id": call.get("id")}
+    if method == "eth_chainId":
+        reply["result"] = store.chain_id
+    elif method == "eth_blockNumber":
+        reply["result"] = hex(store.head())
+    elif method == "eth_getBlockByNumber":
+        reply["result"] = store.block(params[0], bool(params[1]) if len(params) > 1 else False)
+    elif method == "eth_getLogs":
+        try:
+            reply["result"] = store.get_logs(params[0] if params else {})
+        except RpcFailure as e:
+            reply["error"] = {"code": e.code, "message": e.message}
+    else:
+        reply["error"] = {"code": -32601, "message": f"method {method} not recorded"}
+    return reply
+
+
+def _notify(sock, sub_id, result):
+    send_frame(sock, json.dumps({"jsonrpc": "2.0", "method": "eth_subscription",
+                                 "params": {"subscription": sub_id, "result": result}}))
+
+
+def serve_websocket(store, sock, drop_after=None):
+    """JSON-RPC over an upgraded connection until the client leaves"""
+    subs = {}  # id -> ("logs", filter) | ("newHeads", None)
+    last = store.head()
+    opened = time.time()
+    while not (drop_after and time.time() - opened > drop_after):
+        if select.select([sock], [], [], 0.05)[0]:
+            try:
+                opcode, payload = read_frame(sock)
+            except (WsClosed, OSError):
+                return
+            if opcode == OP_CLOSE:
+                return
+            if opcode == OP_PING:
+                send_frame(sock, payload, OP_PONG)
+            elif opcode == OP_TEXT:
+                try:
+                    call = json.loads(payload)
+                except ValueError:
+                    continue
+                method, params = call.get("method"), call.get("params") or []
+                reply = {"jsonrpc": "2.0", "id": call.get("id")}
+                if method == "eth_subscribe" and params and params[0] in ("logs", "newHeads"):
+                    sub_id = "0x" + secrets.token_hex(16)
+                    subs[sub_id] = (params[0], params[1] if len(params) > 1 else {})
+                    reply["result"] = sub_id
+                elif method == "eth_unsubscribe":
+                    reply["result"] = subs.pop(params[0] if params else None, None) is not None
+                else:
+                    reply = handle_call(store, call)
+                send_frame(sock, json.dumps(reply))
+        head = store.head()
+        for num in range(last + 1, head + 1):
+            for sub_id, (kind, flt) in subs.items():
+                if kind == "newHeads":
+                    block = store.block(hex(num), False)
+                    if block:
+                        _notify(sock, sub_id, {k: v for k, v in block.items() if k != "transactions"})
+                    continue
+                for log in store.get_logs(dict(flt, fromBlock=hex(num), toBlock=hex(num))):
+                    _notify(sock, sub_id, log)
+        last = max(last, head)
+    send_frame(sock, b"", OP_CLOSE)
+
+
+def make_handler(store, latency_ms=0, jitter_ms=0, ws_drop_after=None):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            key = self.headers.get("Sec-WebSocket-Key")
+            if (self.headers.get("Upgrade") or "").lower() != "websocket" or not key:
+                self.send_error(400, "JSON-RPC: POST, or GET with a WebSocket upgrade")
+                return
+            self.send_response(101, "Switching Protocols")
+            self.send_header("Upgrade", "websocket")
+            self.send_header("Connection", "Upgrade")
+            self.send_header("Sec-WebSocket-Accept", accept_key(key))
+            self.end_headers()
+            self.wfile.flush()
+            try:
+                serve_websocket(store, self.connection, ws_drop_after)
+            except OSError:
+                pass
+            self.close_connection = True
+
+        def do_POST(self):
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            except ValueError:
+                payload = None
+            if isinstance(payload, list):
+                body = [handle_call(store, c) for c in payload]
+            elif isinstance(payload, dict):
+                body = handle_call(store, payload)
+            else:
+                body = {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "parse error"}}
+            delay = latency_ms + (random.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0)
+            if delay > 0:
+                time.sleep(delay / 1000.0)
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_server(store, host="127.0.0.1", port=0, latency_ms=0, jitter_ms=0, ws_drop_after=None):
+    """Serve `store` in a background thread; returns (server, url)"""
+    server = ThreadingHTTPServer((host, port), make_handler(store, latency_ms, jitter_ms, ws_drop_after))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def record(rpc_url, path, num_blocks, log_addresses=()):
+    """Copy the last `num_blocks` blocks (with transactions) from a real node,
+    plus the logs emitted by `log_addresses` in that range"""
+    session = requests.Session()
+    latest = int(session.post(rpc_url, json={"jsonrpc": "2.0", "method": "eth_blockNumber",
+                                             "params": [], "id": 1}, timeout=30).json()["result"], 16)
+    wanted = list(range(latest - num_blocks + 1, latest + 1))
+    blocks = {}
+    for i in range(0, len(wanted), RECORD_BATCH_SIZE):
+        batch = wanted[i:i + RECORD_BATCH_SIZE]
+        payload = [{"jsonrpc": "2.0", "method": "eth_getBlockByNumber", "params": [hex(n), True], "id": n}
+                   for n in batch]
+        for item in session.post(rpc_url, json=payload, timeout=60).json():
+            if item.get("result"):
+                blocks[item["id"]] = item["result"]
+        print(f"[STANDIN] Recorded {len(blocks)}/{num_blocks} blocks")
+    logs = []
+    for i in range(0, len(wanted), RECORD_LOG_SPAN):
+        span = wanted[i:i + RECORD_LOG_SPAN]
+        for address in log_addresses:
+            resp = session.post(rpc_url, json={"jsonrpc": "2.0", "method": "eth_getLogs", "id": 1, "params": [
+                {"fromBlock": hex(span[0]), "toBlock": hex(span[-1]), "address": address}]}, timeout=60).json()
+            logs.extend(resp.get("result") or [])
+    if log_addresses:
+        print(f"[STANDIN] Recorded {len(logs)} logs")
+    BlockStore(blocks, logs=logs).save(path)
+    print(f"[STANDIN] Saved blocks {wanted[0]}-{wanted[-1]} -> {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local JSON-RPC stand-in serving recorded blocks")
+    parser.add_argument("mode", choices=["record", "serve"])
+    parser.add_argument("blocks_file", help="Recorded blocks (.json.gz)")
+    parser.add_argument("--rpc", default="https://mainnet.base.org", help="Node to record from")
+    parser.add_argument("--blocks", type=int, default=300, help="Blocks to record")
+    parser.add_argument("--log-address", action="append", default=[],
+                        help="Also record logs emitted by this contract (repeatable)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--block-time", type=float, default=None,
+                        help="Advance the head one block every N seconds")
+    parser.add_argument("--max-log-range", type=int, default=None,
+                        help="Reject eth_getLogs spanning more blocks than this")
+    parser.add_argument("--max-logs", type=int, default=None,
+                        help="Reject eth_getLogs returning more logs than this")
+    parser.add_argument("--latency", type=float, default=0, help="Response latency in ms")
+    parser.add_argument("--jitter", type=float, default=0, help="Latency jitter +/- ms")
+    parser.add_argument("--ws-drop-every", type=float, default=None,
+                        help="Close WebSocket connections after N seconds")
+    args = parser.parse_args()
+
+    if args.mode == "record":
+        record(args.rpc, args.blocks_file, args.blocks, args.log_address)
+        return 0
+
+    store = BlockStore.load(args.blocks_file, block_time=args.block_time)
+    store.max_log_range = args.max_log_range
+    store.max_logs = args.max_logs
+    server, url = start_server(store, args.host, args.port, args.latency, args.jitter, args.ws_drop_every)
+    print(f"[STANDIN] Serving blocks {store.first}-{store.last} on {url} (WebSocket: ws{url[4:]})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
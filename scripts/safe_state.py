@@ -2,26 +2,177 @@
 """
 Safe JSON state file handler with file locking.
 Prevents race conditions when multiple scripts access the same state file.
+
+Writers serialize on a sidecar lock file (<name>.lock), which also holds a
+version counter bumped by every write. Read-modify-write goes through
+update(fn): the exclusive lock is held across read, fn(data) and the atomic
+write, so concurrent jobs no longer lose each other's changes. With
+optimistic=True, fn runs on a snapshot without the lock and the write only
+happens if the version did not move meanwhile (otherwise fn is re-run on
+fresh data), for slow pure computations over a big file.
+
+    StateFile(path).update(lambda state: state["meta"].update(last_scan=now))
+
+While the state daemon (state_daemon.py) runs, StateFiles in state/ go
+through it instead: update() sends only the changes fn made, guarded by the
+document version, and the daemon does the serializing.
 """
+import copy
 import json
 import fcntl
 import os
+import random
 import time
+from contextlib import contextmanager
 from pathlib import Path
 
+
+class StateCorruptError(ValueError):
+    """State file exists but is not valid JSON (update() refuses to overwrite it)"""
+
+
+_NOT_ROUTED = object()
+
+
 class StateFile:
     """Handles reading/writing state file with file locking"""
     
-    def __init__(self, filepath, max_retries=3, retry_delay=0.5):
+    def __init__(self, filepath, max_retries=3, retry_delay=0.5, use_daemon=True, indent=2):
         self.filepath = Path(filepath)
+        self.lock_path = self.filepath.with_name(self.filepath.name + '.lock')
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.use_daemon = use_daemon
+        self.indent = indent
+    
+    def _daemon(self, ops):
+        """Results of ops run by the state daemon, None when it does not serve this file"""
+        if not self.use_daemon:
+            return None
+        import state_daemon  # Imports this module
+        return state_daemon.request(self.filepath, ops)
+    
+    def _update_via_daemon(self, fn, default):
+        from state_daemon import StateConflict, diff_ops
+        for attempt in range(max(self.max_retries, 20)):
+            results = self._daemon([{"op": "get", "path": []}, {"op": "version"}])
+            if results is None:
+                return _NOT_ROUTED
+            data, version = results
+            data = copy.deepcopy(default) if data is None else data
+            before = copy.deepcopy(data)
+            result = fn(data)
+            try:
+                if self._daemon([{"op": "check", "version": version}] + diff_ops(before, data)) is None:
+                    continue  # Daemon went away: next pass falls back to the file
+                return result
+            except StateConflict:
+                # Jittered backoff so hot writers stop colliding
+                time.sleep(random.uniform(0, min(0.2, 0.002 * 2 ** attempt)))
+        raise StateConflict(f"{self.filepath.name}: gave up after {attempt + 1} conflicting updates")
+    
+    @contextmanager
+    def _locked(self, mode):
+        """Hold the sidecar lock; yields its open file (content = version)"""
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, 'a+') as f:
+            fcntl.flock(f.fileno(), mode)
+            try:
+                yield f
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    
+    @staticmethod
+    def _read_version(lock_file):
+        lock_file.seek(0)
+        try:
+            return int(lock_file.read().strip() or 0)
+        except ValueError:
+            return 0
+    
+    def _read(self, default):
+        """Parsed file, a copy of default when missing; StateCorruptError if unparseable"""
+        try:
+            with open(self.filepath, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return copy.deepcopy(default)
+        except json.JSONDecodeError as e:
+            raise StateCorruptError(f"{self.filepath.name}: {e}") from e
+    
+    def _write(self, data, lock_file):
+        """Atomic write + version bump; caller holds the exclusive lock"""
+        temp_path = self.filepath.with_name(f"{self.filepath.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w') as f:
+            json.dump(data, f, indent=self.indent, separators=(',', ':') if self.indent is None else None)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.filepath)
+        version = self._read_version(lock_file) + 1
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(version))
+        lock_file.flush()
+        return version
+    
+    def version(self):
+        """Write counter of the file (0 before the first locked write)"""
+        results = self._daemon([{"op": "version"}])
+        if results is not None:
+            return results[0]
+        with self._locked(fcntl.LOCK_SH) as lock_file:
+            return self._read_version(lock_file)
+    
+    def snapshot(self, default=None):
+        """(data, version) read consistently; StateCorruptError if unparseable"""
+        results = self._daemon([{"op": "get", "path": []}, {"op": "version"}])
+        if results is not None:
+            data, version = results
+            return ({} if default is None else copy.deepcopy(default)) if data is None else data, version
+        with self._locked(fcntl.LOCK_SH) as lock_file:
+            return self._read({} if default is None else default), self._read_version(lock_file)
+    
+    def update(self, fn, default=None, optimistic=False):
+        """Read-modify-write transaction; returns fn's result.
+
+        fn(data) mutates data in place (data is a copy of `default` when the
+        file is missing); it is written back unless fn raises. A corrupt file
+        raises StateCorruptError instead of being replaced.
+        With optimistic=True fn may run more than once and must only touch data.
+        """
+        default = {} if default is None else default
+        result = self._update_via_daemon(fn, default) if self.use_daemon else _NOT_ROUTED
+        if result is not _NOT_ROUTED:
+            return result
+        if optimistic:
+            for attempt in range(self.max_retries):
+                data, version = self.snapshot(default)
+                result = fn(data)
+                with self._locked(fcntl.LOCK_EX) as lock_file:
+                    if self._read_version(lock_file) == version:
+                        self._write(data, lock_file)
+                        return result
+                print(f"[STATE] {self.filepath.name} changed during update, retrying ({attempt + 1})")
+        # Pessimistic (or out of optimistic retries): one locked pass
+        with self._locked(fcntl.LOCK_EX) as lock_file:
+            data = self._read(default)
+            result = fn(data)
+            self._write(data, lock_file)
+            return result
     
     def load(self, default=None):
         """Load JSON with file locking and retry on failure"""
         if default is None:
             default = {}
         
+        try:
+            results = self._daemon([{"op": "get", "path": []}])
+        except StateCorruptError as e:
+            print(f"[WARN] JSON corrupted, returning default: {e}")
+            return default
+        if results is not None:
+            return default if results[0] is None else results[0]
+        
         for attempt in range(self.max_retries):
             try:
                 with open(self.filepath, 'r') as f:
@@ -44,23 +195,17 @@ class StateFile:
         return default
     
     def save(self, data):
-        """Save JSON with file locking (atomic write)"""
-        # Write to temp file first, then rename (atomic)
-        temp_path = self.filepath.with_suffix('.tmp')
-        
+        """Save JSON under the writer lock (atomic write); prefer update() for read-modify-write"""
+        try:
+            if self._daemon([{"op": "set", "path": [], "value": data}]) is not None:
+                return True
+        except Exception as e:
+            print(f"[ERROR] Failed to save state: {e}")
+            return False
         for attempt in range(self.max_retries):
             try:
-                with open(temp_path, 'w') as f:
-                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)  # Exclusive lock for writing
-                    try:
-                        json.dump(data, f, indent=2)
-                        f.flush()
-                        os.fsync(f.fileno())
-                    finally:
-                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                
-                # Atomic rename
-                os.replace(temp_path, self.filepath)
+                with self._locked(fcntl.LOCK_EX) as lock_file:
+                    self._write(data, lock_file)
                 return True
             except Exception as e:
                 if attempt < self.max_retries - 1:
@@ -83,6 +228,11 @@ def save_state(data, state_file='lurker_state.json'):
     handler = StateFile(state_file)
     return handler.save(data)
 
+def update_state(fn, state_file='lurker_state.json'):
+    """Transactional read-modify-write of the state (see StateFile.update)"""
+    handler = StateFile(state_file)
+    return handler.update(fn, default={'schema': 'lurker', 'meta': {}, 'tokens': {}})
+
 
 if __name__ == '__main__':
     # Test
@@ -2,18 +2,43 @@
 """
 LURKER Base RPC Scanner - Detect fresh contracts via Base RPC
 Alternative to BaseScan API (requires paid plan for V2)
+Blocks are fetched with batched JSON-RPC (BLOCK_BATCH_SIZE blocks per HTTP
+call) by a small pool of workers. state/base_rpc_checkpoint.json holds a
+reorg-safe ChainCheckpoint (chain_checkpoint) so each run continues where the
+previous one stopped, rescans only a reorged tail, and flags contracts from
+blocks that are not CONFIRMATIONS deep yet as unconfirmed. The contracts are
+kept in signals/basescan_feed.json by creation tx hash: later runs mark them
+confirmed, and drop those whose block was reorged out. LURKER_SCAN_MODE=
+confirmed keeps the scan CONFIRMATIONS blocks behind the head instead.
 """
 import json
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
 from datetime import datetime, timezone
 from pathlib import Path
 
+from chain_checkpoint import MODE_HEAD, ChainCheckpoint
+from chain_rpc import ChainRpc
+from safe_state import StateFile
+
 # Use public Base RPC or QuickNode/Alchemy if available
 BASE_RPC = os.getenv("BASE_RPC_URL", "https://mainnet.base.org")
 FEED_FILE = Path(__file__).parent.parent / "signals" / "basescan_feed.json"
-STATE_FILE = Path(__file__).parent.parent / "state" / "basescan_seen.json"
+CHECKPOINT_FILE = Path(__file__).parent.parent / "state" / "base_rpc_checkpoint.json"
+SCAN_MODE = os.getenv("LURKER_SCAN_MODE", MODE_HEAD)
+
+RPC_TIMEOUT = 30
+BLOCK_BATCH_SIZE = 10       # Full-transaction blocks per batched HTTP call
+RPC_WORKERS = 4             # Batches in flight at once
+INITIAL_BLOCKS = 5          # Window scanned on the very first run
+MAX_BLOCKS_PER_RUN = 900    # ~30 min of Base blocks (2s); older backlog is skipped
+MAX_FEED_CONTRACTS = 500    # Newest contracts kept in the feed
+
+_local = threading.local()
+
 
 def now():
     return datetime.now(timezone.utc)
@@ -29,17 +54,44 @@ def save_json(path: Path, data: dict):
     with open(path, 'w') as f:
         json.dump(data, f, indent=2)
 
+def _session():
+    """One keep-alive session per worker thread"""
+    if getattr(_local, "session", None) is None:
+        _local.session = requests.Session()
+    return _local.session
+
+def rpc_call(method, params):
+    r = _session().post(BASE_RPC, json={
+        "jsonrpc": "2.0",
+        "method": method,
+        "params": params,
+        "id": 1
+    }, timeout=RPC_TIMEOUT)
+    return r.json().get("result")
+
+def rpc_batch(calls):
+    """Send [(method, params), ...] as one JSON-RPC batch.
+
+    Returns results in call order; failed entries are None.
+    """
+    payload = [{"jsonrpc": "2.0", "method": m, "params": p, "id": i}
+               for i, (m, p) in enumerate(calls)]
+    r = _session().post(BASE_RPC, json=payload, timeout=RPC_TIMEOUT)
+    data = r.json()
+    if not isinstance(data, list):
+        # Whole batch rejected (rate limit, batch too large...)
+        raise RuntimeError((data or {}).get("error", data))
+    results = [None] * len(calls)
+    for item in data:
+        i = item.get("id")
+        if isinstance(i, int) and 0 <= i < len(calls) and "error" not in item:
+            results[i] = item.get("result")
+    return results
+
 def get_latest_block():
     """Get latest block number from Base RPC"""
     try:
-        r = requests.post(BASE_RPC, json={
-            "jsonrpc": "2.0",
-            "method": "eth_blockNumber",
-            "params": [],
-            "id": 1
-        }, timeout=30)
-        result = r.json()
-        return int(result.get("result", "0x0"), 16)
+        return int(rpc_call("eth_blockNumber", []) or "0x0", 16)
     except Exception as e:
         print(f"[RPC] Error getting block: {e}")
         return None
@@ -47,52 +99,117 @@ def get_latest_block():
 def get_block_transactions(block_num):
     """Get transactions from a specific block"""
     try:
-        r = requests.post(BASE_RPC, json={
-            "jsonrpc": "2.0",
-            "method": "eth_getBlockByNumber",
-            "params": [hex(block_num), True],
-            "id": 1
-        }, timeout=30)
-        result = r.json()
-        return result.get("result", {})
+        return rpc_call("eth_getBlockByNumber", [hex(block_num), True]) or {}
     except Exception as e:
         print(f"[RPC] Error getting block {block_num}: {e}")
         return {}
 
-def scan_recent_blocks(num_blocks=10):
-    """Scan recent blocks for contract creations"""
+def get_blocks(block_nums):
+    """Fetch blocks (with transactions) in one batched call; {block_num: block or None}"""
+    try:
+        results = rpc_batch([("eth_getBlockByNumber", [hex(n), True]) for n in block_nums])
+    except Exception as e:
+        print(f"[RPC] Error getting blocks {block_nums[0]}-{block_nums[-1]}: {e}")
+        results = [None] * len(block_nums)
+    return dict(zip(block_nums, results))
+
+def iter_blocks(block_nums, batch_size=BLOCK_BATCH_SIZE, workers=RPC_WORKERS):
+    """Yield (block_num, block or None) with up to `workers` batches in flight"""
+    batches = [block_nums[i:i + batch_size] for i in range(0, len(block_nums), batch_size)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(get_blocks, b) for b in batches]):
+            yield from future.result().items()
+
+def extract_contracts(block_num, block):
+    contracts = []
+    timestamp = int(block.get("timestamp", "0x0"), 16)
+    for tx in block.get("transactions", []):
+        # Contract creation has 'to' as null/None and 'input' is the contract code
+        if not tx.get("to") and tx.get("input") and len(tx.get("input", "")) > 2:
+            contracts.append({
+                "address": None,  # Will need to compute from tx
+                "creator": tx.get("from"),
+                "block": block_num,
+                "timestamp": timestamp,
+                "hash": tx.get("hash"),
+                "input": tx.get("input")[:100]  # First 100 chars of bytecode
+            })
+    return contracts
+
+def load_checkpoint(mode=SCAN_MODE):
+    return ChainCheckpoint(StateFile(CHECKPOINT_FILE, max_retries=5, retry_delay=0.2).load(default={}),
+                           mode=mode)
+
+def save_checkpoint(checkpoint):
+    StateFile(CHECKPOINT_FILE, max_retries=5, retry_delay=0.2).save(checkpoint.to_dict())
+
+def scan_recent_blocks(num_blocks=INITIAL_BLOCKS, max_blocks=MAX_BLOCKS_PER_RUN):
+    """Scan blocks since the checkpoint (or the last `num_blocks`) for contract creations.
+
+    Returns (contracts, confirmed, retracted): the contracts found in this run
+    (each with a "confirmed" flag), the tx hashes that became final in this
+    run (including contracts found by earlier runs) and the tx hashes of
+    earlier contracts whose blocks were reorged out.
+    """
     latest = get_latest_block()
     if not latest:
-        return []
-    
+        return [], set(), set()
+
+    rpc = ChainRpc([BASE_RPC], timeout=RPC_TIMEOUT)
+    checkpoint = load_checkpoint()
+    retracted = set(checkpoint.check_reorg(rpc))
+    if retracted:
+        print(f"[RPC] Retracting {len(retracted)} unconfirmed contracts from reorged blocks")
+    start, end = checkpoint.next_range(latest, num_blocks, max_blocks)
+    if start > end:
+        print(f"[RPC] Up to date at block {end}")
+        if retracted:
+            save_checkpoint(checkpoint)
+        return [], set(), retracted
+
     print(f"[RPC] Latest block: {latest}")
-    print(f"[RPC] Scanning last {num_blocks} blocks...")
-    
+    print(f"[RPC] Scanning blocks {start}-{end} ({end - start + 1})...")
+
     contracts = []
-    
-    for i in range(num_blocks):
-        block_num = latest - i
-        block = get_block_transactions(block_num)
-        
+    failed = []
+    seen_hashes = {}
+    for block_num, block in iter_blocks(list(range(start, end + 1))):
         if not block:
+            failed.append(block_num)
             continue
-        
-        timestamp = int(block.get("timestamp", "0x0"), 16)
-        transactions = block.get("transactions", [])
-        
-        for tx in transactions:
-            # Contract creation has 'to' as null/None and 'input' is the contract code
-            if not tx.get("to") and tx.get("input") and len(tx.get("input", "")) > 2:
-                contracts.append({
-                    "address": None,  # Will need to compute from tx
-                    "creator": tx.get("from"),
-                    "block": block_num,
-                    "timestamp": timestamp,
-                    "hash": tx.get("hash"),
-                    "input": tx.get("input")[:100]  # First 100 chars of bytecode
-                })
-    
-    return contracts
+        seen_hashes[block_num] = block.get("hash")
+        contracts.extend(extract_contracts(block_num, block))
+
+    # Only advance over the contiguous range that was read; failed blocks are retried next run
+    scanned_to = min(failed) - 1 if failed else end
+    if failed:
+        print(f"[RPC] {len(failed)} blocks failed, checkpoint held at {scanned_to}")
+    if scanned_to < start:
+        if retracted:
+            save_checkpoint(checkpoint)
+        return [], set(), retracted
+    confirmed, _ = checkpoint.advance(rpc, scanned_to, latest,
+                                      items=[(c["block"], c["hash"]) for c in contracts],
+                                      seen_hashes=seen_hashes)
+    save_checkpoint(checkpoint)
+
+    confirmed = set(confirmed)
+    contracts = [c for c in contracts if c["block"] <= checkpoint.scanned]
+    for c in contracts:
+        c["confirmed"] = c["hash"] in confirmed
+    contracts.sort(key=lambda c: c["block"])
+    return contracts, confirmed, retracted
+
+def merge_contracts(known, contracts, confirmed, retracted, limit=MAX_FEED_CONTRACTS):
+    """Feed contract list after a scan: reorged ones removed, newly final ones
+    marked confirmed, new ones added; newest `limit` kept, oldest first"""
+    by_hash = {c["hash"]: c for c in known if c.get("hash") not in retracted}
+    for c in contracts:
+        by_hash[c["hash"]] = c
+    for tx_hash in confirmed:
+        if tx_hash in by_hash:
+            by_hash[tx_hash]["confirmed"] = True
+    return sorted(by_hash.values(), key=lambda c: c["block"])[-limit:]
 
 def scan_fresh_tokens():
     """Main scan function"""
@@ -101,23 +218,29 @@ def scan_fresh_tokens():
     print("="*60)
     
     # Scan recent blocks
-    contracts = scan_recent_blocks(num_blocks=5)
+    contracts, confirmed, retracted = scan_recent_blocks()
     
     if not contracts:
         print("[RPC] No contract creations found")
-        return True
-    
-    print(f"\n[RPC] Found {len(contracts)} potential contract creations")
+    else:
+        print(f"\n[RPC] Found {len(contracts)} potential contract creations")
     
     # For now, just log them (computing contract address from tx requires more logic)
     for c in contracts[:5]:
         print(f"[RPC] Block {c['block']}: {c['creator'][:12]}... created contract")
     
-    # Save minimal feed
+    if not (contracts or confirmed or retracted):
+        return True
+
+    # Keep contracts by tx hash so reorgs and confirmations can update them later
     feed = load_json(FEED_FILE)
+    feed["contracts"] = merge_contracts(feed.get("contracts", []), contracts, confirmed, retracted)
     feed["meta"] = {
         "updated_at": now().isoformat(),
         "contracts_found": len(contracts),
+        "contracts_tracked": len(feed["contracts"]),
+        "unconfirmed": sum(1 for c in feed["contracts"] if not c.get("confirmed")),
+        "retracted": len(retracted),
         "note": "BaseScan API requires paid plan. Using RPC fallback."
     }
     save_json(FEED_FILE, feed)
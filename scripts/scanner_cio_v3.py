@@ -4,18 +4,21 @@ LURKER CIO Scanner v3 — Râteau large multi-source
 Combines: new pairs + token profiles + boosts
 Anti-relist: tracks token first_seen
 """
-import json
+import asyncio
+import sys
 import time
-import requests
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from collections import defaultdict
 
+from dexscreener_client import AsyncFetchPool, DexScreenerClient
+from safe_state import StateFile
+from token_registry import first_seen_ms, get_registry
+
 # Config
 BASE_URL = "https://api.dexscreener.com"
 CHAIN = "base"
 CIO_FILE = Path(__file__).parent.parent / "signals" / "cio_feed.json"
-STATE_FILE = Path(__file__).parent.parent / "state" / "token_registry.json"
 
 # Filters - LAUNCH MODE (temporarily lowered)
 QUOTE_WHITELIST = {"USDC", "WETH", "cbBTC", "USDBC", "ETH"}
@@ -26,6 +29,13 @@ MAX_AGE_HOURS = 48
 MAX_TOKENS_PER_SOURCE = 50
 TIMEOUT = 15
 
+# Sources: (name, listing path, listing key, item meta key, max tokens)
+SOURCES = [
+    ("profiles", "/token-profiles/latest/v1", "profiles", "profile", MAX_TOKENS_PER_SOURCE),
+    ("boosts", "/token-boosts/latest/v1", "boosts", "boost", MAX_TOKENS_PER_SOURCE),
+    ("top_boosts", "/token-boosts/top/v1", "boosts", "boost", 20),
+]
+
 # Blacklist
 BLUECHIP_SYMBOLS = {
     "AERO", "AERODROME", "cbBTC", "CBBTC", "WETH", "ETH", "USDC", "USDT", 
@@ -34,14 +44,10 @@ BLUECHIP_SYMBOLS = {
     "SOL", "WBTC", "BTC", "TRUMP", "MIGGLES"
 }
 
+dex_client = DexScreenerClient(BASE_URL, CHAIN, timeout=TIMEOUT)
+
 def get_json(url):
-    try:
-        r = requests.get(url, timeout=TIMEOUT, headers={"Accept": "application/json"})
-        r.raise_for_status()
-        return r.json()
-    except Exception as e:
-        print(f"[SCANNER] Error {url}: {e}")
-        return None
+    return dex_client.get_json(url)
 
 def now_ms():
     return int(time.time() * 1000)
@@ -61,29 +67,29 @@ def safe_num(x, default=0):
         return default
 
 def load_token_registry():
-    """Load token first_seen registry for anti-relist"""
-    if STATE_FILE.exists():
-        with open(STATE_FILE) as f:
-            return json.load(f)
-    return {"schema": "lurker_token_registry_v1", "tokens": {}}
+    """Token first_seen registry for anti-relist (records are read on demand)"""
+    return {"store": get_registry(), "tokens": {}, "new": {}}
 
 def save_token_registry(registry):
-    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(STATE_FILE, 'w') as f:
-        json.dump(registry, f, indent=2)
+    """Write only the tokens seen for the first time in this scan"""
+    if registry["new"]:
+        registry["store"].upsert_many(registry["new"])
 
 def is_new_token(token_addr, registry, max_age_hours=48):
     """Check if token is truly new (first_seen < max_age)"""
     token_addr = token_addr.lower()
     now = now_ms()
     
-    if token_addr in registry["tokens"]:
-        first_seen = registry["tokens"][token_addr]["first_seen"]
+    if token_addr not in registry["tokens"]:
+        registry["tokens"][token_addr] = registry["store"].get(token_addr, history=False)
+    known = registry["tokens"][token_addr]
+    first_seen = first_seen_ms(known) if known else None
+    if first_seen is not None:
         age = (now - first_seen) / 3600000.0
-        return age < max_age_hours, registry["tokens"][token_addr]
+        return age < max_age_hours, known
     else:
         # First time seeing this token
-        registry["tokens"][token_addr] = {
+        registry["tokens"][token_addr] = registry["new"][token_addr] = {
             "first_seen": now,
             "first_seen_iso": iso(now)
         }
@@ -181,82 +187,82 @@ def score_cio(pair, age_h, source_boost=0):
     
     return round(min(score, 100), 1)
 
-def fetch_new_pairs():
-    """Source 1: Recent pairs via token-profiles -> token-pairs"""
-    print("[SCANNER] Source 1: New pairs via token-profiles...")
-    profiles = get_json(f"{BASE_URL}/token-profiles/latest/v1")
-    if not profiles:
+def normalize_listing(items, key):
+    if not items:
         return []
-    if isinstance(profiles, dict):
-        profiles = profiles.get("profiles") or profiles.get("data") or []
-    
-    base_profiles = [p for p in profiles if (p.get("chainId") or "").lower() == CHAIN][:MAX_TOKENS_PER_SOURCE]
+    if isinstance(items, dict):
+        items = items.get(key) or items.get("data") or []
+    return items
+
+def get_listing(path, key):
+    """Fetch a DexScreener listing endpoint and normalize it to a list"""
+    return normalize_listing(get_json(f"{BASE_URL}{path}"), key)
+
+def base_entries(listing, limit):
+    entries = [e for e in listing if (e.get("chainId") or "").lower() == CHAIN][:limit]
+    return [e for e in entries if e.get("tokenAddress")]
+
+def to_items(entries, best, source, meta_key):
     results = []
-    
-    for p in base_profiles:
-        token = p.get("tokenAddress")
-        if not token:
-            continue
-        pairs = get_json(f"{BASE_URL}/token-pairs/v1/{CHAIN}/{token}")
-        if pairs and isinstance(pairs, list):
-            # Take best pair by liquidity
-            best = max(pairs, key=lambda x: safe_num((x.get("liquidity") or {}).get("usd"), 0))
-            results.append({"pair": best, "source": "profiles", "profile": p})
-        time.sleep(0.1)
-    
+    for e in entries:
+        pair = best.get(e["tokenAddress"].lower())
+        if pair:
+            results.append({"pair": pair, "source": source, meta_key: e})
+    return results
+
+def resolve_pairs(listing, source, meta_key, limit=MAX_TOKENS_PER_SOURCE):
+    """Resolve best pair for each Base token of a listing via batched lookups"""
+    entries = base_entries(listing, limit)
+    best = dex_client.fetch_best_pairs([e["tokenAddress"] for e in entries])
+    return to_items(entries, best, source, meta_key)
+
+def fetch_new_pairs():
+    """Source 1: Recent pairs via token-profiles -> batched token lookups"""
+    print("[SCANNER] Source 1: New pairs via token-profiles...")
+    profiles = get_listing("/token-profiles/latest/v1", "profiles")
+    results = resolve_pairs(profiles, "profiles", "profile")
     print(f"[SCANNER] Source 1: {len(results)} pairs")
     return results
 
 def fetch_boosted_tokens():
     """Source 2: Boosted tokens (budget = intent)"""
     print("[SCANNER] Source 2: Boosted tokens...")
-    boosts = get_json(f"{BASE_URL}/token-boosts/latest/v1")
-    if not boosts:
-        return []
-    if isinstance(boosts, dict):
-        boosts = boosts.get("boosts") or boosts.get("data") or []
-    
-    base_boosts = [b for b in boosts if (b.get("chainId") or "").lower() == CHAIN][:MAX_TOKENS_PER_SOURCE]
-    results = []
-    
-    for b in base_boosts:
-        token = b.get("tokenAddress")
-        if not token:
-            continue
-        pairs = get_json(f"{BASE_URL}/token-pairs/v1/{CHAIN}/{token}")
-        if pairs and isinstance(pairs, list):
-            best = max(pairs, key=lambda x: safe_num((x.get("liquidity") or {}).get("usd"), 0))
-            results.append({"pair": best, "source": "boosts", "boost": b})
-        time.sleep(0.1)
-    
+    boosts = get_listing("/token-boosts/latest/v1", "boosts")
+    results = resolve_pairs(boosts, "boosts", "boost")
     print(f"[SCANNER] Source 2: {len(results)} pairs")
     return results
 
 def fetch_top_boosted():
     """Source 3: Top boosted (highest budget)"""
     print("[SCANNER] Source 3: Top boosted...")
-    boosts = get_json(f"{BASE_URL}/token-boosts/top/v1")
-    if not boosts:
-        return []
-    if isinstance(boosts, dict):
-        boosts = boosts.get("boosts") or boosts.get("data") or []
-    
-    base_boosts = [b for b in boosts if (b.get("chainId") or "").lower() == CHAIN][:20]
-    results = []
-    
-    for b in base_boosts:
-        token = b.get("tokenAddress")
-        if not token:
-            continue
-        pairs = get_json(f"{BASE_URL}/token-pairs/v1/{CHAIN}/{token}")
-        if pairs and isinstance(pairs, list):
-            best = max(pairs, key=lambda x: safe_num((x.get("liquidity") or {}).get("usd"), 0))
-            results.append({"pair": best, "source": "top_boosts", "boost": b})
-        time.sleep(0.1)
-    
+    boosts = get_listing("/token-boosts/top/v1", "boosts")
+    results = resolve_pairs(boosts, "top_boosts", "boost", limit=20)
     print(f"[SCANNER] Source 3: {len(results)} pairs")
     return results
 
+async def fetch_source_async(pool, source, path, key, meta_key, limit):
+    """One source: listing + batched pair resolution, both through the shared pool"""
+    listing = normalize_listing(await pool.get_json(f"{BASE_URL}{path}"), key)
+    entries = base_entries(listing, limit)
+    best = await dex_client.fetch_best_pairs_async([e["tokenAddress"] for e in entries], pool)
+    results = to_items(entries, best, source, meta_key)
+    print(f"[SCANNER] Source {source}: {len(results)} pairs")
+    return results
+
+async def collect_items_async():
+    """Fetch the three sources concurrently through one bounded worker pool"""
+    print("[SCANNER] Async mode: fetching profiles, boosts and top boosts concurrently...")
+    pool = AsyncFetchPool(dex_client)
+    per_source = await asyncio.gather(*(fetch_source_async(pool, *spec) for spec in SOURCES))
+    return [item for items in per_source for item in items]
+
+def collect_items():
+    all_items = []
+    all_items.extend(fetch_new_pairs())
+    all_items.extend(fetch_boosted_tokens())
+    all_items.extend(fetch_top_boosted())
+    return all_items
+
 def process_candidate(item, registry):
     """Process a candidate through filters"""
     pair = item["pair"]
@@ -378,20 +384,21 @@ def process_candidate(item, registry):
         "enriched": True
     }, None
 
-def scan():
-    """Main scan — râteau large"""
+def scan(use_async=False):
+    """Main scan — râteau large (use_async: fetch sources concurrently)"""
     print("=" * 60)
     print("[SCANNER] LURKER CIO Scanner v3 — Multi-source Rake")
     print("=" * 60)
     
     t0 = now_ms()
     registry = load_token_registry()
+    dex_client.begin_scan()
     
-    # Fetch all sources
-    all_items = []
-    all_items.extend(fetch_new_pairs())
-    all_items.extend(fetch_boosted_tokens())
-    all_items.extend(fetch_top_boosted())
+    # Fetch all sources (same item order in both modes)
+    if use_async:
+        all_items = asyncio.run(collect_items_async())
+    else:
+        all_items = collect_items()
     
     print(f"\n[SCANNER] Total raw: {len(all_items)} items")
     
@@ -443,12 +450,13 @@ def scan():
     
     # Save
     CIO_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(CIO_FILE, 'w', encoding='utf-8') as f:
-        json.dump(feed, f, ensure_ascii=False, indent=2)
+    if not StateFile(CIO_FILE, max_retries=5, retry_delay=0.2).save(feed):
+        raise RuntimeError(f"Could not save {CIO_FILE}")
     
     print(f"\n[SCANNER] ✅ Candidates: {len(candidates)}")
     print(f"[SCANNER] Rejected: {dict(rejected)}")
-    print(f"[SCANNER] Time: {(now_ms()-t0)/1000:.1f}s")
+    print(f"[SCANNER] Time: {(now_ms()-t0)/1000:.1f}s, API calls: {dex_client.requests_made} "
+          f"(coalesced: {dex_client.coalesced})")
     
     for c in candidates[:5]:
         print(f"  • {c['token']['symbol']}: score={c['scores']['cio_score']}, "
@@ -470,12 +478,12 @@ def write_fail(msg: str):
         },
         "candidates": []
     }
-    CIO_FILE.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    StateFile(CIO_FILE, max_retries=5, retry_delay=0.2).save(payload)
     print(f"[SCANNER] ⚠️ Error handled: {msg[:200]}")
 
 if __name__ == "__main__":
     try:
-        scan()
+        scan(use_async="--async" in sys.argv)
     except Exception as e:
         write_fail(f"scanner crashed: {repr(e)}")
         # Exit 0 = GitHub Actions stays green
@@ -10,6 +10,8 @@ import time
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from circuit_breaker import HALF_OPEN, OPEN, before_request, record
+
 # Config
 FEED_FILE = Path(__file__).parent.parent / "signals" / "live_feed.json"
 MIN_LIQUIDITY = 5000   # $5k min
@@ -31,6 +33,23 @@ BLUECHIP_ADDRESSES = {
 }
 
 def fetch_with_retry(url, max_retries=3, backoff_base=2):
+    """Fetch through the DexScreener circuit breaker (skip when open, single probe when half-open)"""
+    breaker = before_request("dexscreener")
+    if breaker == OPEN:
+        raise Exception("dexscreener circuit open, skipping")
+    if breaker == HALF_OPEN:
+        print("[SCANNER] DexScreener circuit half-open, probing once")
+        max_retries = 1
+    
+    try:
+        data = fetch_attempts(url, max_retries, backoff_base)
+    except Exception:
+        record("dexscreener", False)
+        raise
+    record("dexscreener", True)
+    return data
+
+def fetch_attempts(url, max_retries, backoff_base):
     """Fetch with exponential backoff, handle 429/503/timeouts"""
     for attempt in range(max_retries):
         try:
@@ -11,16 +11,29 @@ Each source:
 Rate limiting:
 - If source returns 429, wait and retry with exponential backoff
 - If all sources fail, use cached data
+
+Hedged mode (--hedged): start the preferred source, launch the next one after
+HEDGE_DELAY seconds (or immediately on failure), keep the first good result
+and cancel the rest. Each race has its own `cancel` event, passed to every
+fetcher: losers check it between requests and retries, and their backoff
+sleeps wait on it, so they stop as soon as the race is decided.
 """
 import json
 import os
 import random
 import requests
+import sys
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, Dict, List, Any
 
+from circuit_breaker import HALF_OPEN, OPEN, before_request, record
+from rate_limiter import limited_get, provider_for_url
+from state_daemon import mutate
+
 # Config
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_DIR = SCRIPT_DIR.parent
@@ -45,6 +58,9 @@ BIRDEYE_API = "https://api.birdeye.so"
 COINGECKO_API = "https://api.coingecko.com/api/v3"
 DEXSCREENER_API = "https://api.dexscreener.com/latest/dex"
 
+# Hedged racing
+HEDGE_DELAY = 4.0  # seconds before the next source is launched alongside
+
 
 def log(msg: str):
     """Log to file and print"""
@@ -56,21 +72,6 @@ def log(msg: str):
         f.write(line + "\n")
 
 
-def load_state() -> Dict:
-    """Load current LURKER state"""
-    if STATE_FILE.exists():
-        with open(STATE_FILE, "r") as f:
-            return json.load(f)
-    return {"tokens": {}, "meta": {}}
-
-
-def save_state(state: Dict):
-    """Save LURKER state"""
-    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(STATE_FILE, "w") as f:
-        json.dump(state, f, indent=2)
-
-
 def load_cache() -> Dict:
     """Load cached data"""
     if CACHE_FILE.exists():
@@ -79,6 +80,19 @@ def load_cache() -> Dict:
     return {"tokens": {}, "last_updated": None, "sources_used": []}
 
 
+def cancelled(cancel: Optional[threading.Event]) -> bool:
+    """True once the hedged race this fetch belongs to is decided"""
+    return cancel is not None and cancel.is_set()
+
+
+def pause(seconds: float, cancel: Optional[threading.Event] = None) -> bool:
+    """Sleep, cut short when `cancel` is set; returns True if cancelled"""
+    if cancel is None:
+        time.sleep(seconds)
+        return False
+    return cancel.wait(seconds)
+
+
 def save_cache(cache: Dict):
     """Save cache"""
     CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
@@ -87,24 +101,47 @@ def save_cache(cache: Dict):
 
 
 def fetch_with_retry(url: str, headers: Optional[Dict] = None, max_retries: int = 3, 
-                     backoff_base: int = 2) -> Optional[Dict]:
-    """Fetch with exponential backoff, handle 429/503/timeouts"""
+                     backoff_base: int = 2, cancel: Optional[threading.Event] = None) -> Optional[Dict]:
+    """Fetch through the provider circuit breaker (skip when open, single probe when half-open)"""
+    if cancelled(cancel):
+        return None
+    provider = provider_for_url(url)
+    if provider:
+        breaker = before_request(provider)
+        if breaker == OPEN:
+            log(f"⏭️ {provider} circuit open, skipping {url}")
+            return None
+        if breaker == HALF_OPEN:
+            log(f"🔎 {provider} circuit half-open, probing once")
+            max_retries = 1
+    
+    data = fetch_attempts(url, headers, max_retries, backoff_base, cancel)
+    if provider and not (data is None and cancelled(cancel)):
+        record(provider, data is not None)
+    return data
+
+
+def fetch_attempts(url: str, headers: Optional[Dict], max_retries: int,
+                   backoff_base: int, cancel: Optional[threading.Event] = None) -> Optional[Dict]:
+    """Fetch with exponential backoff, handle 429/503/timeouts; None once cancelled"""
     for attempt in range(max_retries):
+        if cancelled(cancel):
+            return None
         try:
-            resp = requests.get(url, headers=headers, timeout=20)
+            resp = limited_get(url, headers=headers, timeout=20)
             
             # Handle rate limit
             if resp.status_code == 429:
                 sleep_time = backoff_base * (2 ** attempt) + random.uniform(0, 3)
                 log(f"⚠️ 429 rate limit, retry in {sleep_time:.1f}s (attempt {attempt+1}/{max_retries})")
-                time.sleep(sleep_time)
+                pause(sleep_time, cancel)
                 continue
             
             # Handle service unavailable
             if resp.status_code in [502, 503, 504]:
                 sleep_time = backoff_base * (2 ** attempt)
                 log(f"⚠️ {resp.status_code} error, retry in {sleep_time:.1f}s")
-                time.sleep(sleep_time)
+                pause(sleep_time, cancel)
                 continue
             
             resp.raise_for_status()
@@ -113,12 +150,12 @@ def fetch_with_retry(url: str, headers: Optional[Dict] = None, max_retries: int
         except requests.exceptions.Timeout:
             sleep_time = backoff_base * (2 ** attempt)
             log(f"⚠️ Timeout, retry in {sleep_time:.1f}s")
-            time.sleep(sleep_time)
+            pause(sleep_time, cancel)
         except requests.exceptions.RequestException as e:
             if attempt < max_retries - 1:
                 sleep_time = backoff_base * (2 ** attempt)
                 log(f"⚠️ Request error: {e}, retry in {sleep_time:.1f}s")
-                time.sleep(sleep_time)
+                pause(sleep_time, cancel)
             else:
                 log(f"❌ Failed after {max_retries} retries: {e}")
                 return None
@@ -180,7 +217,7 @@ def normalize_token(data: Dict, source: str) -> Optional[Dict]:
         return None
 
 
-def fetch_birdeye() -> List[Dict]:
+def fetch_birdeye(cancel: Optional[threading.Event] = None) -> List[Dict]:
     """Fetch from Birdeye API (free, good for Solana/Base)"""
     log("📡 Trying Birdeye API...")
     
@@ -195,7 +232,7 @@ def fetch_birdeye() -> List[Dict]:
     
     # Try trending tokens endpoint
     url = f"{BIRDEYE_API}/defi/trending/list?sort_by=volume_24h&sort_order=desc&limit=50"
-    data = fetch_with_retry(url, headers=headers)
+    data = fetch_with_retry(url, headers=headers, cancel=cancel)
     
     if data and isinstance(data, dict):
         items = data.get("data", []) or data.get("items", []) or data.get("tokens", [])
@@ -212,7 +249,7 @@ def fetch_birdeye() -> List[Dict]:
     return []
 
 
-def fetch_coingecko() -> List[Dict]:
+def fetch_coingecko(cancel: Optional[threading.Event] = None) -> List[Dict]:
     """Fetch from CoinGecko API (free tier, rate limited)"""
     log("📡 Trying CoinGecko API...")
     
@@ -220,7 +257,7 @@ def fetch_coingecko() -> List[Dict]:
     
     # Get trending coins
     url = f"{COINGECKO_API}/search/trending"
-    data = fetch_with_retry(url)
+    data = fetch_with_retry(url, cancel=cancel)
     
     if data and isinstance(data, dict):
         coins = data.get("coins", [])
@@ -244,8 +281,10 @@ def fetch_coingecko() -> List[Dict]:
         return tokens
     
     # Fallback: get coins list
+    if cancelled(cancel):
+        return []
     url = f"{COINGECKO_API}/coins/markets?vs_currency=usd&order=volume_desc&per_page=50&page=1"
-    data = fetch_with_retry(url)
+    data = fetch_with_retry(url, cancel=cancel)
     
     if data and isinstance(data, list):
         for item in data:
@@ -269,7 +308,7 @@ def fetch_coingecko() -> List[Dict]:
     return []
 
 
-def fetch_dexscreener() -> List[Dict]:
+def fetch_dexscreener(cancel: Optional[threading.Event] = None) -> List[Dict]:
     """Fetch from DexScreener API (current, rate limited)"""
     log("📡 Trying DexScreener API...")
     
@@ -277,8 +316,10 @@ def fetch_dexscreener() -> List[Dict]:
     queries = ["new", "trending", "base", "solana", "ethereum"]
     
     for q in queries[:2]:  # Limit queries
+        if cancelled(cancel):
+            return []
         url = f"{DEXSCREENER_API}/search?q={q}"
-        data = fetch_with_retry(url)
+        data = fetch_with_retry(url, cancel=cancel)
         
         if data and isinstance(data, dict):
             pairs = data.get("pairs", [])
@@ -297,7 +338,7 @@ def fetch_dexscreener() -> List[Dict]:
                 if token:
                     tokens.append(token)
         
-        time.sleep(0.5 + random.uniform(0, 0.5))  # Rate limiting
+        pause(0.5 + random.uniform(0, 0.5), cancel)  # Rate limiting
     
     # Deduplicate
     seen = set()
@@ -315,7 +356,7 @@ def fetch_dexscreener() -> List[Dict]:
     return []
 
 
-def fetch_geckoterminal() -> List[Dict]:
+def fetch_geckoterminal(cancel: Optional[threading.Event] = None) -> List[Dict]:
     """Fetch from GeckoTerminal API V2"""
     log("📡 Trying GeckoTerminal API...")
     
@@ -330,11 +371,18 @@ def fetch_geckoterminal() -> List[Dict]:
     
     tokens = []
     
+    if cancelled(cancel):
+        return []
+    if before_request("geckoterminal") == OPEN:
+        log("⏭️ geckoterminal circuit open, skipping")
+        return []
+    
     # Try trending pools first
     url = f"{GECKO_API}/networks/base/trending_pools?page=1&limit=30"
     
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=15)
+        resp = limited_get(url, headers=HEADERS, timeout=15)
+        record("geckoterminal", resp.status_code == 200)
         if resp.status_code == 429:
             log("⚠️ GeckoTerminal rate limited")
             return []
@@ -384,7 +432,7 @@ def fetch_geckoterminal() -> List[Dict]:
             if token:
                 tokens.append(token)
         
-        time.sleep(1)  # Rate limiting
+        pause(1, cancel)  # Rate limiting
         
     except Exception as e:
         log(f"⚠️ GeckoTerminal error: {e}")
@@ -398,20 +446,32 @@ def fetch_geckoterminal() -> List[Dict]:
     return []
 
 
+# Sources in order of preference
+SOURCES = [
+    ("birdeye", fetch_birdeye),
+    ("coingecko", fetch_coingecko),
+    ("geckoterminal", fetch_geckoterminal),
+    ("dexscreener", fetch_dexscreener),
+]
+
+
+def dedupe_tokens(tokens: List[Dict]) -> List[Dict]:
+    seen = set()
+    unique_tokens = []
+    for t in tokens:
+        if t["address"].lower() not in seen:
+            seen.add(t["address"].lower())
+            unique_tokens.append(t)
+    return unique_tokens
+
+
 def fetch_all_sources() -> List[Dict]:
     """Fetch from all sources with fallback"""
     all_tokens = []
     sources_used = []
     
     # Try each source in order
-    sources = [
-        ("birdeye", fetch_birdeye),
-        ("coingecko", fetch_coingecko),
-        ("geckoterminal", fetch_geckoterminal),
-        ("dexscreener", fetch_dexscreener),
-    ]
-    
-    for source_name, fetch_func in sources:
+    for source_name, fetch_func in SOURCES:
         try:
             tokens = fetch_func()
             if tokens:
@@ -425,36 +485,90 @@ def fetch_all_sources() -> List[Dict]:
             log(f"❌ {source_name} failed: {e}, trying next...")
             continue
     
-    # Deduplicate
-    seen = set()
-    unique_tokens = []
-    for t in all_tokens:
-        if t["address"].lower() not in seen:
-            seen.add(t["address"].lower())
-            unique_tokens.append(t)
-    
-    return unique_tokens, sources_used
+    return dedupe_tokens(all_tokens), sources_used
 
 
-def update_state(tokens: List[Dict], sources_used: List[str]):
-    """Update lurker_state.json with new tokens"""
-    state = load_state()
+def fetch_all_sources_hedged(hedge_delay: float = HEDGE_DELAY):
+    """Race sources: preferred first, next one after hedge_delay or on failure.
+
+    Returns (tokens, sources_used, report) where report holds the winner and
+    per-source latency/outcome.
+    """
+    decided = threading.Event()  # Passed to every fetcher of this race
+    report = {"winner": None, "hedge_delay_s": hedge_delay, "latency_ms": {}, "outcome": {}}
+    order = {name: i for i, (name, _) in enumerate(SOURCES)}
+    pool = ThreadPoolExecutor(max_workers=len(SOURCES))
+    running = {}
+    next_source = 0
+    tokens = []
     
-    if "tokens" not in state:
-        state["tokens"] = {}
-    if "meta" not in state:
-        state["meta"] = {}
+    def launch():
+        nonlocal next_source
+        name, fetch_func = SOURCES[next_source]
+        next_source += 1
+        running[pool.submit(fetch_func, decided)] = (name, time.time())
+        log(f"🏁 Hedge: launched {name}")
     
-    # Update meta
-    state["meta"]["last_scan"] = datetime.now().isoformat()
-    state["meta"]["scanner"] = "multi_api"
-    state["meta"]["sources_used"] = sources_used
-    state["meta"]["tokens_found"] = len(tokens)
+    launch()
+    try:
+        while running:
+            more = next_source < len(SOURCES)
+            done, _ = wait(running, timeout=hedge_delay if more else None,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                launch()  # Preferred source is slow: hedge with the next one
+                continue
+            
+            failed = False
+            for fut in sorted(done, key=lambda f: order[running[f][0]]):
+                name, started = running.pop(fut)
+                report["latency_ms"][name] = int((time.time() - started) * 1000)
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    log(f"❌ {name} failed: {e}")
+                    result = []
+                if result and not tokens:
+                    tokens = result
+                    report["winner"] = name
+                    report["outcome"][name] = "won"
+                else:
+                    report["outcome"][name] = "lost" if result else "failed"
+                    failed = failed or not result
+            
+            if tokens:
+                break
+            if failed and next_source < len(SOURCES):
+                launch()  # Don't wait out the hedge delay after a failure
+    finally:
+        decided.set()
+        for name, started in running.values():
+            report["latency_ms"][name] = int((time.time() - started) * 1000)
+            report["outcome"][name] = "cancelled"
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    if report["winner"]:
+        log(f"🏆 Hedge winner: {report['winner']} in {report['latency_ms'][report['winner']]}ms")
+    log(f"⏱️ Hedge latencies: {report['latency_ms']}, outcomes: {report['outcome']}")
+    sources_used = [report["winner"]] if report["winner"] else []
+    return dedupe_tokens(tokens), sources_used, report
+
+
+def update_state(tokens: List[Dict], sources_used: List[str], hedge: Optional[Dict] = None):
+    """Update lurker_state.json with new tokens (one batch of path writes)"""
+    meta = {
+        "last_scan": datetime.now().isoformat(),
+        "scanner": "multi_api",
+        "sources_used": sources_used,
+        "tokens_found": len(tokens),
+    }
+    if hedge:
+        meta["hedge"] = hedge
     
-    # Update tokens
+    new_tokens = {}
     for token in tokens:
         addr = token["address"].lower()
-        state["tokens"][addr] = {
+        new_tokens[addr] = {
             "address": token["address"],
             "symbol": token["symbol"],
             "name": token.get("name", ""),
@@ -469,21 +583,27 @@ def update_state(tokens: List[Dict], sources_used: List[str]):
             }
         }
     
-    save_state(state)
+    # Through the state daemon when it runs, else a locked update of the file
+    mutate(STATE_FILE, [{"op": "merge", "path": ["meta"], "value": meta},
+                        {"op": "merge", "path": ["tokens"], "value": new_tokens}])
     log(f"✅ State updated: {len(tokens)} tokens from {sources_used}")
 
 
-def run_scanner():
+def run_scanner(hedged: bool = False):
     """Main scanner entry point"""
     log("=" * 50)
-    log("🚀 Starting Multi-API Scanner")
+    log("🚀 Starting Multi-API Scanner" + (" (hedged)" if hedged else ""))
     
     # Try to fetch from live sources
-    tokens, sources_used = fetch_all_sources()
+    hedge = None
+    if hedged:
+        tokens, sources_used, hedge = fetch_all_sources_hedged()
+    else:
+        tokens, sources_used = fetch_all_sources()
     
     if tokens:
         # Update state with live data
-        update_state(tokens, sources_used)
+        update_state(tokens, sources_used, hedge)
         
         # Update cache
         cache = {
@@ -513,5 +633,5 @@ def run_scanner():
 
 
 if __name__ == "__main__":
-    exit_code = run_scanner()
+    exit_code = run_scanner(hedged="--hedged" in sys.argv)
     exit(exit_code)
@@ -2,55 +2,113 @@
 """
 LURKER On-Chain Scanner — MVP for Base
 Scans Factory events (PoolCreated) and builds CIO feed
+All factories (Aerodrome, Uniswap v3, Clanker) are discovered in one pass: a
+single eth_getLogs filter with every factory address and an OR of their event
+topics, read through log_scanner (adaptive, concurrent block ranges). Each
+event is decoded by its precompiled EventDecoder and normalized to the same
+pool record. Each factory keeps its own checkpoint in scan_state.json.
+
+The shared cursor is a reorg-safe ChainCheckpoint (chain_checkpoint): in head
+mode (default) pools are emitted as soon as they are seen, flagged
+"confirmed": false until CONFIRMATIONS blocks deep, and retracted if their
+block is reorged away; in confirmed mode the scan stops CONFIRMATIONS blocks
+behind the head and every candidate is final.
+
+    python3 scanner_onchain.py [--mode head|confirmed]
+    python3 scanner_onchain.py --stream [--ws-url wss://...]
+
+Streaming mode keeps a WebSocket eth_subscribe("logs") open on the same
+factory filter and turns each PoolCreated into a (provisional) candidate
+within seconds of its block. The polling scan still runs on every
+(re)connect and every RESYNC_INTERVAL seconds: it backfills whatever the
+socket missed with eth_getLogs, advances the checkpoint and confirms or
+retracts streamed pools.
+Token symbol/name for all new pools come from the token metadata cache, with
+one Multicall3 pass for tokens not seen before.
+
+Candidates are emitted straight from chain data (reserves, price, age in
+blocks) without waiting for DexScreener, which usually has not indexed a
+pool in its first minutes. They carry an "enrichment" record and are
+upgraded in place by enrich_deferred(): due candidates are looked up in
+batched /tokens calls, and misses are retried with exponential backoff
+until ENRICH_MAX_ATTEMPTS.
 """
+import argparse
 import json
 import os
 import time
 from datetime import datetime
 from pathlib import Path
 
-# Try to import web3, fallback to mock if not available
-try:
-    from web3 import Web3
-    WEB3_AVAILABLE = True
-except ImportError:
-    WEB3_AVAILABLE = False
-    print("[SCANNER] web3 not available, using mock mode")
-
-# Try to import requests for DexScreener
-try:
-    import requests
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    REQUESTS_AVAILABLE = False
+from chain_checkpoint import MODE_HEAD, MODES, ChainCheckpoint
+from chain_rpc import get_rpc
+from chain_rpc import RpcError
+from dexscreener_client import DexScreenerClient
+from evm_abi import EventDecoder, hex_to_int
+import launch_detector
+from log_scanner import LogScanner
+from pool_state import pool_metrics
+from rate_limiter import PRIORITY_TRACKER
+from safe_state import StateFile
+from token_metadata import checksum, get_cache as get_metadata_cache
+from ws_rpc import WsClosed, WsRpc
 
 # Config
 STATE_FILE = Path(__file__).parent.parent / "state" / "scan_state.json"
 CIO_FILE = Path(__file__).parent.parent / "signals" / "cio_feed.json"
 
-# Aerodrome Factory on Base
-AERODROME_FACTORY = "0x420DD381b31aEf6683db6b902084cB0FFECe40Da"
+# Factories on Base
+AERODROME_FACTORY = "0x420DD381b31aEf6683db6B902084cB0FFECe40Da"
 UNISWAP_V3_FACTORY = "0x33128a8fC17869897dcE68Ed026d694621f6FDfD"
+CLANKER_FACTORY = "0xE85A59c628F7d27878ACeB4bf3b35733630083a9"  # Clanker v4 (Uniswap v4 pools)
 
-# Base RPC endpoints (public)
-BASE_RPCS = [
-    "https://mainnet.base.org",
-    "https://base-rpc.publicnode.com",
-    "https://base.llamarpc.com",
-]
-
-# ABI for PoolCreated event (Solidly/Aerodrome style)
-POOL_CREATED_ABI = [{
-    "anonymous": False,
-    "inputs": [
-        {"indexed": True, "internalType": "address", "name": "token0", "type": "address"},
-        {"indexed": True, "internalType": "address", "name": "token1", "type": "address"},
-        {"indexed": False, "internalType": "bool", "name": "stable", "type": "bool"},
-        {"indexed": False, "internalType": "address", "name": "pool", "type": "address"},
-    ],
-    "name": "PoolCreated",
-    "type": "event",
-}]
+# PoolCreated event (Solidly/Aerodrome style)
+AERODROME_POOL_CREATED = EventDecoder("PoolCreated", [
+    ("address", "token0", True),
+    ("address", "token1", True),
+    ("bool", "stable", True),
+    ("address", "pool", False),
+    ("uint256", "pool_count", False),
+])
+UNISWAP_V3_POOL_CREATED = EventDecoder("PoolCreated", [
+    ("address", "token0", True),
+    ("address", "token1", True),
+    ("uint24", "fee", True),
+    ("int24", "tick_spacing", False),
+    ("address", "pool", False),
+])
+# Clanker deploys the token and its Uniswap v4 pool in one tx; v4 pools have
+# no contract address, the pool is identified by its 32-byte poolId
+CLANKER_TOKEN_CREATED = EventDecoder("TokenCreated", [
+    ("address", "msg_sender", False),
+    ("address", "token", True),
+    ("address", "token_admin", True),
+    ("string", "image", False),
+    ("string", "name", False),
+    ("string", "symbol", False),
+    ("string", "metadata", False),
+    ("string", "context", False),
+    ("int24", "starting_tick", False),
+    ("address", "pool_hook", False),
+    ("bytes32", "pool_id", False),
+    ("address", "paired_token", False),
+    ("address", "locker", False),
+    ("address", "mev_module", False),
+    ("uint256", "extensions_supply", False),
+    ("address[]", "extensions", False),
+])
+
+SCAN_MODE = os.getenv("LURKER_SCAN_MODE", MODE_HEAD)
+WS_URL = os.getenv("BASE_WS_URL", "wss://base-rpc.publicnode.com")
+RESYNC_INTERVAL = 60      # Seconds between checkpointed getLogs passes while streaming
+RECONNECT_DELAY = 1       # Seconds before the first reconnect, doubled up to MAX_RECONNECT_DELAY
+MAX_RECONNECT_DELAY = 30
+ENRICH_BACKOFF = 30       # Seconds before the first DexScreener retry, doubled per miss
+ENRICH_MAX_BACKOFF = 900
+ENRICH_MAX_ATTEMPTS = 10  # ~1.5h of retries, then the candidate stays on-chain only
+ENRICH_POLL = 10          # Seconds between enrichment passes while streaming
+INITIAL_LOOKBACK = 1000   # Blocks scanned on the first run of a factory
+MAX_CATCHUP = 43200       # ~24h of Base blocks; older pools are not fresh anymore
 
 def load_state():
     """Load scan state"""
@@ -74,134 +132,133 @@ def save_state(state):
     with open(STATE_FILE, 'w') as f:
         json.dump(state, f, indent=2)
 
+def _cio_state():
+    return StateFile(CIO_FILE, max_retries=5, retry_delay=0.2)
+
 def load_cio():
     """Load CIO feed"""
-    if CIO_FILE.exists():
-        with open(CIO_FILE) as f:
-            return json.load(f)
-    return {
+    return _cio_state().load(default={
         "schema": "lurker_cio_v1",
         "last_updated": datetime.now().isoformat(),
         "count": 0,
         "candidates": []
-    }
+    })
 
 def save_cio(cio):
-    """Save CIO feed"""
+    """Save CIO feed through StateFile so pool_state's version check sees the write"""
     CIO_FILE.parent.mkdir(parents=True, exist_ok=True)
     cio["last_updated"] = datetime.now().isoformat()
     cio["count"] = len(cio["candidates"])
-    with open(CIO_FILE, 'w') as f:
-        json.dump(cio, f, indent=2)
+    if not _cio_state().save(cio):
+        raise RuntimeError(f"Could not save {CIO_FILE}")
+
+def scan_range(factory, last_block, current_block):
+    """Blocks to scan for a factory: after its checkpoint, capped to MAX_CATCHUP"""
+    if not last_block:
+        return max(0, current_block - INITIAL_LOOKBACK), current_block
+    start = last_block + 1
+    if current_block - start + 1 > MAX_CATCHUP:
+        print(f"[SCANNER] {factory}: {current_block - start + 1} blocks behind, skipping to the last {MAX_CATCHUP}")
+        start = current_block - MAX_CATCHUP + 1
+    return start, current_block
+
+def normalize_aerodrome(event):
+    return {"pool_address": event["pool"], "token0": event["token0"], "token1": event["token1"],
+            "stable": event["stable"]}
+
+def normalize_uniswap_v3(event):
+    return {"pool_address": event["pool"], "token0": event["token0"], "token1": event["token1"],
+            "fee": event["fee"], "tick_spacing": event["tick_spacing"]}
+
+def normalize_clanker(event):
+    return {"pool_address": event["pool_id"], "token0": event["token"], "token1": event["paired_token"],
+            "token0_symbol": event["symbol"], "token0_name": event["name"]}
 
-def get_web3():
-    """Get web3 connection"""
-    if not WEB3_AVAILABLE:
+# name -> (factory address, event decoder, normalizer)
+FACTORIES = {
+    "aerodrome": (AERODROME_FACTORY, AERODROME_POOL_CREATED, normalize_aerodrome),
+    "uniswap_v3": (UNISWAP_V3_FACTORY, UNISWAP_V3_POOL_CREATED, normalize_uniswap_v3),
+    "clanker": (CLANKER_FACTORY, CLANKER_TOKEN_CREATED, normalize_clanker),
+}
+# (factory address, topic0) -> factory name, for dispatching logs
+_ROUTES = {(address.lower(), decoder.topic): name for name, (address, decoder, _) in FACTORIES.items()}
+
+def decode_pool(log):
+    """Normalized pool record for a factory log, or None if no factory emits it"""
+    topics = log.get("topics") or []
+    name = _ROUTES.get((log.get("address", "").lower(), topics[0] if topics else None))
+    if name is None:
         return None
-    for rpc in BASE_RPCS:
-        try:
-            w3 = Web3(Web3.HTTPProvider(rpc))
-            if w3.is_connected():
-                return w3
-        except Exception as e:
-            print(f"[SCANNER] RPC {rpc} failed: {e}")
-    return None
+    _, decoder, normalize = FACTORIES[name]
+    pool = normalize(decoder(log))
+    pool.update({
+        "factory": name,
+        "block_number": hex_to_int(log.get("blockNumber")),
+        "block_hash": log.get("blockHash"),
+        "tx_hash": log.get("transactionHash"),
+        "detected_at": datetime.now().isoformat()
+    })
+    return pool
+
+def discover_pools(log_scanner, from_block, to_block, factories=None, on_progress=None):
+    """New pools of all `factories` in [from_block, to_block] with one eth_getLogs pass.
 
-def scan_aerodrome(w3, from_block, to_block):
-    """Scan Aerodrome factory for PoolCreated events"""
+    Returns (pools, scanned_to); scanned_to < to_block if part of the range failed.
+    """
+    names = list(factories or FACTORIES)
+    logs, scanned_to = log_scanner.get_logs(
+        from_block, to_block,
+        address=[FACTORIES[n][0] for n in names],
+        topics=[sorted({FACTORIES[n][1].topic for n in names})],
+        on_progress=on_progress
+    )
     pools = []
-    try:
-        factory = w3.eth.contract(address=AERODROME_FACTORY, abi=POOL_CREATED_ABI)
-        
-        # Get PoolCreated events
-        event_filter = factory.events.PoolCreated().create_filter(
-            fromBlock=from_block,
-            toBlock=to_block
-        )
-        events = event_filter.get_all_entries()
-        
-        for event in events:
-            args = event.args
-            block = event.blockNumber
-            tx_hash = event.transactionHash.hex()
-            
-            pools.append({
-                "factory": "aerodrome",
-                "pool_address": args.pool,
-                "token0": args.token0,
-                "token1": args.token1,
-                "stable": args.stable,
-                "block_number": block,
-                "tx_hash": tx_hash,
-                "detected_at": datetime.now().isoformat()
-            })
-        
-        print(f"[SCANNER] Aerodrome: {len(pools)} pools from blocks {from_block}-{to_block}")
-        
-    except Exception as e:
-        print(f"[SCANNER] Error scanning Aerodrome: {e}")
-    
-    return pools
+    counts = dict.fromkeys(names, 0)
+    for log in logs:
+        try:
+            pool = decode_pool(log)
+        except (IndexError, ValueError) as e:
+            print(f"[SCANNER] Skipping malformed factory log {log.get('transactionHash')}: {e}")
+            continue
+        if pool and pool["factory"] in counts:
+            pools.append(pool)
+            counts[pool["factory"]] += 1
 
-def enrich_pool(w3, pool):
-    """Enrich pool data with token info"""
-    try:
-        # Simple ERC20 ABI for symbol/name
-        erc20_abi = [
-            {"inputs": [], "name": "symbol", "outputs": [{"type": "string"}], "stateMutability": "view", "type": "function"},
-            {"inputs": [], "name": "name", "outputs": [{"type": "string"}], "stateMutability": "view", "type": "function"},
-            {"inputs": [], "name": "decimals", "outputs": [{"type": "uint8"}], "stateMutability": "view", "type": "function"},
-        ]
-        
-        # Get token0 info
-        t0 = w3.eth.contract(address=pool["token0"], abi=erc20_abi)
-        pool["token0_symbol"] = t0.functions.symbol().call()
-        pool["token0_name"] = t0.functions.name().call()
-        
-        # Get token1 info
-        t1 = w3.eth.contract(address=pool["token1"], abi=erc20_abi)
-        pool["token1_symbol"] = t1.functions.symbol().call()
-        pool["token1_name"] = t1.functions.name().call()
-        
-    except Exception as e:
-        print(f"[SCANNER] Error enriching pool: {e}")
-        pool["token0_symbol"] = "UNKNOWN"
-        pool["token1_symbol"] = "UNKNOWN"
-    
-    return pool
+    summary = ", ".join(f"{n} {c}" for n, c in counts.items())
+    print(f"[SCANNER] {len(pools)} pools from blocks {from_block}-{scanned_to} ({summary})")
+    return pools, scanned_to
+
+def enrich_pools(pools, rpc=None):
+    """Add token symbol/name to every pool (metadata cache, then one Multicall3 pass)"""
+    tokens = [p[k] for p in pools for k in ("token0", "token1")]
+    metadata = get_metadata_cache().resolve(tokens, rpc) if tokens else {}
+    for pool in pools:
+        for key in ("token0", "token1"):
+            meta = metadata.get(checksum(pool[key])) or {}
+            pool[f"{key}_symbol"] = meta.get("symbol") or pool.get(f"{key}_symbol") or "UNKNOWN"
+            pool[f"{key}_name"] = meta.get("name") or pool.get(f"{key}_name") or ""
+            pool[f"{key}_decimals"] = meta.get("decimals")
+    return pools
 
 def is_quote_whitelist(symbol):
     """Check if symbol is in quote whitelist"""
     whitelist = {"WETH", "ETH", "USDC", "USDBC", "cbBTC", "CBETH"}
     return symbol.upper() in whitelist
 
-def enrich_from_dexscreener(pool_address):
-    """Fetch pool data from DexScreener"""
-    if not REQUESTS_AVAILABLE:
-        return None
-    
-    try:
-        url = f"https://api.dexscreener.com/latest/dex/pairs/base/{pool_address}"
-        resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
-            pair = data.get("pair") or (data.get("pairs", [])[0] if data.get("pairs") else None)
-            if pair:
-                return {
-                    "price_usd": float(pair.get("priceUsd", 0) or 0),
-                    "liq_usd": float(pair.get("liquidity", {}).get("usd", 0) or 0),
-                    "vol_24h_usd": float(pair.get("volume", {}).get("h24", 0) or 0),
-                    "vol_1h_usd": float(pair.get("volume", {}).get("h1", 0) or 0),
-                    "txns_24h": int(pair.get("txns", {}).get("h24", {}).get("buys", 0) or 0) + int(pair.get("txns", {}).get("h24", {}).get("sells", 0) or 0),
-                    "txns_1h": int(pair.get("txns", {}).get("h1", {}).get("buys", 0) or 0) + int(pair.get("txns", {}).get("h1", {}).get("sells", 0) or 0),
-                    "fdv": float(pair.get("fdv", 0) or 0),
-                    "mcap": float(pair.get("marketCap", 0) or 0),
-                    "dex_id": pair.get("dexId", "unknown"),
-                    "pair_url": pair.get("url", "")
-                }
-    except Exception as e:
-        print(f"[SCANNER] DexScreener error for {pool_address}: {e}")
-    return None
+def pair_metrics(pair):
+    """CIO metrics from a DexScreener pair"""
+    return {
+        "price_usd": float(pair.get("priceUsd", 0) or 0),
+        "liq_usd": float(pair.get("liquidity", {}).get("usd", 0) or 0),
+        "vol_24h_usd": float(pair.get("volume", {}).get("h24", 0) or 0),
+        "vol_1h_usd": float(pair.get("volume", {}).get("h1", 0) or 0),
+        "txns_24h": int(pair.get("txns", {}).get("h24", {}).get("buys", 0) or 0) + int(pair.get("txns", {}).get("h24", {}).get("sells", 0) or 0),
+        "txns_1h": int(pair.get("txns", {}).get("h1", {}).get("buys", 0) or 0) + int(pair.get("txns", {}).get("h1", {}).get("sells", 0) or 0),
+        "fdv": float(pair.get("fdv", 0) or 0),
+        "mcap": float(pair.get("marketCap", 0) or 0),
+        "dex_id": pair.get("dexId", "unknown"),
+        "pair_url": pair.get("url", "")
+    }
 
 def calculate_cio_score(metrics, age_hours):
     """Calculate CIO score based on freshness, liq, vol, txns"""
@@ -226,8 +283,12 @@ def calculate_cio_score(metrics, age_hours):
     score = 100 * (0.45 * freshness + 0.25 * liq_score + 0.20 * vol_score + 0.10 * tx_score)
     return round(score, 1)
 
-def pool_to_candidate(pool, block_timestamp=None):
-    """Convert pool to CIO candidate format with enrichment"""
+def pool_to_candidate(pool, block_timestamp=None, onchain=None, head=None):
+    """Convert pool to a provisional CIO candidate from chain data.
+
+    `onchain` (from pool_state.pool_metrics) supplies price/liquidity;
+    DexScreener metrics are filled in later by enrich_deferred().
+    """
     # Determine base vs quote
     if is_quote_whitelist(pool["token1_symbol"]):
         base_token = {"symbol": pool["token0_symbol"], "address": pool["token0"], "name": pool.get("token0_name", "")}
@@ -244,108 +305,249 @@ def pool_to_candidate(pool, block_timestamp=None):
     
     age_hours = 0
     
-    # Enrich from DexScreener
-    enriched = enrich_from_dexscreener(pool["pool_address"])
-    
+    onchain = onchain or {}
     metrics = {
-        "liq_usd": enriched.get("liq_usd", 0) if enriched else 0,
-        "vol_24h_usd": enriched.get("vol_24h_usd", 0) if enriched else 0,
-        "vol_1h_usd": enriched.get("vol_1h_usd", 0) if enriched else 0,
-        "txns_24h": enriched.get("txns_24h", 0) if enriched else 0,
-        "txns_1h": enriched.get("txns_1h", 0) if enriched else 0,
-        "price_usd": enriched.get("price_usd", 0) if enriched else 0,
-        "fdv": enriched.get("fdv", 0) if enriched else 0,
-        "mcap": enriched.get("mcap", 0) if enriched else 0
+        "liq_usd": onchain.get("liq_usd", 0),
+        "vol_24h_usd": 0,
+        "vol_1h_usd": 0,
+        "txns_24h": 0,
+        "txns_1h": 0,
+        "price_usd": onchain.get("price_usd", 0),
+        "fdv": 0,
+        "mcap": 0
     }
     
     # Calculate score
     cio_score = calculate_cio_score(metrics, age_hours)
     
-    # Risk flags
-    risk_tags = []
-    if metrics["liq_usd"] < 10000:
-        risk_tags.append("low_liquidity")
-    if metrics["vol_24h_usd"] < 5000:
-        risk_tags.append("low_volume")
-    
     return {
         "kind": "CIO_CANDIDATE",
         "created_at": pool["detected_at"],
         "age_hours": age_hours,
         "chain": "base",
-        "dex": enriched.get("dex_id", pool["factory"]) if enriched else pool["factory"],
+        "dex": pool["factory"],
         "pool_address": pool["pool_address"],
         "token": base_token,
         "quote_token": quote_token,
         "block_number": pool["block_number"],
+        "age_blocks": max(0, head - pool["block_number"]) if head else 0,
         "tx_hash": pool["tx_hash"],
         "metrics": metrics,
         "scores": {
             "cio_score": cio_score,
             "freshness": round(1.0, 2)
         },
-        "risk_tags": risk_tags,
+        "risk_tags": metric_risk_tags(metrics),
         "status": "observing",
         "next_check": datetime.now().isoformat(),
-        "enriched": enriched is not None
+        "enriched": False,
+        "enrichment": {"status": "pending", "attempts": 0, "next_ts": time.time()}
     }
 
-def scan():
+def metric_risk_tags(metrics):
+    """Risk flags derived from metrics"""
+    risk_tags = []
+    if metrics["liq_usd"] < 10000:
+        risk_tags.append("low_liquidity")
+    if metrics["vol_24h_usd"] < 5000:
+        risk_tags.append("low_volume")
+    return risk_tags
+
+def upgrade_candidate(candidate, pair):
+    """Fill a provisional candidate in place from its DexScreener pair"""
+    enriched = pair_metrics(pair)
+    metrics = candidate.setdefault("metrics", {})
+    for key in ("liq_usd", "price_usd"):
+        # On-chain values stay when DexScreener has none yet
+        metrics[key] = enriched[key] or metrics.get(key, 0)
+    for key in ("vol_24h_usd", "vol_1h_usd", "txns_24h", "txns_1h", "fdv", "mcap"):
+        metrics[key] = enriched[key]
+    candidate["dex"] = enriched["dex_id"]
+    candidate["pair_url"] = enriched["pair_url"]
+    created = datetime.fromisoformat(candidate["created_at"])
+    candidate["age_hours"] = round(max(0.0, (datetime.now() - created).total_seconds() / 3600), 2)
+    candidate.setdefault("scores", {})["cio_score"] = calculate_cio_score(metrics, candidate["age_hours"])
+    stale = {"low_liquidity", "low_volume"}
+    candidate["risk_tags"] = metric_risk_tags(metrics) + [t for t in candidate.get("risk_tags", []) if t not in stale]
+    candidate["enriched"] = True
+    candidate["enrichment"] = dict(candidate.get("enrichment") or {}, status="done",
+                                   enriched_at=datetime.now().isoformat())
+
+def enrich_deferred(cio, client=None, head=None, now=None):
+    """Retry DexScreener for provisional candidates that are due.
+
+    One batched /tokens lookup covers all due candidates; a candidate is
+    upgraded when its own pool shows up, otherwise its next attempt is pushed
+    back exponentially. Also refreshes age_blocks when `head` is given.
+    Returns the number of candidates upgraded, None when none was due.
+    """
+    now = now or time.time()
+    if head:
+        for c in cio["candidates"]:
+            if c.get("block_number"):
+                c["age_blocks"] = max(0, head - c["block_number"])
+    due = [c for c in cio["candidates"]
+           if (c.get("enrichment") or {}).get("status") == "pending" and c["enrichment"]["next_ts"] <= now]
+    if not due:
+        return None
+    client = client or DexScreenerClient(priority=PRIORITY_TRACKER)
+    client.begin_scan()
+    pairs = client.fetch_pairs_by_token([c["token"]["address"] for c in due])
+    upgraded = 0
+    for c in due:
+        pool = c["pool_address"].lower()
+        pair = next((p for p in pairs.get(c["token"]["address"].lower(), [])
+                     if (p.get("pairAddress") or "").lower() == pool), None)
+        if pair:
+            upgrade_candidate(c, pair)
+            upgraded += 1
+            continue
+        state = c["enrichment"]
+        state["attempts"] += 1
+        if state["attempts"] >= ENRICH_MAX_ATTEMPTS:
+            state["status"] = "gave_up"
+        else:
+            state["next_ts"] = now + min(ENRICH_BACKOFF * 2 ** (state["attempts"] - 1), ENRICH_MAX_BACKOFF)
+    print(f"[SCANNER] DexScreener enrichment: {upgraded}/{len(due)} candidates upgraded "
+          f"({client.requests_made} requests)")
+    return upgraded
+
+def enrich_feed(head=None, client=None):
+    """enrich_deferred() on the saved CIO feed"""
+    cio = load_cio()
+    upgraded = enrich_deferred(cio, client, head)
+    if upgraded is not None:
+        save_cio(cio)
+    return upgraded
+
+
+def add_candidates(cio, pools, rpc, head, confirmed=()):
+    """Enrich pools not in the feed yet and insert them as CIO candidates.
+
+    Returns the number of candidates added; `confirmed` holds the lowercase
+    addresses of pools whose block is final.
+    """
+    existing_pools = {c["pool_address"].lower() for c in cio["candidates"]}
+    new_count = 0
+    new_pools = [p for p in pools if p["pool_address"].lower() not in existing_pools]
+    
+    # Enrich with token info (Clanker events carry the new token's symbol/name)
+    get_metadata_cache().put_many(
+        [{"address": p["token0"], "symbol": p["token0_symbol"], "name": p["token0_name"]}
+         for p in new_pools if p["factory"] == "clanker"], "clanker")
+    enrich_pools(new_pools, rpc)
+    # Reserves / price of all new pools in one Multicall3 batch
+    onchain = pool_metrics([(p["pool_address"], p["token0"], p["token1"]) for p in new_pools], rpc)
+    
+    launches = []
+    for pool in new_pools:
+        # Convert to candidate
+        candidate = pool_to_candidate(pool, onchain=onchain.get(pool["pool_address"].lower()), head=head)
+        if candidate:
+            candidate["confirmed"] = pool["pool_address"].lower() in confirmed
+            cio["candidates"].insert(0, candidate)  # Newest first
+            new_count += 1
+            launches.append(dict(pool, base_token=candidate["token"]["address"]))
+            print(f"[SCANNER] New candidate: {candidate['token']['symbol']} / {candidate['quote_token']['symbol']}")
+    
+    # Bundle / sniper checks once each launch window (first blocks) is complete
+    try:
+        launch_risk = launch_detector.process(launches, rpc, head)
+    except Exception as e:
+        print(f"[SCANNER] Launch analysis failed: {e}")
+        launch_risk = {}
+    for c in cio["candidates"]:
+        risk = launch_risk.get(c["pool_address"].lower())
+        if risk:
+            c["risk"] = risk
+            c["risk_tags"] = list(dict.fromkeys(c.get("risk_tags", []) + risk["factors"]))
+    return new_count
+
+def load_checkpoint(state, mode):
+    """Shared reorg-safe cursor; older states only have per-factory blocks"""
+    if "checkpoint" not in state:
+        blocks = [f.get("last_block", 0) for f in state.get("factories", {}).values()]
+        return ChainCheckpoint({"last_block": min(blocks) if blocks and min(blocks) else None}, mode=mode)
+    return ChainCheckpoint(state["checkpoint"], mode=mode)
+
+def scan(mode=SCAN_MODE):
     """Main scan function"""
     print("[SCANNER] LURKER On-Chain Scanner MVP")
     print("=" * 50)
     
-    w3 = get_web3()
-    if not w3:
-        print("[SCANNER] ERROR: No RPC connection available")
-        print("[SCANNER] Please install web3: pip install web3")
+    rpc = get_rpc()
+    try:
+        current_block = rpc.block_number()
+    except Exception as e:
+        print(f"[SCANNER] ERROR: No RPC connection available: {e}")
         return
     
     # Load state
     state = load_state()
-    current_block = w3.eth.block_number
-    last_block = state.get("last_scanned_block", current_block - 1000)
+    factories = state.setdefault("factories", {})
+    checkpoint = load_checkpoint(state, mode)
+    log_scanner = LogScanner(rpc)
+    cio = load_cio()
     
-    # Don't scan more than 2000 blocks at once (rate limit)
-    scan_to = min(current_block, last_block + 2000)
+    print(f"[SCANNER] Current block: {current_block} ({mode} mode)")
     
-    print(f"[SCANNER] Current block: {current_block}")
-    print(f"[SCANNER] Scanning from {last_block} to {scan_to}")
+    # Rewind past reorgs: the reorged tail is rescanned, its provisional pools retracted
+    retracted = set(checkpoint.check_reorg(rpc))
+    if retracted:
+        cio["candidates"] = [c for c in cio["candidates"] if c["pool_address"].lower() not in retracted]
+        print(f"[SCANNER] Retracted {len(retracted)} provisional pools from reorged blocks")
+    for f in factories.values():
+        if checkpoint.scanned is not None and f.get("last_block", 0) > checkpoint.scanned:
+            f["last_block"] = checkpoint.scanned
     
-    # Scan factories
-    all_pools = []
+    # Scan all factories in one pass, starting from the least advanced checkpoint
+    to_block = checkpoint.target(current_block)
+    ranges = {}
+    for name in FACTORIES:
+        factory_state = factories.setdefault(name, {"last_block": 0})
+        ranges[name] = scan_range(name, factory_state.get("last_block", 0), to_block)
+    from_block = min(start for start, _ in ranges.values())
+    if from_block > to_block:
+        # Nothing new in this mode, but pending pools may still get confirmed
+        print(f"[SCANNER] Up to date at block {to_block}")
+        pools, scanned_to = [], to_block
+    else:
+        print(f"[SCANNER] Scanning {', '.join(FACTORIES)} from {from_block} to {to_block}")
+        pools, scanned_to = discover_pools(log_scanner, from_block, to_block)
+
+    # Drop logs a factory had already covered before this run
+    pools = [p for p in pools if p["block_number"] >= ranges[p["factory"]][0]]
+    confirmed, provisional = checkpoint.advance(
+        rpc, scanned_to, current_block,
+        items=[(p["block_number"], p["pool_address"].lower()) for p in pools],
+        seen_hashes={p["block_number"]: p["block_hash"] for p in pools if p.get("block_hash")})
+    confirmed = set(confirmed)
+    accepted = confirmed | set(provisional)
+    all_pools = [p for p in pools if p["pool_address"].lower() in accepted]
+    for name, (start, _) in ranges.items():
+        if checkpoint.scanned is not None and checkpoint.scanned >= start:
+            factories[name]["last_block"] = checkpoint.scanned
     
-    # Aerodrome
-    aerodrome_pools = scan_aerodrome(w3, last_block, scan_to)
-    all_pools.extend(aerodrome_pools)
+    print(f"[SCANNER] Total pools found: {len(all_pools)} ({len(provisional)} provisional)")
     
-    print(f"[SCANNER] Total pools found: {len(all_pools)}")
+    # Promote provisional candidates whose block is now deep enough
+    for c in cio["candidates"]:
+        if c["pool_address"].lower() in confirmed:
+            c["confirmed"] = True
     
-    # Enrich and convert to CIO
-    cio = load_cio()
-    existing_pools = {c["pool_address"].lower() for c in cio["candidates"]}
-    
-    new_count = 0
-    for pool in all_pools:
-        # Skip if already in CIO
-        if pool["pool_address"].lower() in existing_pools:
-            continue
-        
-        # Enrich with token info
-        pool = enrich_pool(w3, pool)
-        
-        # Convert to candidate
-        candidate = pool_to_candidate(pool)
-        if candidate:
-            cio["candidates"].insert(0, candidate)  # Newest first
-            new_count += 1
-            print(f"[SCANNER] New candidate: {candidate['token']['symbol']} / {candidate['quote_token']['symbol']}")
+    new_count = add_candidates(cio, all_pools, rpc, current_block, confirmed)
+    # Retry DexScreener for candidates it had not indexed yet
+    try:
+        enrich_deferred(cio, head=current_block)
+    except Exception as e:
+        print(f"[SCANNER] Deferred enrichment failed: {e}")
     
     # Trim to max 100 candidates
     cio["candidates"] = cio["candidates"][:100]
     
     # Save
-    state["last_scanned_block"] = scan_to
+    state["checkpoint"] = checkpoint.to_dict()
+    state["last_scanned_block"] = checkpoint.confirmed
     state["last_scan_time"] = datetime.now().isoformat()
     state["stats"]["total_pools_detected"] += len(all_pools)
     
@@ -356,5 +558,97 @@ def scan():
     print(f"[SCANNER] Total CIO candidates: {len(cio['candidates'])}")
     print("[SCANNER] Done")
 
+def factory_filter(factories=None):
+    """eth_getLogs / eth_subscribe filter matching every factory event"""
+    names = list(factories or FACTORIES)
+    return {"address": [FACTORIES[n][0] for n in names],
+            "topics": [sorted({FACTORIES[n][1].topic for n in names})]}
+
+def handle_stream_logs(logs, rpc):
+    """Add streamed factory logs to the CIO feed; removed (reorged) logs retract their pool"""
+    pools, removed = [], set()
+    for log in logs:
+        try:
+            pool = decode_pool(log)
+        except (IndexError, ValueError) as e:
+            print(f"[STREAM] Skipping malformed factory log {log.get('transactionHash')}: {e}")
+            continue
+        if pool is None:
+            continue
+        if log.get("removed"):
+            removed.add(pool["pool_address"].lower())
+        else:
+            pools.append(pool)
+    pools = [p for p in pools if p["pool_address"].lower() not in removed]
+    cio = load_cio()
+    before = len(cio["candidates"])
+    cio["candidates"] = [c for c in cio["candidates"]
+                         if c["pool_address"].lower() not in removed or c.get("confirmed")]
+    head = max((p["block_number"] for p in pools), default=0)
+    added = add_candidates(cio, pools, rpc, head) if pools else 0
+    if added or len(cio["candidates"]) < before:
+        cio["candidates"] = cio["candidates"][:100]
+        save_cio(cio)
+    for pool in pools:
+        print(f"[STREAM] {pool['factory']} pool {pool['pool_address']} at block {pool['block_number']}")
+    if removed:
+        print(f"[STREAM] Retracted {len(removed)} pools from reorged blocks")
+    return added
+
+def stream(ws_url=WS_URL):
+    """Push new pools into the CIO feed as their logs arrive over WebSocket"""
+    rpc = get_rpc()
+    delay = RECONNECT_DELAY
+    while True:
+        ws = WsRpc(ws_url)
+        try:
+            ws.connect()
+            sub_id = ws.subscribe("logs", factory_filter())
+            print(f"[STREAM] Subscribed to {len(FACTORIES)} factories on {ws_url}")
+            delay = RECONNECT_DELAY
+            # Backfill since the checkpoint; logs arriving meanwhile wait in the socket
+            scan(MODE_HEAD)
+            last_sync = last_enrich = time.time()
+            while True:
+                logs = []
+                wait = min(RESYNC_INTERVAL - (time.time() - last_sync), ENRICH_POLL - (time.time() - last_enrich))
+                note = ws.next_notification(timeout=max(0.1, wait))
+                while note:
+                    if note[0] == sub_id:
+                        logs.append(note[1])
+                    note = ws.next_notification(timeout=0)
+                if logs:
+                    handle_stream_logs(logs, rpc)
+                if time.time() - last_sync >= RESYNC_INTERVAL:
+                    scan(MODE_HEAD)
+                    last_sync = last_enrich = time.time()
+                elif time.time() - last_enrich >= ENRICH_POLL:
+                    try:
+                        enrich_feed()
+                    except Exception as e:
+                        print(f"[STREAM] Deferred enrichment failed: {e}")
+                    last_enrich = time.time()
+        except (WsClosed, RpcError, OSError) as e:
+            print(f"[STREAM] Connection lost ({e}), reconnecting in {delay}s and backfilling with eth_getLogs")
+        except Exception as e:
+            # A bad log, feed write or backfill must not end the stream
+            print(f"[STREAM] Stream failed ({type(e).__name__}: {e}), reconnecting in {delay}s "
+                  f"and backfilling with eth_getLogs")
+        finally:
+            ws.close()
+        time.sleep(delay)
+        delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
 if __name__ == "__main__":
-    scan()
+    parser = argparse.ArgumentParser(description="LURKER on-chain factory scanner")
+    parser.add_argument("--mode", choices=MODES, default=SCAN_MODE,
+                        help="head: emit pools at the chain head (provisional until confirmed); "
+                             "confirmed: only scan confirmed blocks")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stay connected and stream new pools over WebSocket (head mode)")
+    parser.add_argument("--ws-url", default=WS_URL, help="WebSocket JSON-RPC endpoint for --stream")
+    args = parser.parse_args()
+    if args.stream:
+        stream(args.ws_url)
+    else:
+        scan(args.mode)
@@ -6,10 +6,12 @@ Remplace DexScreener qui ne retourne plus de tokens frais
 import json
 import sys
 import time
-import requests
 from datetime import datetime, timezone
 from pathlib import Path
 
+from http_cache import cached_get
+from rate_limiter import limited_get
+
 # CONFIG
 BASE_URL = "https://api.geckoterminal.com/api/v2/networks/base"
 CIO_FILE = Path(__file__).parent.parent / "signals" / "cio_feed.json"
@@ -33,7 +35,7 @@ def validate_token_dexscreener(address):
     Returns: (is_valid, reason, dex_data)
     """
     try:
-        resp = requests.get(f"{DEXSCREENER_API}/{address}", timeout=10)
+        resp = cached_get(f"{DEXSCREENER_API}/{address}", timeout=10)
         if resp.status_code != 200:
             return True, None, None  # Allow if API fails
         
@@ -89,13 +91,13 @@ def get_new_pools():
     pools = []
     try:
         # New pools
-        resp = requests.get(f"{BASE_URL}/new_pools?page=1", timeout=TIMEOUT)
+        resp = limited_get(f"{BASE_URL}/new_pools?page=1", timeout=TIMEOUT)
         if resp.status_code == 200:
             data = resp.json()
             pools.extend(data.get('data', []))
         
         # Trending pools
-        resp = requests.get(f"{BASE_URL}/trending_pools", timeout=TIMEOUT)
+        resp = limited_get(f"{BASE_URL}/trending_pools", timeout=TIMEOUT)
         if resp.status_code == 200:
             data = resp.json()
             pools.extend(data.get('data', []))
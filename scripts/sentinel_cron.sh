@@ -15,6 +15,7 @@ if [ $? -ne 0 ]; then
     python3 scripts/scanner_cio_ultra.py >> /data/.openclaw/logs/sentinel.log 2>&1
     
     # Commit if changes
+    python3 scripts/token_registry.py export >> /data/.openclaw/logs/sentinel.log 2>&1
     git add signals/cio_feed.json state/token_registry.json 2>/dev/null
     git diff --cached --quiet || git commit -m "fix: auto-recovery from stale feed [$(date +%H:%M)]" 2>/dev/null
     git push origin main 2>/dev/null
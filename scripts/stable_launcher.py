@@ -15,6 +15,16 @@ SCRIPTS_DIR = Path("/data/.openclaw/workspace/lurker-project/scripts")
 LOG_DIR = Path("/data/.openclaw/workspace/lurker-project/logs")
 
 SCRIPTS = [
+    {
+        "name": "price_refresher",
+        "script": "price_refresher.py",  # one cycle per (re)start
+        "interval": 60
+    },
+    {
+        "name": "pool_state",
+        "script": "pool_state.py",  # one on-chain price pass per (re)start
+        "interval": 30
+    },
     {
         "name": "token_importer",
         "script": "token_importer.py",
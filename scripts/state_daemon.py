@@ -0,0 +1,668 @@
+#!/usr/bin/env python3
+"""
+LURKER state daemon — one process owns the JSON state files
+Every job used to parse and re-serialize state/lurker_state.json in full for
+each change. The daemon keeps the documents of state/ in memory and applies
+batched mutations sent over a Unix socket (state/state_daemon.sock), one JSON
+request per line:
+
+    {"id": 1, "ops": [{"op": "get", "doc": "lurker_state", "path": ["meta"]},
+                      {"op": "set", "doc": "lurker_state", "path": ["tokens", "0xab.."], "value": {...}}]}
+    -> {"id": 1, "ok": true, "results": [{...}, null]}
+
+A document is a file state/<doc>.json. Ops: get (with "default"), keys,
+version, set, merge (dict update), delete, append, check (abort the batch
+unless the document is still at "version"). A batch is applied in full or
+not at all. Each applied batch is appended to state/<doc>.journal as
+idempotent set / del records; dirty documents are written back (keeping
+the file's indentation) every SNAPSHOT_INTERVAL or once the journal holds
+JOURNAL_MAX records, after which the journal is truncated. On start,
+journals left by a crash are replayed and snapshotted.
+
+safe_state.StateFile routes to the daemon while it runs, so scripts using
+StateFile keep working unchanged. A file changed on disk by another writer
+is noticed on the next request or snapshot: the daemon warns, reloads it and
+replays its unsnapshotted journal on top, so neither side's changes are
+silently dropped (on the same key the daemon's write wins).
+
+    python3 state_daemon.py serve
+    python3 state_daemon.py stats
+    python3 state_daemon.py get lurker_state meta.stats
+    python3 state_daemon.py snapshot
+"""
+import fcntl
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+
+from safe_state import StateCorruptError, StateFile
+
+STATE_DIR = Path(__file__).parent.parent / "state"
+SOCKET_FILE = Path(os.getenv("LURKER_STATE_SOCKET", STATE_DIR / "state_daemon.sock"))
+LOCK_FILE = STATE_DIR / "state_daemon.lock"
+
+SNAPSHOT_INTERVAL = 30    # Seconds between snapshots of dirty documents
+JOURNAL_MAX = 10000       # Journal records that force an early snapshot
+TIMEOUT = 30              # Client socket timeout
+DOWN_BACKOFF = 10         # Seconds clients use the files directly after the daemon failed them
+
+MISSING = object()
+
+
+class StateDaemonError(Exception):
+    """Request rejected by the daemon (bad op, unreadable document)"""
+
+
+class StateConflict(StateDaemonError):
+    """A "check" op failed: the document changed since it was read"""
+
+
+class OpError(ValueError):
+    pass
+
+
+# --- ops on an in-memory tree (shared by the daemon and the file fallback) ---
+
+def _child(node, key):
+    try:
+        return node[key]
+    except (KeyError, IndexError, TypeError):
+        return MISSING
+
+
+def get_path(node, path):
+    for key in path:
+        node = _child(node, key)
+        if node is MISSING:
+            break
+    return node
+
+
+def _put(parent, key, value, undo):
+    if isinstance(parent, dict):
+        old = parent.get(key, MISSING)
+        parent[key] = value
+        undo.append(lambda: parent.pop(key) if old is MISSING else parent.__setitem__(key, old))
+    elif isinstance(parent, list) and isinstance(key, int) and 0 <= key <= len(parent):
+        if key == len(parent):
+            parent.append(value)
+            undo.append(parent.pop)
+        else:
+            old = parent[key]
+            parent[key] = value
+            undo.append(lambda: parent.__setitem__(key, old))
+    else:
+        raise OpError(f"cannot set {key!r} on {type(parent).__name__}")
+
+
+def set_path(box, path, value, undo):
+    """Set box[path...] = value, creating missing dicts on the way"""
+    parent = box
+    for key in path[:-1]:
+        child = _child(parent, key)
+        if not isinstance(child, (dict, list)):
+            child = {}
+            _put(parent, key, child, undo)
+        parent = child
+    _put(parent, path[-1], value, undo)
+
+
+def delete_path(box, path, undo):
+    """Remove box[path...]; False when it did not exist"""
+    parent = get_path(box, path[:-1])
+    key = path[-1]
+    if isinstance(parent, dict) and key in parent:
+        old = parent.pop(key)
+        undo.append(lambda: parent.__setitem__(key, old))
+        return True
+    if isinstance(parent, list) and isinstance(key, int) and 0 <= key < len(parent):
+        old = parent.pop(key)
+        undo.append(lambda: parent.insert(key, old))
+        return True
+    return False
+
+
+def apply_ops(box, doc_path, ops, undo, journal):
+    """Apply ops to box (root = box[doc_path[0]]); returns results.
+
+    journal receives (op, path, value) records that replay idempotently.
+    """
+    results = []
+    for op in ops:
+        kind = op.get("op")
+        path = list(doc_path) + list(op.get("path") or [])
+        if kind == "get":
+            value = get_path(box, path)
+            results.append(op.get("default") if value is MISSING else value)
+        elif kind == "keys":
+            value = get_path(box, path)
+            results.append(list(value) if isinstance(value, dict) else [])
+        elif kind == "set":
+            set_path(box, path, op.get("value"), undo)
+            journal.append(("set", path, op.get("value")))
+            results.append(None)
+        elif kind == "merge":
+            fields = op.get("value") or {}
+            if not isinstance(fields, dict):
+                raise OpError("merge needs a dict value")
+            for key, value in fields.items():
+                set_path(box, path + [key], value, undo)
+                journal.append(("set", path + [key], value))
+            results.append(None)
+        elif kind == "append":
+            target = get_path(box, path)
+            if target is MISSING or target is None:
+                set_path(box, path, [], undo)
+                target = get_path(box, path)
+            if not isinstance(target, list):
+                raise OpError(f"append to {type(target).__name__}")
+            index = len(target)
+            set_path(box, path + [index], op.get("value"), undo)
+            journal.append(("set", path + [index], op.get("value")))
+            results.append(index)
+        elif kind == "delete":
+            if not path[len(doc_path):]:
+                raise OpError("delete needs a path")
+            parent = get_path(box, path[:-1])
+            existed = delete_path(box, path, undo)
+            if existed and isinstance(parent, list):
+                journal.append(("set", path[:-1], parent))  # Index deletes do not replay idempotently
+            elif existed:
+                journal.append(("del", path, None))
+            results.append(existed)
+        else:
+            raise OpError(f"unknown op {kind!r}")
+    return results
+
+
+def diff_ops(old, new, path=()):
+    """set / delete / append ops turning `old` into `new`"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "set", "path": list(path) + [key], "value": value})
+            elif old[key] != value:
+                ops += diff_ops(old[key], value, tuple(path) + (key,))
+        ops += [{"op": "delete", "path": list(path) + [key]} for key in old if key not in new]
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(new) > len(old) and new[:len(old)] == old:
+        return [{"op": "append", "path": list(path), "value": v} for v in new[len(old):]]
+    if not path:
+        return [{"op": "set", "path": [], "value": new}]
+    return [{"op": "set", "path": list(path), "value": new}] if old != new else []
+
+
+# --- daemon ---
+
+class StateStore:
+    """In-memory documents of a state directory, journaled and snapshotted"""
+
+    def __init__(self, state_dir=STATE_DIR):
+        self.state_dir = Path(state_dir)
+        self.docs = {}          # {doc: value}, None = no file yet
+        self.versions = {}
+        self.dirty = set()
+        self.journals = {}      # {doc: open journal file}
+        self.journal_len = {}
+        self.indents = {}       # {doc: indent of the file on disk}
+        self.disk = {}          # {doc: stat signature of the file as last read / written}
+        self.seq = time.time_ns()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.started = time.time()
+
+    def _path(self, doc):
+        if not isinstance(doc, str) or not doc or "/" in doc or doc.startswith("."):
+            raise OpError(f"bad document name {doc!r}")
+        return self.state_dir / f"{doc}.json"
+
+    def _file(self, doc):
+        return StateFile(self._path(doc), use_daemon=False, indent=self.indents.get(doc, 2))
+
+    def _journal_path(self, doc):
+        return self.state_dir / f"{doc}.journal"
+
+    def _signature(self, doc):
+        try:
+            st = os.stat(self._path(doc))
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    @staticmethod
+    def _detect_indent(path):
+        """Indent of an existing JSON file (None = compact)"""
+        with open(path) as f:
+            head = f.read(256)
+        if not head.startswith(("{\n", "[\n")):
+            return None
+        second = head.split("\n", 2)[1]
+        return (len(second) - len(second.lstrip(" "))) or None
+
+    def _read_disk(self, doc):
+        """(value, indent) of the file, (None, 2) when it does not exist"""
+        state_file = self._file(doc)
+        if not state_file.filepath.exists():
+            return None, 2
+        try:
+            value = state_file.snapshot()[0]
+            return value, self._detect_indent(state_file.filepath)
+        except StateCorruptError as e:
+            raise StateDaemonError(f"corrupt: {e}") from e
+
+    def _load(self, doc, value=MISSING):
+        """Read a document (or take `value`) and replay its journal"""
+        if value is MISSING:
+            value, indent = self._read_disk(doc)
+            self.indents[doc] = indent
+        box = {doc: value}
+        replayed = self._replay(doc, box)
+        self.docs[doc] = box[doc]
+        self.disk[doc] = self._signature(doc)
+        self.versions[doc] = self.seq = self.seq + 1
+        self.journal_len.setdefault(doc, 0)
+        return replayed
+
+    def _ensure(self, doc, whole_set=False):
+        """Load a document before a batch touches it; reload it if changed on disk"""
+        if doc in self.docs:
+            if self._signature(doc) != self.disk.get(doc):
+                self._rebase(doc)
+            return
+        try:
+            replayed = self._load(doc)
+        except StateDaemonError:
+            if not whole_set:
+                raise
+            # Replacing an unreadable file wholesale needs no read
+            print(f"[STATE] {doc}: unreadable file will be replaced by a whole-document set")
+            self.indents.setdefault(doc, 2)
+            self.docs[doc] = None
+            self.disk[doc] = self._signature(doc)
+            self.versions[doc] = self.seq = self.seq + 1
+            self.journal_len.setdefault(doc, 0)
+            return
+        if replayed:
+            print(f"[STATE] {doc}: replayed {replayed} journal records")
+            self.dirty.add(doc)
+            self.snapshot(doc)
+
+    def _rebase(self, doc):
+        """The file changed outside the daemon: reload it, re-apply our unsnapshotted writes"""
+        self._close_journal(doc)
+        try:
+            replayed = self._load(doc)
+        except StateDaemonError as e:
+            print(f"[STATE] {doc}: file changed on disk and is unreadable ({e}), keeping the daemon copy")
+            self.disk[doc] = self._signature(doc)
+            self.dirty.add(doc)
+            return
+        print(f"[STATE] WARNING {doc}: file changed outside the daemon, reloaded"
+              + (f" and re-applied {replayed} journal records" if replayed else ""))
+
+    def _replay(self, doc, box):
+        path = self._journal_path(doc)
+        if not path.exists():
+            return 0
+        count = 0
+        with open(path) as f:
+            for line in f:
+                try:
+                    kind, record_path, value = json.loads(line)
+                except ValueError:
+                    break  # Torn last line of a crash
+                if kind == "set":
+                    set_path(box, record_path, value, [])
+                else:
+                    delete_path(box, record_path, [])
+                count += 1
+        return count
+
+    def _journal(self, doc, records):
+        f = self.journals.get(doc)
+        if f is None:
+            f = self.journals[doc] = open(self._journal_path(doc), "a")
+        f.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+        f.flush()
+        self.journal_len[doc] = self.journal_len.get(doc, 0) + len(records)
+
+    def _close_journal(self, doc):
+        f = self.journals.pop(doc, None)
+        if f:
+            os.fsync(f.fileno())
+            f.close()
+
+    def execute(self, ops):
+        """Apply one batch atomically; returns results"""
+        with self.lock:
+            self.requests += 1
+            for op in ops:
+                if op.get("op") not in ("stats", "snapshot"):
+                    self._ensure(op.get("doc"), whole_set=op.get("op") == "set" and not op.get("path"))
+            undo, journals, results = [], {}, []
+            try:
+                for op in ops:
+                    kind = op.get("op")
+                    doc = op.get("doc")
+                    if kind == "stats":
+                        results.append(self.stats())
+                    elif kind == "snapshot":
+                        results.append(None)
+                    elif kind == "version":
+                        results.append(self.versions.get(doc))
+                    elif kind == "check":
+                        if self.versions.get(doc) != op.get("version"):
+                            raise StateConflict(f"{doc} changed (now {self.versions.get(doc)})")
+                        results.append(True)
+                    else:
+                        journal = journals.setdefault(doc, [])
+                        results += apply_ops(self.docs, [doc], [op], undo, journal)
+                for doc, records in journals.items():
+                    if records:
+                        self._journal(doc, records)
+            except Exception:
+                for step in reversed(undo):
+                    step()
+                raise
+            self.seq += 1
+            for doc, records in journals.items():
+                if records:
+                    self.versions[doc] = self.seq
+                    self.dirty.add(doc)
+            if any(op.get("op") == "snapshot" for op in ops):
+                self.snapshot_all()
+            else:
+                for doc in [d for d in self.dirty if self.journal_len.get(d, 0) >= JOURNAL_MAX]:
+                    self.snapshot(doc)
+            return results
+
+    def snapshot(self, doc):
+        """Write a dirty document to its file and truncate its journal (lock held)"""
+        if doc not in self.dirty:
+            return False
+        if self._signature(doc) != self.disk.get(doc):
+            self._rebase(doc)
+        value = self.docs.get(doc)
+        if value is not None and not self._file(doc).save(value):
+            return False  # Journal kept, retried next round
+        self.disk[doc] = self._signature(doc)
+        self._close_journal(doc)
+        self._journal_path(doc).unlink(missing_ok=True)
+        self.journal_len[doc] = 0
+        self.dirty.discard(doc)
+        return True
+
+    def snapshot_all(self):
+        for doc in list(self.dirty):
+            self.snapshot(doc)
+
+    def recover(self):
+        """Replay and snapshot journals left behind by a crash"""
+        with self.lock:
+            for path in sorted(self.state_dir.glob("*.journal")):
+                try:
+                    self._ensure(path.stem)
+                except StateDaemonError as e:
+                    print(f"[STATE] Cannot recover {path.stem}: {e}")
+
+    def stats(self):
+        return {
+            "docs": {doc: {"version": self.versions.get(doc), "journal": self.journal_len.get(doc, 0),
+                           "dirty": doc in self.dirty} for doc in self.docs},
+            "requests": self.requests,
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        store = self.server.store
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                self._reply({"ok": False, "error": f"bad request: {e}"})
+                continue
+            reply = {"id": request.get("id")}
+            try:
+                reply.update(ok=True, results=store.execute(request.get("ops") or []))
+            except StateConflict as e:
+                reply.update(ok=False, error=str(e), conflict=True)
+            except (StateDaemonError, OpError) as e:
+                reply.update(ok=False, error=str(e))
+            except Exception as e:
+                print(f"[STATE] Request failed: {e!r}")
+                reply.update(ok=False, error=repr(e))
+            self._reply(reply)
+
+    def _reply(self, reply):
+        self.wfile.write(json.dumps(reply, separators=(",", ":")).encode() + b"\n")
+        self.wfile.flush()
+
+
+class StateServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, store):
+        self.store = store
+        super().__init__(str(socket_path), _Handler)
+
+
+def serve(socket_path=SOCKET_FILE, state_dir=STATE_DIR):
+    """Run the daemon until SIGTERM / SIGINT; one instance per state directory"""
+    state_dir = Path(state_dir)
+    socket_path = Path(socket_path)
+    state_dir.mkdir(parents=True, exist_ok=True)
+    lock = open(state_dir / LOCK_FILE.name, "a")
+    try:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        print(f"[STATE] Another daemon owns {state_dir}")
+        return 1
+    socket_path.unlink(missing_ok=True)  # Stale socket of a dead daemon (we hold the lock)
+    store = StateStore(state_dir)
+    store.recover()
+    server = StateServer(socket_path, store)
+    stop = threading.Event()
+
+    def snapshots():
+        while not stop.wait(SNAPSHOT_INTERVAL):
+            with store.lock:
+                store.snapshot_all()
+    threading.Thread(target=snapshots, daemon=True).start()
+
+    def shutdown(signum, frame):
+        stop.set()
+        threading.Thread(target=server.shutdown).start()
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    print(f"[STATE] Serving {state_dir} on {socket_path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        with store.lock:
+            store.snapshot_all()
+        socket_path.unlink(missing_ok=True)
+        print(f"[STATE] Stopped after {store.requests} requests")
+    return 0
+
+
+# --- client ---
+
+class StateClient:
+    """Connection to the daemon; request() sends one batch"""
+
+    def __init__(self, socket_path=SOCKET_FILE, timeout=TIMEOUT):
+        self.socket_path = str(socket_path)
+        self.timeout = timeout
+        self.sock = None
+        self._reader = None
+        self.pid = None
+        self._next_id = 1
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+        self._reader = sock.makefile("rb")
+        self.pid = os.getpid()
+        return self
+
+    def close(self):
+        if self.sock:
+            self._reader.close()
+            self.sock.close()
+            self.sock = None
+
+    def request(self, ops):
+        """Results of a batch of ops; StateConflict / StateDaemonError when rejected"""
+        if self.sock is None:
+            self.connect()
+        request_id = self._next_id
+        self._next_id += 1
+        try:
+            self.sock.sendall(json.dumps({"id": request_id, "ops": ops}, separators=(",", ":")).encode() + b"\n")
+            line = self._reader.readline()
+        except OSError:
+            self.close()
+            raise
+        if not line:
+            self.close()
+            raise ConnectionError("state daemon closed the connection")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            error = reply.get("error", "")
+            if reply.get("conflict"):
+                raise StateConflict(error)
+            if error.startswith("corrupt: "):
+                raise StateCorruptError(error[len("corrupt: "):])
+            raise StateDaemonError(error)
+        return reply["results"]
+
+    def get(self, doc, path=(), default=None):
+        return self.request([{"op": "get", "doc": doc, "path": list(path), "default": default}])[0]
+
+    def set(self, doc, path, value):
+        return self.request([{"op": "set", "doc": doc, "path": list(path), "value": value}])[0]
+
+    def merge(self, doc, path, fields):
+        return self.request([{"op": "merge", "doc": doc, "path": list(path), "value": fields}])[0]
+
+    def append(self, doc, path, value):
+        return self.request([{"op": "append", "doc": doc, "path": list(path), "value": value}])[0]
+
+    def delete(self, doc, path):
+        return self.request([{"op": "delete", "doc": doc, "path": list(path)}])[0]
+
+
+_client = None
+_client_lock = threading.Lock()
+_down_until = 0.0  # Daemon hung or unusable: skip it until then
+
+
+def client_for(filepath):
+    """(client, doc) when the daemon runs and serves filepath, else None"""
+    global _client
+    filepath = Path(filepath)
+    if filepath.suffix != ".json" or time.time() < _down_until or not SOCKET_FILE.exists():
+        return None
+    try:
+        if filepath.parent.resolve() != STATE_DIR.resolve():
+            return None
+    except OSError:
+        return None
+    with _client_lock:
+        if _client is None or _client.pid != os.getpid():  # A forked child needs its own connection
+            try:
+                _client = StateClient(SOCKET_FILE, TIMEOUT).connect()
+            except OSError:
+                return None
+    return _client, filepath.stem
+
+
+def request(filepath, ops):
+    """Send ops on a state file's document; reconnects once; None when no daemon.
+
+    A daemon that times out or fails otherwise is skipped for DOWN_BACKOFF
+    seconds, so callers fall back to the file instead of failing.
+    """
+    global _client, _down_until
+    for attempt in range(2):
+        target = client_for(filepath)
+        if target is None:
+            return None
+        client, doc = target
+        try:
+            with _client_lock:
+                return client.request([dict(op, doc=doc) if "doc" not in op else op for op in ops])
+        except ConnectionError:  # Daemon restarted: reconnect once
+            with _client_lock:
+                _client = None
+        except OSError as e:  # Hung (timeout) or a socket left by a dead daemon
+            with _client_lock:
+                if _client is not None:
+                    _client.close()
+                _client = None
+                _down_until = time.time() + DOWN_BACKOFF
+            print(f"[STATE] State daemon unusable ({type(e).__name__}: {e}), "
+                  f"using files directly for {DOWN_BACKOFF}s")
+            return None
+    return None
+
+
+def mutate(filepath, ops):
+    """Apply ops to a state file: through the daemon if it runs, else as a locked file update"""
+    results = request(filepath, ops)
+    if results is not None:
+        return results
+
+    def run(data):
+        box = {"doc": data}
+        results = apply_ops(box, ["doc"], ops, [], [])
+        if box["doc"] is not data:  # Whole-document set
+            data.clear()
+            data.update(box["doc"] or {})
+        return results
+    return StateFile(filepath, max_retries=5, retry_delay=0.2, use_daemon=False).update(run)
+
+
+def main():
+    args = sys.argv[1:]
+    command = args[0] if args else "stats"
+    if command == "serve":
+        return serve()
+    client = StateClient()
+    try:
+        client.connect()
+    except OSError as e:
+        print(f"[STATE] Daemon not running ({SOCKET_FILE}): {e}")
+        return 1
+    if command == "stats":
+        print(json.dumps(client.request([{"op": "stats"}])[0], indent=2))
+    elif command == "snapshot":
+        client.request([{"op": "snapshot"}])
+        print("[STATE] Snapshot written")
+    elif command == "get" and len(args) > 1:
+        path = [int(k) if k.isdigit() else k for k in args[2].split(".")] if len(args) > 2 else []
+        print(json.dumps(client.get(args[1], path), indent=2))
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
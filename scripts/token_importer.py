@@ -6,8 +6,12 @@ Imports CIO feed data to lurker_state.json
 
 import json
 import os
+import shutil
+import time
 from datetime import datetime, timezone
 
+from safe_state import StateCorruptError, StateFile
+
 LURKER_DIR = "/data/.openclaw/workspace/lurker-project"
 DATA_DIR = f"{LURKER_DIR}/data"
 FEED_FILE = f"{DATA_DIR}/cio_feed.json"
@@ -25,24 +29,23 @@ def load_feed():
         print(f"[{datetime.now()}] Error loading feed: {e}")
         return None
 
-def load_state():
-    """Load or create lurker state"""
-    if os.path.exists(STATE_FILE):
-        try:
-            with open(STATE_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            pass
-    
-    return {
-        "tokens": {},
-        "last_update": datetime.now(timezone.utc).isoformat()
-    }
+def update_state(fn):
+    """Run fn(state) as one locked read-modify-write of lurker state.
 
-def save_state(state):
-    """Save lurker state"""
-    with open(STATE_FILE, 'w') as f:
-        json.dump(state, f, indent=2)
+    A corrupt state file is kept as <name>.corrupt-<ts> and the run starts
+    from a fresh state, as before the switch to update()."""
+    default = {"tokens": {}, "last_update": datetime.now(timezone.utc).isoformat()}
+    state_file = StateFile(STATE_FILE, max_retries=5, retry_delay=0.2)
+    try:
+        return state_file.update(fn, default=default)
+    except StateCorruptError as e:
+        kept = f"{STATE_FILE}.corrupt-{int(time.time())}"
+        shutil.copy2(STATE_FILE, kept)
+        print(f"[{datetime.now()}] Error loading state: {e}, kept as {os.path.basename(kept)}")
+        result = fn(default)
+        if not state_file.save(default):
+            raise RuntimeError("failed to save state atomically")
+        return result
 
 def import_tokens(feed, state):
     """Import tokens from feed to state"""
@@ -76,12 +79,10 @@ def main():
     print(f"[{datetime.now()}] Starting Token Importer...")
     
     feed = load_feed()
-    state = load_state()
     
     if feed:
-        imported = import_tokens(feed, state)
-        save_state(state)
-        print(f"[{datetime.now()}] Imported {imported} new tokens, total: {len(state['tokens'])}")
+        imported, total = update_state(lambda state: (import_tokens(feed, state), len(state['tokens'])))
+        print(f"[{datetime.now()}] Imported {imported} new tokens, total: {total}")
     else:
         print(f"[{datetime.now()}] No feed to import")
 
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+LURKER token metadata cache — symbol / name / decimals, kept forever
+ERC20 metadata never changes, so it is resolved once and stored in
+cache/token_metadata.db, keyed by checksummed address. Any source can fill it
+(on-chain reads, DexScreener baseToken/quoteToken, GeckoTerminal); lookups go
+through the cache before any network call. On-chain values win over API
+values, otherwise the first value seen is kept. The first open warms the
+cache from state/token_registry.json.
+
+    python3 token_metadata.py stats
+"""
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+from evm_abi import to_checksum_address
+from multicall import fetch_erc20_metadata
+
+DB_FILE = Path(__file__).parent.parent / "cache" / "token_metadata.db"
+REGISTRY_FILE = Path(__file__).parent.parent / "state" / "token_registry.json"
+
+SOURCE_RPC = "rpc"
+PLACEHOLDERS = {"", "UNKNOWN", "Unknown", "unknown", "???"}
+
+
+def checksum(address):
+    try:
+        if isinstance(address, str) and address.startswith("0x") and len(address) == 42:
+            int(address, 16)
+            return to_checksum_address(address)
+    except ValueError:
+        pass
+    return None
+
+
+def _clean(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return None if value in PLACEHOLDERS else value
+
+
+class TokenMetadataCache:
+    def __init__(self, db_file=DB_FILE, registry_file=REGISTRY_FILE):
+        self.db_file = Path(db_file)
+        self.registry_file = Path(registry_file)
+        self.stats = {"hits": 0, "misses": 0}
+        self._conn = None
+        self._lock = threading.RLock()
+
+    def _db(self):
+        if self._conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_file), timeout=10,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS tokens (
+                address TEXT PRIMARY KEY,
+                symbol TEXT,
+                name TEXT,
+                decimals INTEGER,
+                source TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )""")
+            self._conn = conn
+            if not conn.execute("SELECT 1 FROM meta WHERE key = 'warmed_registry'").fetchone():
+                self._warm_from_registry()
+        return self._conn
+
+    def _warm_from_registry(self):
+        try:
+            with open(self.registry_file) as f:
+                tokens = json.load(f).get("tokens", {})
+        except (OSError, ValueError):
+            tokens = {}
+        records = []
+        for addr, t in tokens.items():
+            info = t.get("token") or t  # Older entries nest symbol/name under "token"
+            records.append({"address": addr, "symbol": info.get("symbol"), "name": info.get("name")})
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            stored = self._put(records, "registry")
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('warmed_registry', ?)",
+                               (str(time.time()),))
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        print(f"[METADATA] Warmed cache with {stored} tokens from {self.registry_file.name}")
+
+    def _put(self, records, source):
+        rows = []
+        now = time.time()
+        for r in records:
+            addr = checksum(r.get("address"))
+            decimals = r.get("decimals")
+            row = (addr, _clean(r.get("symbol")), _clean(r.get("name")),
+                   decimals if isinstance(decimals, int) and 0 <= decimals <= 255 else None)
+            # On-chain answers are kept even when empty: the token was checked
+            if addr and (source == SOURCE_RPC or any(v is not None for v in row[1:])):
+                rows.append(row + (source, now))
+        if not rows:
+            return 0
+        # On-chain values replace API ones; otherwise only missing fields are filled
+        self._conn.executemany("""
+            INSERT INTO tokens (address, symbol, name, decimals, source, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(address) DO UPDATE SET
+                symbol = CASE WHEN excluded.source = 'rpc' AND tokens.source != 'rpc'
+                              THEN COALESCE(excluded.symbol, tokens.symbol)
+                              ELSE COALESCE(tokens.symbol, excluded.symbol) END,
+                name = CASE WHEN excluded.source = 'rpc' AND tokens.source != 'rpc'
+                            THEN COALESCE(excluded.name, tokens.name)
+                            ELSE COALESCE(tokens.name, excluded.name) END,
+                decimals = COALESCE(tokens.decimals, excluded.decimals),
+                source = CASE WHEN excluded.source = 'rpc' THEN 'rpc' ELSE tokens.source END,
+                updated_at = excluded.updated_at
+        """, rows)
+        return len(rows)
+
+    def put_many(self, records, source):
+        """Store [{"address", "symbol", "name", "decimals"}, ...] from `source`"""
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute("BEGIN IMMEDIATE")
+                try:
+                    count = self._put(records, source)
+                    db.execute("COMMIT")
+                except Exception:
+                    db.execute("ROLLBACK")
+                    raise
+                return count
+        except sqlite3.Error as e:
+            print(f"[METADATA] Could not store metadata: {e}")
+            return 0
+
+    def put(self, address, symbol=None, name=None, decimals=None, source=SOURCE_RPC):
+        return self.put_many([{"address": address, "symbol": symbol, "name": name,
+                               "decimals": decimals}], source)
+
+    def get_many(self, addresses):
+        """{checksummed_address: {"symbol", "name", "decimals", "source"}} for cached tokens"""
+        wanted = list(dict.fromkeys(a for a in map(checksum, addresses) if a))
+        found = {}
+        try:
+            with self._lock:
+                db = self._db()
+                for i in range(0, len(wanted), 500):
+                    chunk = wanted[i:i + 500]
+                    rows = db.execute(
+                        "SELECT address, symbol, name, decimals, source FROM tokens "
+                        f"WHERE address IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+                    for addr, symbol, name, decimals, source in rows:
+                        found[addr] = {"symbol": symbol, "name": name, "decimals": decimals, "source": source}
+        except sqlite3.Error as e:
+            print(f"[METADATA] Cache unavailable: {e}")
+        self.stats["hits"] += len(found)
+        self.stats["misses"] += len(wanted) - len(found)
+        return found
+
+    def get(self, address):
+        addr = checksum(address)
+        return self.get_many([addr]).get(addr) if addr else None
+
+    def resolve(self, addresses, rpc=None, require=("symbol", "name")):
+        """Read-through lookup: cached entries first, one Multicall3 pass for the rest.
+
+        Tokens already read on-chain are never fetched again, even when they lack
+        a field. Returns {checksummed_address: metadata}; tokens whose on-chain
+        read failed are omitted.
+        """
+        wanted = list(dict.fromkeys(a for a in map(checksum, addresses) if a))
+        found = self.get_many(wanted)
+        missing = [a for a in wanted if a not in found or (
+            found[a]["source"] != SOURCE_RPC and any(found[a].get(k) is None for k in require))]
+        if missing:
+            fetched = fetch_erc20_metadata(missing, rpc)
+            records = [dict(meta, address=addr) for addr, meta in fetched.items()]
+            self.put_many(records, SOURCE_RPC)
+            found.update(self.get_many(missing))
+        return found
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = TokenMetadataCache()
+    return _cache
+
+
+def lookup(address):
+    """Cached metadata for one token (no network), or None"""
+    return get_cache().get(address)
+
+
+def lookup_symbol(address):
+    return (lookup(address) or {}).get("symbol")
+
+
+def remember_pairs(pairs, source="dexscreener"):
+    """Record baseToken/quoteToken metadata of DexScreener pairs"""
+    records = []
+    for pair in pairs or []:
+        for side in ("baseToken", "quoteToken"):
+            token = pair.get(side) or {}
+            if token.get("address"):
+                records.append({"address": token["address"], "symbol": token.get("symbol"),
+                                "name": token.get("name")})
+    return get_cache().put_many(records, source) if records else 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "stats":
+        db = get_cache()._db()
+        total = db.execute("SELECT COUNT(*) FROM tokens").fetchone()[0]
+        print(f"Tokens: {total}")
+        for source, count in db.execute("SELECT source, COUNT(*) FROM tokens GROUP BY source ORDER BY 2 DESC"):
+            print(f"  {source}: {count}")
+    else:
+        print("Usage: token_metadata.py stats")
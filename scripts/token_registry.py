@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+LURKER token registry — every token seen, in SQLite (WAL) instead of one JSON file
+state/token_registry.json was parsed in full and rewritten in full by every
+script that touched a single token. The registry now lives in
+state/token_registry.db: one row per token (its JSON record, minus the price
+history), so a scan that touches 30 tokens writes 30 rows. Price history is a
+columnar series per token (price_series), read with registry.series.load().
+WAL mode lets readers run while a writer commits.
+
+Records keep the shape they had in the JSON file; get() and iterate_by_age()
+return them with "price_history" attached as a list of dicts (oldest point
+first) unless history=False. The first open imports state/token_registry.json
+once; after that the database is the source of truth. price_refresher appends
+price points, and the JSON file is only a published export (export_json(),
+run by the scripts that commit it).
+
+    python3 token_registry.py stats
+    python3 token_registry.py import [file.json] [--force]
+    python3 token_registry.py export [file.json]
+    python3 token_registry.py compact
+"""
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+from price_series import COMPACT_BATCH, PriceSeriesStore, to_epoch_ms
+
+DB_FILE = Path(__file__).parent.parent / "state" / "token_registry.db"
+JSON_FILE = Path(__file__).parent.parent / "state" / "token_registry.json"
+
+SCHEMA = "lurker_token_registry_v1"
+
+
+def first_seen_ms(token):
+    """When a record was first seen, whichever field its writer used"""
+    for key in ("first_seen", "first_seen_iso", "detected_at"):
+        ms = to_epoch_ms(token.get(key))
+        if ms is not None:
+            return ms
+    return None
+
+
+class TokenRegistry:
+    def __init__(self, db_file=None, json_file=None):
+        # Module paths are read here, not bound as defaults, so they can be redirected
+        self.db_file = Path(db_file or DB_FILE)
+        self.json_file = Path(json_file or JSON_FILE)
+        self._conn = None
+        self._lock = threading.RLock()
+        self.series = PriceSeriesStore(self._db, self._lock)
+
+    def _db(self):
+        if self._conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_file), timeout=10,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS tokens (
+                address TEXT PRIMARY KEY,
+                first_seen INTEGER,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS tokens_first_seen ON tokens (first_seen)")
+            PriceSeriesStore.create_tables(conn)
+            conn.execute("""CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )""")
+            self._conn = conn
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'price_points'").fetchone():
+                self._migrate_price_points()
+            if not conn.execute("SELECT 1 FROM meta WHERE key = 'imported_json'").fetchone():
+                self.import_json()
+        return self._conn
+
+    def _migrate_price_points(self):
+        """Move per-point rows of older databases into the columnar series"""
+        def run(db):
+            rows = db.execute("SELECT address, point FROM price_points ORDER BY address, ts").fetchall()
+            self.series._append(db, [(addr, json.loads(point)) for addr, point in rows])
+            db.execute("DROP TABLE price_points")
+            return len(rows)
+        print(f"[REGISTRY] Moved {self._write(run)} price points to columnar series")
+
+    def _write(self, fn):
+        """Run fn(conn) in one IMMEDIATE transaction"""
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(db)
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+            return result
+
+    # --- reads ---
+
+    def _history(self, addresses):
+        return {a: self.series.load(a).points() for a in addresses}
+
+    def _records(self, rows, history):
+        rows = list(rows)
+        tokens = {addr: json.loads(data) for addr, data in rows}
+        if history and tokens:
+            for addr, points in self._history(list(tokens)).items():
+                tokens[addr]["price_history"] = points
+        return tokens
+
+    def get(self, address, history=True):
+        """Registry record for a token, or None"""
+        return self.get_many([address], history).get((address or "").lower())
+
+    def get_many(self, addresses, history=True):
+        """{address_lower: record} for the addresses present"""
+        wanted = sorted({(a or "").lower() for a in addresses if a})
+        tokens = {}
+        with self._lock:
+            db = self._db()
+            for i in range(0, len(wanted), 500):
+                chunk = wanted[i:i + 500]
+                rows = db.execute(f"SELECT address, data FROM tokens WHERE address IN "
+                                  f"({','.join('?' * len(chunk))})", chunk)
+                tokens.update(self._records(rows, history))
+        return tokens
+
+    def iterate_by_age(self, max_age_hours=None, newest_first=True, history=True):
+        """(address, record) for every token, by first-seen time.
+
+        max_age_hours keeps only tokens first seen within that window.
+        Price histories are read a page of tokens at a time.
+        """
+        order = "DESC" if newest_first else "ASC"
+        where, params = "", []
+        if max_age_hours is not None:
+            where, params = "WHERE first_seen >= ?", [int((time.time() - max_age_hours * 3600) * 1000)]
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT address, data FROM tokens {where} ORDER BY first_seen {order}, address",
+                params).fetchall()
+        for i in range(0, len(rows), 200):
+            with self._lock:
+                page = self._records(rows[i:i + 200], history)
+            for addr, _ in rows[i:i + 200]:
+                yield addr, page[addr]
+
+    def price_history(self, address):
+        """Price points of a token as dicts, oldest first (prefer series.load())"""
+        address = (address or "").lower()
+        with self._lock:
+            return self._history([address])[address]
+
+    def addresses(self):
+        """Every token address in the registry"""
+        with self._lock:
+            return [row[0] for row in self._db().execute("SELECT address FROM tokens")]
+
+    def count(self):
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM tokens").fetchone()[0]
+
+    def __contains__(self, address):
+        with self._lock:
+            return self._db().execute("SELECT 1 FROM tokens WHERE address = ?",
+                                      ((address or "").lower(),)).fetchone() is not None
+
+    # --- writes ---
+
+    def _upsert(self, db, items):
+        now = time.time()
+        rows, points = [], []
+        for address, fields in items:
+            address = address.lower()
+            fields = dict(fields)
+            history = fields.pop("price_history", None)
+            current = db.execute("SELECT data FROM tokens WHERE address = ?", (address,)).fetchone()
+            record = json.loads(current[0]) if current else {}
+            record.update(fields)
+            rows.append((address, first_seen_ms(record), json.dumps(record, separators=(",", ":")), now))
+            points += [(address, p) for p in history or []]
+        db.executemany("""INSERT INTO tokens (address, first_seen, data, updated_at) VALUES (?, ?, ?, ?)
+                          ON CONFLICT(address) DO UPDATE SET first_seen = excluded.first_seen,
+                          data = excluded.data, updated_at = excluded.updated_at""", rows)
+        self._append(db, points)
+        return len(rows)
+
+    def _append(self, db, points):
+        return self.series._append(db, points)
+
+    def upsert(self, address, fields):
+        """Merge top-level `fields` into a token's record (created if missing).
+
+        A "price_history" list in `fields` is appended point by point.
+        """
+        return self.upsert_many({address: fields})
+
+    def upsert_many(self, updates):
+        """upsert() for {address: fields} in one transaction"""
+        return self._write(lambda db: self._upsert(db, list(updates.items())))
+
+    def append_price_point(self, address, point):
+        """Add a {"timestamp", "price", ...} point to a token's history"""
+        return self._write(lambda db: self._append(db, [(address, point)]))
+
+    def append_price_points(self, points):
+        """append_price_point() for [(address, point), ...] in one transaction"""
+        return self._write(lambda db: self._append(db, points))
+
+    def delete(self, addresses):
+        """Remove tokens and their price history"""
+        wanted = [(a.lower(),) for a in addresses]
+
+        def run(db):
+            self.series._delete(db, [a for (a,) in wanted])
+            return db.executemany("DELETE FROM tokens WHERE address = ?", wanted).rowcount
+        return self._write(run)
+
+    def compact(self, limit=COMPACT_BATCH):
+        """Roll expired price points into 5m / hourly buckets for tokens no scan touches"""
+        return self.series.compact_due(self._write, limit=limit)
+
+    def set_meta(self, key, value):
+        self._write(lambda db: db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                          (key, json.dumps(value))))
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._db().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    # --- import / export ---
+
+    def import_json(self, path=None, force=False):
+        """One-shot import of a token_registry.json file; returns tokens imported"""
+        path = Path(path or self.json_file)
+        try:
+            with open(path) as f:
+                tokens = json.load(f).get("tokens", {})
+        except (OSError, ValueError) as e:
+            tokens = {}
+            if path.exists():
+                print(f"[REGISTRY] Could not read {path.name}: {e}")
+
+        def run(db):
+            if not force and db.execute("SELECT 1 FROM meta WHERE key = 'imported_json'").fetchone():
+                return 0
+            count = self._upsert(db, [(addr, t) for addr, t in tokens.items() if isinstance(t, dict)])
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('imported_json', ?)",
+                       (json.dumps({"file": str(path), "tokens": count, "at": time.time()}),))
+            return count
+        count = self._write(run)
+        if count:
+            print(f"[REGISTRY] Imported {count} tokens from {path.name}")
+        return count
+
+    def export_json(self, path=None):
+        """Write the registry in the old JSON layout (compact), e.g. for publishing"""
+        path = Path(path or self.json_file)
+        tokens = dict(self.iterate_by_age(newest_first=False))
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"schema": SCHEMA, "tokens": tokens}, f, separators=(",", ":"))
+        tmp.replace(path)
+        return len(tokens)
+
+    def backup(self, path):
+        """Consistent copy of the database (sqlite online backup)"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            target = sqlite3.connect(str(path))
+            try:
+                self._db().backup(target)
+            finally:
+                target.close()
+
+
+_registry = None
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        _registry = TokenRegistry()
+    return _registry
+
+
+def main():
+    args = sys.argv[1:]
+    command = args[0] if args else "stats"
+    registry = get_registry()
+    if command == "import":
+        files = [a for a in args[1:] if not a.startswith("--")]
+        registry.import_json(files[0] if files else None, force="--force" in args)
+    elif command == "export":
+        count = registry.export_json(args[1] if len(args) > 1 else None)
+        print(f"[REGISTRY] Exported {count} tokens")
+    elif command == "compact":
+        tokens, raw, five = registry.compact()
+        print(f"[REGISTRY] Compacted {tokens} tokens ({raw} raw points, {five} 5m buckets rolled up)")
+    elif command != "stats":
+        print(__doc__)
+        return 1
+    points = registry.series.stats()
+    print(f"[REGISTRY] {registry.count()} tokens, {points['raw']} raw price points, "
+          f"{points['5m']} 5m and {points['1h']} hourly buckets in {registry.db_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
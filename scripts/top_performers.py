@@ -8,8 +8,11 @@ import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
+from price_refresher import snapshot_price
+from token_registry import get_registry
+
 TOP_FILE = Path(__file__).parent.parent / "signals" / "top_performers.json"
-REGISTRY_FILE = Path(__file__).parent.parent / "state" / "token_registry.json"
+BASELINE_LOOKBACK_MS = 3600000  # How far before the 1h mark a baseline price is searched
 
 def load_top_performers():
     if TOP_FILE.exists():
@@ -27,26 +30,23 @@ def save_top_performers(data):
     with open(TOP_FILE, 'w') as f:
         json.dump(data, f, indent=2)
 
-def calculate_hourly_gain(token_data):
-    """Calculate gain over last hour"""
-    history = token_data.get("price_history", [])
-    if len(history) < 2:
-        return None
-    
-    # Get price 1h ago vs current
-    now = datetime.now(timezone.utc).timestamp() * 1000
+def calculate_hourly_gain(token_data, token_addr=None):
+    """Calculate gain over last hour (registry price series)"""
+    # Get price 1h ago vs current: only the last two hours of the series are read
+    now = int(datetime.now(timezone.utc).timestamp() * 1000)
     one_hour_ago = now - 3600000
+    series = get_registry().series.load(token_addr or token_data.get("address"),
+                                        one_hour_ago - BASELINE_LOOKBACK_MS, now)
+    if len(series) < 2:
+        return None
     
-    current_price = history[-1].get("price", 0)
+    # Latest price from the market snapshot when it is fresh
+    current_price = snapshot_price(token_addr or token_data.get("address")) or series.price_at(now)
     
-    # Find price ~1h ago
-    price_1h_ago = None
-    for h in reversed(history):
-        if h.get("timestamp", 0) <= one_hour_ago:
-            price_1h_ago = h.get("price", 0)
-            break
+    # Last known price at or before 1h ago (bisect)
+    price_1h_ago = series.price_at(one_hour_ago)
     
-    if not price_1h_ago or price_1h_ago == 0:
+    if not price_1h_ago or not current_price:
         return None
     
     gain_pct = ((current_price - price_1h_ago) / price_1h_ago) * 100
@@ -57,16 +57,15 @@ def calculate_hourly_gain(token_data):
     }
 
 def update_top_performers():
-    registry = json.load(open(REGISTRY_FILE)) if REGISTRY_FILE.exists() else {"tokens": {}}
     top = load_top_performers()
     
     performers = []
     
-    for addr, token_data in registry.get("tokens", {}).items():
+    for addr, token_data in get_registry().iterate_by_age(history=False):
         symbol = token_data.get("token", {}).get("symbol", "UNKNOWN")
         
         # Calculate hourly performance
-        perf = calculate_hourly_gain(token_data)
+        perf = calculate_hourly_gain(token_data, addr)
         if perf and perf["gain_pct"] >= 20:  # +20% in 1h
             performers.append({
                 "token": token_data.get("token", {}),
@@ -4,10 +4,13 @@ Update performance tracker with intraday data from DexScreener
 Fetches current prices and updates performance metrics
 """
 import json
-import requests
 from datetime import datetime
 from pathlib import Path
 
+from http_cache import cached_get
+from price_refresher import snapshot_pair
+from rate_limiter import PRIORITY_TRACKER
+
 # Config
 TRACKER_FILE = Path("state/performance_tracker.json")
 SIGNALS_FILE = Path("signals/latest.json")
@@ -30,21 +33,22 @@ def fetch_dexscreener_data(token_address, chain="base"):
         return None
     
     try:
-        url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
-        resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            data = resp.json()
-            pairs = data.get("pairs", [])
+        best = snapshot_pair(token_address)
+        if not best:
+            url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
+            resp = cached_get(url, priority=PRIORITY_TRACKER, timeout=10)
+            pairs = resp.json().get("pairs", []) if resp.status_code == 200 else []
             if pairs:
                 # Get the best pair by liquidity
                 best = max(pairs, key=lambda x: float(x.get("liquidity", {}).get("usd", 0) or 0))
-                return {
-                    "price_usd": float(best.get("priceUsd", 0)),
-                    "price_change_24h": float(best.get("priceChange", {}).get("h24", 0)),
-                    "volume_24h": float(best.get("volume", {}).get("h24", 0)),
-                    "liquidity": float(best.get("liquidity", {}).get("usd", 0)),
-                    "timestamp": datetime.now().isoformat()
-                }
+        if best:
+            return {
+                "price_usd": float(best.get("priceUsd", 0)),
+                "price_change_24h": float(best.get("priceChange", {}).get("h24", 0)),
+                "volume_24h": float(best.get("volume", {}).get("h24", 0)),
+                "liquidity": float(best.get("liquidity", {}).get("usd", 0)),
+                "timestamp": datetime.now().isoformat()
+            }
     except Exception as e:
         print(f"Error fetching {token_address}: {e}")
     return None
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+LURKER WebSocket JSON-RPC — eth_subscribe over a plain RFC 6455 socket
+Minimal client (stdlib only, ws:// and wss://) for log subscriptions: calls
+are matched to their replies by id, subscription notifications are queued
+and read with next_notification(). Frame helpers are shared with the local
+stand-in server (rpc_standin.py).
+"""
+import base64
+import hashlib
+import json
+import os
+import select
+import socket
+import ssl
+import struct
+from collections import deque
+from urllib.parse import urlparse
+
+from chain_rpc import RpcError
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+TIMEOUT = 30
+
+OP_TEXT = 0x1
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+class WsClosed(Exception):
+    """Connection closed (by the peer or a socket error)"""
+
+
+def accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+def _read_exact(sock, n):
+    buf = b""
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise WsClosed("connection closed")
+        buf += chunk
+    return buf
+
+
+def send_frame(sock, payload, opcode=OP_TEXT, mask=False):
+    """Write one unfragmented frame; clients must mask, servers must not"""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    header = bytes([0x80 | opcode])
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header += bytes([mask_bit | length])
+    elif length < 1 << 16:
+        header += bytes([mask_bit | 126]) + struct.pack(">H", length)
+    else:
+        header += bytes([mask_bit | 127]) + struct.pack(">Q", length)
+    if mask:
+        key = os.urandom(4)
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+        header += key
+    sock.sendall(header + payload)
+
+
+def read_frame(sock):
+    """(opcode, payload) of the next message, fragments joined"""
+    opcode, data = None, b""
+    while True:
+        b0, b1 = _read_exact(sock, 2)
+        length = b1 & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", _read_exact(sock, 2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", _read_exact(sock, 8))[0]
+        key = _read_exact(sock, 4) if b1 & 0x80 else None
+        payload = _read_exact(sock, length)
+        if key:
+            payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+        op = b0 & 0x0F
+        if op >= 0x8:
+            return op, payload  # Control frames may arrive between fragments
+        opcode = opcode if op == 0 else op
+        data += payload
+        if b0 & 0x80:
+            return opcode, data
+
+
+class WsRpc:
+    def __init__(self, url, timeout=TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+        self.sock = None
+        self.notifications = deque()
+        self._next_id = 1
+
+    def connect(self):
+        u = urlparse(self.url)
+        port = u.port or (443 if u.scheme == "wss" else 80)
+        sock = socket.create_connection((u.hostname, port), timeout=self.timeout)
+        if u.scheme == "wss":
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=u.hostname)
+        key = base64.b64encode(os.urandom(16)).decode()
+        path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+        sock.sendall((f"GET {path} HTTP/1.1\r\nHost: {u.hostname}:{port}\r\n"
+                      "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        response = b""
+        while b"\r\n\r\n" not in response:
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise WsClosed("handshake: connection closed")
+            response += chunk
+        head = response.split(b"\r\n\r\n", 1)[0].decode(errors="replace")
+        if " 101 " not in head.split("\r\n")[0] or accept_key(key) not in head:
+            sock.close()
+            raise WsClosed(f"handshake rejected: {head.splitlines()[0] if head else 'empty'}")
+        self.sock = sock
+        self.notifications.clear()
+        return self
+
+    def close(self):
+        if self.sock:
+            try:
+                send_frame(self.sock, b"", OP_CLOSE, mask=True)
+            except OSError:
+                pass
+            self.sock.close()
+            self.sock = None
+
+    def _receive(self, timeout):
+        """Next JSON message, answering pings; None on timeout"""
+        if self.sock is None:
+            raise WsClosed("not connected")
+        try:
+            while True:
+                # Wait for a frame to start, then read it whole (TLS may hold decrypted bytes)
+                pending = isinstance(self.sock, ssl.SSLSocket) and self.sock.pending()
+                if not pending and not select.select([self.sock], [], [], timeout)[0]:
+                    return None
+                self.sock.settimeout(self.timeout)
+                opcode, payload = read_frame(self.sock)
+                if opcode == OP_PING:
+                    send_frame(self.sock, payload, OP_PONG, mask=True)
+                elif opcode == OP_CLOSE:
+                    self.sock.close()
+                    self.sock = None
+                    raise WsClosed("closed by server")
+                elif opcode == OP_TEXT:
+                    return json.loads(payload)
+        except (OSError, ValueError) as e:  # Includes a peer stalling mid-frame
+            self.sock.close()
+            self.sock = None
+            raise WsClosed(str(e)) from e
+
+    def call(self, method, params=None):
+        call_id = self._next_id
+        self._next_id += 1
+        try:
+            send_frame(self.sock, json.dumps({"jsonrpc": "2.0", "id": call_id, "method": method,
+                                              "params": params or []}), mask=True)
+        except (OSError, AttributeError) as e:
+            raise WsClosed(str(e)) from e
+        while True:
+            message = self._receive(self.timeout)
+            if message is None:
+                raise WsClosed(f"{method}: no reply in {self.timeout}s")
+            if message.get("method") == "eth_subscription":
+                self.notifications.append(message["params"])
+            elif message.get("id") == call_id:
+                if message.get("error"):
+                    raise RpcError(message["error"])
+                return message.get("result")
+
+    def subscribe(self, kind, *params):
+        """Subscription id for eth_subscribe(kind, *params)"""
+        return self.call("eth_subscribe", [kind, *params])
+
+    def next_notification(self, timeout=None):
+        """(subscription_id, result) of the next notification, None on timeout"""
+        while not self.notifications:
+            message = self._receive(timeout)
+            if message is None:
+                return None
+            if message.get("method") == "eth_subscription":
+                self.notifications.append(message["params"])
+        params = self.notifications.popleft()
+        return params.get("subscription"), params.get("result")
@@ -0,0 +1,5 @@
+"""Tests import the flat modules of scripts/ the way the scripts do."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
@@ -0,0 +1,60 @@
+from chain_checkpoint import MODE_CONFIRMED, ChainCheckpoint
+from chain_rpc import ChainRpc
+from rpc_standin import BlockStore, start_server
+
+import pytest
+
+
+def block(num, fork="a"):
+    return {"number": hex(num), "hash": "0x%s%063x" % (fork, num), "transactions": []}
+
+
+@pytest.fixture
+def chain():
+    store = BlockStore({n: block(n) for n in range(100, 200)})
+    server, url = start_server(store)
+    yield store, ChainRpc([url], timeout=5)
+    server.shutdown()
+    server.server_close()
+
+
+def test_reorg_rewinds_to_fork_and_retracts_pending(chain):
+    store, rpc = chain
+    checkpoint = ChainCheckpoint(confirmations=5, window=20)
+    confirmed, provisional = checkpoint.advance(rpc, 199, 199, items=[(190, "old"), (197, "a"), (199, "b")])
+    assert confirmed == ["old"] and provisional == ["a", "b"]
+    assert checkpoint.scanned == 199 and checkpoint.confirmed == 194
+
+    for n in (198, 199):
+        store.blocks[n] = block(n, fork="b")
+    assert checkpoint.check_reorg(rpc) == ["b"]
+    assert checkpoint.scanned == 197
+    assert checkpoint.pending == {197: ["a"]}
+    assert max(checkpoint.hashes) == 197
+
+    # Rescanning the new tail promotes what is now deep enough
+    store.last = 210
+    for n in range(200, 211):
+        store.blocks[n] = block(n)
+    confirmed, provisional = checkpoint.advance(rpc, 210, 210, items=[(199, "b2")])
+    assert confirmed == ["a", "b2"] and provisional == []
+    assert checkpoint.hashes[199] == block(199, fork="b")["hash"]
+
+
+def test_no_reorg_keeps_cursor(chain):
+    _, rpc = chain
+    checkpoint = ChainCheckpoint(confirmations=5, window=20)
+    checkpoint.advance(rpc, 150, 199, items=[(150, "x")])
+    assert checkpoint.check_reorg(rpc) == []
+    assert checkpoint.scanned == 150
+
+
+def test_restored_checkpoint_and_confirmed_mode(chain):
+    store, rpc = chain
+    state = ChainCheckpoint(confirmations=5, window=20)
+    state.advance(rpc, 199, 199, items=[(198, "p")])
+    restored = ChainCheckpoint(state.to_dict(), mode=MODE_CONFIRMED, confirmations=5, window=20)
+    assert restored.pending == {198: ["p"]}
+    assert restored.next_range(head=205, lookback=5, max_catchup=100) == (200, 200)
+    store.blocks[198] = block(198, fork="c")
+    assert restored.check_reorg(rpc) == ["p"]
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+import requests
+
+from http_fixtures import FixtureArchive, replaying, request_key
+
+URL = "https://rpc.example/base"
+
+
+def rpc_entry(calls, results):
+    body = [{"jsonrpc": "2.0", "method": m, "params": p, "id": i} for i, (m, p) in enumerate(calls)]
+    return {
+        "key": request_key("POST", URL, body),
+        "method": "POST",
+        "url": URL,
+        "request_ids": [c["id"] for c in body],
+        "status": 200,
+        "headers": {"Content-Type": "application/json"},
+        # Nodes may answer a batch out of order
+        "body": json.dumps([{"jsonrpc": "2.0", "id": i, "result": r} for i, r in reversed(list(enumerate(results)))]),
+        "elapsed_ms": 0,
+    }
+
+
+def test_replayed_batch_gets_live_ids():
+    calls = [("eth_getBlockByNumber", ["0x1", False]), ("eth_getBlockByNumber", ["0x2", False])]
+    archive = FixtureArchive([rpc_entry(calls, ["block1", "block2"])])
+    live = [{"jsonrpc": "2.0", "method": m, "params": p, "id": i} for i, (m, p) in zip((41, 7), calls)]
+    with replaying(archive, latency_ms=0) as stats:
+        reply = requests.post(URL, json=live).json()
+    assert {item["id"]: item["result"] for item in reply} == {41: "block1", 7: "block2"}
+    assert stats.requests == 1 and stats.misses == 0
+
+
+def test_swapped_ids_are_not_remapped_twice():
+    calls = [("eth_chainId", []), ("eth_blockNumber", [])]
+    archive = FixtureArchive([rpc_entry(calls, ["0x2105", "0x10"])])
+    live = [{"jsonrpc": "2.0", "method": "eth_chainId", "params": [], "id": 1},
+            {"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 0}]
+    with replaying(archive, latency_ms=0):
+        reply = requests.post(URL, data=json.dumps(live)).json()
+    assert {item["id"]: item["result"] for item in reply} == {1: "0x2105", 0: "0x10"}
+
+
+def test_single_call_and_unknown_request():
+    archive = FixtureArchive([{
+        "key": request_key("POST", URL, {"jsonrpc": "2.0", "method": "eth_blockNumber", "params": []}),
+        "method": "POST", "url": URL, "request_ids": [1], "status": 200,
+        "body": json.dumps({"jsonrpc": "2.0", "id": 1, "result": "0x10"}), "elapsed_ms": 0,
+    }])
+    with replaying(archive, latency_ms=0) as stats:
+        reply = requests.post(URL, json={"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [],
+                                         "id": "abc"}).json()
+        assert reply == {"jsonrpc": "2.0", "id": "abc", "result": "0x10"}
+        with pytest.raises(requests.exceptions.ConnectionError):
+            requests.post(URL, json={"jsonrpc": "2.0", "method": "eth_chainId", "params": [], "id": 1})
+    assert stats.misses == 1
+
+
+def test_recorded_sequence_replays_in_order(tmp_path):
+    entries = [{"key": "GET https://api.example/x", "method": "GET", "url": "https://api.example/x",
+                "status": 200, "body": json.dumps({"n": n}), "elapsed_ms": 0} for n in (1, 2)]
+    FixtureArchive(entries).save(tmp_path / "fx.json.gz")
+    with replaying(tmp_path / "fx.json.gz", latency_ms=0):
+        assert [requests.get("https://api.example/x").json()["n"] for _ in range(3)] == [1, 2, 2]
@@ -0,0 +1,85 @@
+import pytest
+
+from chain_rpc import ChainRpc, RpcError
+from log_scanner import LogScanner, is_range_error, is_rate_limited
+from rpc_standin import BlockStore, start_server
+
+ADDRESS = "0x" + "fa" * 20
+
+
+def make_log(num, index=0):
+    return {"address": ADDRESS, "topics": ["0x" + "11" * 32], "data": "0x", "blockNumber": hex(num),
+            "logIndex": hex(index), "transactionHash": "0x%063x%d" % (num, index)}
+
+
+@pytest.fixture
+def rpc():
+    logs = [make_log(n, i) for n in range(0, 1000, 3) for i in range(2)]
+    store = BlockStore({n: {"number": hex(n), "hash": "0x%064x" % n} for n in range(1000)}, logs=logs)
+    store.max_log_range = 100
+    store.max_logs = 40
+    server, url = start_server(store)
+    yield ChainRpc([url], timeout=5)
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("message,code", [
+    ("exceed maximum block range: 100", -32005),
+    ("query returned more than 10000 results", -32005),
+    ("Log response size exceeded. You can make eth_getLogs requests with up to a 2K block range", -32602),
+    ("eth_getLogs is limited to a 10000 block range", -32000),
+    ("Query timeout exceeded", -32000),
+])
+def test_range_errors(message, code):
+    error = RpcError({"code": code, "message": message})
+    assert is_range_error(error) and not is_rate_limited(error)
+
+
+@pytest.mark.parametrize("message,code", [
+    ("project ID request rate exceeded", -32005),
+    ("Your app has exceeded its compute units per second capacity", 429),
+    ("rate limit exceeded, retry later", -32000),
+    ("Too Many Requests", -32000),
+])
+def test_rate_limits_are_not_range_errors(message, code):
+    error = RpcError({"code": code, "message": message})
+    assert is_rate_limited(error) and not is_range_error(error)
+
+
+def test_splits_rejected_ranges(rpc):
+    scanner = LogScanner(rpc, span=800, workers=2)
+    logs, scanned_to = scanner.get_logs(0, 999, address=ADDRESS)
+    assert scanned_to == 999
+    assert len(logs) == 2 * len(range(0, 1000, 3))
+    assert [l["transactionHash"] for l in logs] == sorted(l["transactionHash"] for l in logs)
+    assert scanner.splits > 0
+
+
+class RateLimitedRpc:
+    def __init__(self, rpc, failures):
+        self.rpc = rpc
+        self.failures = failures
+
+    def call(self, method, params):
+        if self.failures:
+            self.failures -= 1
+            raise RpcError({"code": -32005, "message": "project ID request rate exceeded"})
+        return self.rpc.call(method, params)
+
+
+def test_rate_limit_backs_off_without_splitting(rpc, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("log_scanner.time.sleep", sleeps.append)
+    scanner = LogScanner(RateLimitedRpc(rpc, failures=2), span=50, workers=1, rate_limit_backoff=0.5)
+    logs, scanned_to = scanner.get_logs(0, 49, address=ADDRESS)
+    assert scanned_to == 49 and len(logs) == 2 * 17
+    assert scanner.splits == 0
+    assert sleeps == [0.5, 1.0]
+
+
+def test_persistent_rate_limit_gives_up(rpc, monkeypatch):
+    monkeypatch.setattr("log_scanner.time.sleep", lambda s: None)
+    scanner = LogScanner(RateLimitedRpc(rpc, failures=100), span=50, workers=1)
+    logs, scanned_to = scanner.get_logs(0, 99, address=ADDRESS)
+    assert scanned_to == -1 and logs == []
@@ -0,0 +1,65 @@
+import json
+
+import pool_state
+
+
+def test_refresh_keeps_candidates_added_during_rpc(tmp_path, monkeypatch):
+    feed_file = tmp_path / "cio_feed.json"
+    feed_file.write_text(json.dumps({"candidates": [
+        {"pool_address": "0xPOOL1", "token": {"address": "0xt1"}, "metrics": {"vol_5m": 5}},
+    ]}))
+
+    def read_chain(pools, rpc=None):
+        # The scanner publishes a new candidate while the RPC batch is in flight
+        feed = json.loads(feed_file.read_text())
+        feed["candidates"].append({"pool_address": "0xpool2", "token": {"address": "0xt2"}})
+        feed_file.write_text(json.dumps(feed))
+        return {"0xpool1": {"price_usd": 1.5, "liq_usd": 900.0, "kind": "v2", "block": 42}}
+
+    monkeypatch.setattr(pool_state, "pool_metrics", read_chain)
+    assert pool_state.refresh_feed(feed_file, last_block=None) == 42
+    candidates = json.loads(feed_file.read_text())["candidates"]
+    assert [c["pool_address"] for c in candidates] == ["0xPOOL1", "0xpool2"]
+    assert candidates[0]["metrics"] == {"vol_5m": 5, "price_usd": 1.5, "liq_usd": 900.0}
+    assert candidates[0]["onchain"]["block"] == 42
+    assert "onchain" not in candidates[1]
+
+
+def test_refresh_skips_same_block(tmp_path, monkeypatch):
+    feed_file = tmp_path / "cio_feed.json"
+    feed_file.write_text(json.dumps({"candidates": [{"pool_address": "0xpool1"}]}))
+    monkeypatch.setattr(pool_state, "pool_metrics", lambda pools, rpc=None: {
+        "0xpool1": {"price_usd": 1.0, "liq_usd": 1.0, "kind": "v2", "block": 7}})
+    before = feed_file.read_text()
+    assert pool_state.refresh_feed(feed_file, last_block=7) == 7
+    assert feed_file.read_text() == before
+
+
+def test_refresh_retries_when_scanner_saves_before_commit(tmp_path, monkeypatch):
+    import scanner_onchain
+    from safe_state import StateFile
+
+    feed_file = tmp_path / "cio_feed.json"
+    feed_file.write_text(json.dumps({"candidates": [{"pool_address": "0xpool1"}]}))
+    monkeypatch.setattr(scanner_onchain, "CIO_FILE", feed_file)
+
+    class ScannerRace(StateFile):
+        raced = False
+
+        def snapshot(self, default=None):
+            result = super().snapshot(default)
+            if not ScannerRace.raced:
+                # The scanner saves between update()'s snapshot and its commit
+                ScannerRace.raced = True
+                cio = scanner_onchain.load_cio()
+                cio["candidates"].append({"pool_address": "0xpool2"})
+                scanner_onchain.save_cio(cio)
+            return result
+
+    monkeypatch.setattr(pool_state, "_state", lambda path: ScannerRace(path, use_daemon=False))
+    monkeypatch.setattr(pool_state, "pool_metrics", lambda pools, rpc=None: {
+        "0xpool1": {"price_usd": 2.0, "liq_usd": 10.0, "kind": "v2", "block": 9}})
+    assert pool_state.refresh_feed(feed_file, last_block=None) == 9
+    candidates = json.loads(feed_file.read_text())["candidates"]
+    assert [c["pool_address"] for c in candidates] == ["0xpool1", "0xpool2"]
+    assert candidates[0]["metrics"]["price_usd"] == 2.0
@@ -0,0 +1,109 @@
+import math
+import time
+
+import pytest
+
+from price_series import CHUNK_POINTS, FIVE_MIN, HOUR
+from token_registry import TokenRegistry
+
+ADDR = "0x" + "ab" * 20
+MINUTE = 60_000
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return TokenRegistry(tmp_path / "registry.db", tmp_path / "missing.json")
+
+
+def points(start_ms, count, step=MINUTE, price=lambda i: 1.0 + i / 1000):
+    return [(ADDR, {"timestamp": start_ms + i * step, "price": price(i), "liq": 1000.0}) for i in range(count)]
+
+
+def chunk_count(registry):
+    with registry._lock:
+        return registry._db().execute("SELECT COUNT(*) FROM price_chunks").fetchone()[0]
+
+
+def test_late_points_merge_in_order(registry):
+    now = int(time.time() * 1000)
+    start = now - 3 * HOUR
+    series = points(start, CHUNK_POINTS + 100)
+    registry.append_price_points(series[::2])
+    registry.append_price_points(series[1::2])  # Every odd point arrives late
+    registry.append_price_point(ADDR, {"timestamp": start + 10 * MINUTE, "price": 9.0})  # Replaces a point
+    loaded = registry.series.load(ADDR)
+    assert list(loaded.ts) == [start + i * MINUTE for i in range(CHUNK_POINTS + 100)]
+    assert loaded.price_at(start + 10 * MINUTE) == 9.0
+    assert math.isnan(loaded.liq[10])
+    assert chunk_count(registry) == 2
+
+
+def test_ranged_load_reads_only_the_window(registry):
+    now = int(time.time() * 1000)
+    registry.append_price_points(points(now - 20 * HOUR, 1200))
+    window = registry.series.load(ADDR, now - 2 * HOUR, now - HOUR)
+    assert len(window) == 61
+    assert window.ts[0] == now - 2 * HOUR and window.ts[-1] == now - HOUR
+    assert registry.series.load(ADDR, end_ms=now - 20 * HOUR).price_at(now) == 1.0
+
+
+def test_tiers_are_stitched_after_compaction(registry):
+    now = int(time.time() * 1000)
+    start = now - 10 * 24 * HOUR
+    spike = 2000  # 10 days ago + ~33h: ends up in an hourly bucket
+    history = points(start, 10 * 24 * 12, step=FIVE_MIN, price=lambda i: 50.0 if i == spike else 1.0)
+    registry.append_price_points(history)
+    registry.compact(limit=None)
+    stats = registry.series.stats()
+    assert stats["raw"] <= 24 * 12 + 1
+    assert stats["5m"] >= 6 * 24 * 12 - 12 and stats["1h"] >= 2 * 24
+
+    loaded = registry.series.load(ADDR)
+    ts = list(loaded.ts)
+    assert ts == sorted(set(ts))
+    assert ts[0] == start - start % HOUR
+    assert ts[-1] == history[-1][1]["timestamp"]
+    assert loaded.max_price() == 50.0
+    hourly_end = ts.index(next(t for t in ts if t - ts[0] >= 3 * 24 * HOUR))
+    assert all(b - a == HOUR for a, b in zip(ts[:hourly_end], ts[1:hourly_end]))
+
+    # A late point inside the 5m tier widens its bucket without moving the close
+    bucket = now - 3 * 24 * HOUR
+    bucket -= bucket % FIVE_MIN
+    before = registry.series.load(ADDR, bucket, bucket)
+    registry.append_price_point(ADDR, {"timestamp": bucket + MINUTE, "price": 80.0})
+    after = registry.series.load(ADDR, bucket, bucket)
+    assert after.high[0] == 80.0 and after.price[0] == before.price[0]
+    assert len(registry.series.load(ADDR)) == len(loaded)
+
+
+def test_nan_prices_are_skipped(registry):
+    now = int(time.time() * 1000)
+    registry.append_price_points([
+        (ADDR, {"timestamp": now - 3 * MINUTE, "price": 2.0, "liq": 500.0}),
+        (ADDR, {"timestamp": now - 2 * MINUTE, "liq": 700.0}),  # No price
+        (ADDR, {"timestamp": now - MINUTE, "price": None}),
+    ])
+    series = registry.series.load(ADDR)
+    assert series.price_at(now) == 2.0
+    assert series.max_price() == 2.0
+    assert list(series.positive_prices()) == [2.0]
+    last = registry.series.last_point(ADDR)
+    assert len(last) == 1 and last.ts[0] == now - MINUTE
+    assert len(registry.series.last_point("0x" + "00" * 20)) == 0
+
+
+def test_hourly_only_token_keeps_its_newest_bucket(registry):
+    now = int(time.time() * 1000)
+    start = now - 10 * 24 * HOUR
+    start -= start % HOUR
+    registry.append_price_points([(ADDR, {"timestamp": start + i * HOUR, "price": 1.0 + i, "liq": 2000.0})
+                                  for i in range(24)])
+    registry.compact(limit=None)
+    assert registry.series.stats() == {"raw": 0, "5m": 0, "1h": 24}
+
+    last_ts = start + 23 * HOUR
+    last = registry.series.last_point(ADDR)
+    assert list(last.ts) == [last_ts] and last.liq[0] == 2000.0
+    assert len(registry.series.load(ADDR, None, last_ts)) == 24
+    assert list(registry.series.load(ADDR, start, start + HOUR).ts) == [start, start + HOUR]
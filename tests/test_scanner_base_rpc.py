@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+import scanner_base_rpc as scanner
+from rpc_standin import BlockStore, start_server
+
+FIRST = 1000
+
+
+def make_block(num, fork="a", creations=()):
+    txs = [{"hash": "0x%s%063x" % (fork, num), "from": "0x" + "f" * 40, "to": "0x" + "1" * 40, "input": "0x"}]
+    txs += [{"hash": tx_hash, "from": "0x" + "c" * 40, "to": None, "input": "0x6080604052"}
+            for tx_hash in creations]
+    return {"number": hex(num), "hash": "0x%s%063x" % (fork, num), "timestamp": hex(1_700_000_000 + 2 * num),
+            "transactions": txs}
+
+
+@pytest.fixture
+def chain(tmp_path, monkeypatch):
+    store = BlockStore({n: make_block(n) for n in range(FIRST - 100, FIRST + 40)})
+    server, url = start_server(store)
+    monkeypatch.setattr(scanner, "BASE_RPC", url)
+    monkeypatch.setattr(scanner, "CHECKPOINT_FILE", tmp_path / "checkpoint.json")
+    monkeypatch.setattr(scanner, "FEED_FILE", tmp_path / "basescan_feed.json")
+    yield store
+    server.shutdown()
+    server.server_close()
+
+
+def extend(store, count, creations=None):
+    for num in range(store.last + 1, store.last + count + 1):
+        store.blocks[num] = make_block(num, creations=(creations or {}).get(num, ()))
+    store.last += count
+
+
+def test_iter_blocks_splits_into_batches(chain, monkeypatch):
+    sizes = []
+    get_blocks = scanner.get_blocks
+    monkeypatch.setattr(scanner, "get_blocks", lambda nums: sizes.append(len(nums)) or get_blocks(nums))
+    nums = list(range(FIRST, FIRST + 23))
+    blocks = dict(scanner.iter_blocks(nums, batch_size=10, workers=2))
+    assert sorted(sizes) == [3, 10, 10]
+    assert sorted(blocks) == nums
+    assert all(blocks[n]["hash"] == chain.blocks[n]["hash"] for n in nums)
+
+
+def test_resumes_from_checkpoint(chain):
+    contracts, _, _ = scanner.scan_recent_blocks(num_blocks=5)
+    checkpoint = json.loads(scanner.CHECKPOINT_FILE.read_text())
+    assert checkpoint["scanned"] == chain.last
+    extend(chain, 7, creations={chain.last + 3: ["0x" + "d" * 64]})
+    contracts, _, _ = scanner.scan_recent_blocks(num_blocks=5)
+    assert [c["block"] for c in contracts] == [chain.last - 4]
+    assert contracts[0]["confirmed"] is False
+    assert json.loads(scanner.CHECKPOINT_FILE.read_text())["scanned"] == chain.last
+    assert scanner.scan_recent_blocks() == ([], set(), set())
+
+
+def test_failed_batch_holds_checkpoint(chain):
+    scanner.scan_recent_blocks(num_blocks=5)
+    held = chain.last
+    extend(chain, 6)
+    missing = chain.blocks.pop(held + 3)
+    scanner.scan_recent_blocks()
+    assert json.loads(scanner.CHECKPOINT_FILE.read_text())["scanned"] == held + 2
+    chain.blocks[held + 3] = missing
+    scanner.scan_recent_blocks()
+    assert json.loads(scanner.CHECKPOINT_FILE.read_text())["scanned"] == chain.last
+
+
+def test_reorged_contracts_are_retracted_from_feed(chain):
+    scanner.scan_fresh_tokens()
+    orphan, kept = "0x" + "e" * 64, "0x" + "b" * 64
+    extend(chain, 2, creations={chain.last + 1: [kept], chain.last + 2: [orphan]})
+    scanner.scan_fresh_tokens()
+    feed = json.loads(scanner.FEED_FILE.read_text())
+    assert [c["hash"] for c in feed["contracts"]] == [kept, orphan]
+
+    # The last block is replaced by a sibling without the contract
+    chain.blocks[chain.last] = make_block(chain.last, fork="9")
+    extend(chain, 1)
+    scanner.scan_fresh_tokens()
+    feed = json.loads(scanner.FEED_FILE.read_text())
+    assert [c["hash"] for c in feed["contracts"]] == [kept]
+    assert feed["meta"]["retracted"] == 1
+
+    # Once deep enough the surviving contract is marked confirmed
+    extend(chain, 12)
+    scanner.scan_fresh_tokens()
+    feed = json.loads(scanner.FEED_FILE.read_text())
+    assert feed["contracts"][0]["confirmed"] is True
+    assert feed["meta"]["unconfirmed"] == 0
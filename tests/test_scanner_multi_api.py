@@ -0,0 +1,47 @@
+import threading
+import time
+
+import scanner_multi_api as multi
+from http_fixtures import FixtureArchive, replaying
+
+SLOW_URL = "https://slow.example/tokens"
+
+
+def test_losing_source_stops_retrying_once_race_is_decided(monkeypatch, tmp_path):
+    monkeypatch.setattr(multi, "LOG_FILE", tmp_path / "multi_api.log")
+    archive = FixtureArchive([{"key": f"GET {SLOW_URL}", "method": "GET", "url": SLOW_URL,
+                               "status": 503, "body": "", "elapsed_ms": 0}])
+    loser_done = threading.Event()
+    loser_requests = []
+
+    def flaky(cancel=None):
+        # 503s back off 5s, 10s... unless the race is decided meanwhile
+        data = multi.fetch_with_retry(SLOW_URL, max_retries=5, backoff_base=5, cancel=cancel)
+        loser_requests.append(data)
+        loser_done.set()
+        return []
+
+    def fast(cancel=None):
+        multi.pause(0.2, cancel)
+        return [{"address": "0x" + "a" * 40, "symbol": "A"}]
+
+    monkeypatch.setattr(multi, "SOURCES", [("flaky", flaky), ("fast", fast)])
+    started = time.time()
+    with replaying(archive, latency_ms=0) as stats:
+        tokens, sources, report = multi.fetch_all_sources_hedged(hedge_delay=0.1)
+        assert loser_done.wait(2)
+    assert sources == ["fast"] and len(tokens) == 1
+    assert report["outcome"] == {"fast": "won", "flaky": "cancelled"}
+    assert time.time() - started < 2
+    assert stats.requests == 1 and loser_requests == [None]
+
+
+def test_fetchers_return_nothing_once_cancelled(monkeypatch, tmp_path):
+    monkeypatch.setattr(multi, "LOG_FILE", tmp_path / "multi_api.log")
+    decided = threading.Event()
+    decided.set()
+    with replaying(FixtureArchive(), latency_ms=0) as stats:
+        assert multi.fetch_dexscreener(decided) == []
+        assert multi.fetch_coingecko(decided) == []
+        assert multi.fetch_geckoterminal(decided) == []
+    assert stats.requests == 0
@@ -0,0 +1,166 @@
+import json
+import socket
+import threading
+
+import pytest
+
+import state_daemon as sd
+from safe_state import StateFile
+
+
+@pytest.fixture
+def store(tmp_path):
+    return sd.StateStore(tmp_path)
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    sock = tmp_path / "state_daemon.sock"
+    monkeypatch.setattr(sd, "STATE_DIR", tmp_path)
+    monkeypatch.setattr(sd, "SOCKET_FILE", sock)
+    monkeypatch.setattr(sd, "_client", None)
+    store = sd.StateStore(tmp_path)
+    server = sd.StateServer(sock, store)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield store
+    server.shutdown()
+    server.server_close()
+
+
+def test_ops_and_results(store):
+    results = store.execute([
+        {"op": "set", "doc": "s", "path": ["tokens", "0xa"], "value": {"symbol": "A"}},
+        {"op": "merge", "doc": "s", "path": ["meta"], "value": {"scanner": "x", "n": 1}},
+        {"op": "append", "doc": "s", "path": ["alerts"], "value": "first"},
+        {"op": "append", "doc": "s", "path": ["alerts"], "value": "second"},
+        {"op": "get", "doc": "s", "path": ["tokens", "0xa", "symbol"]},
+        {"op": "get", "doc": "s", "path": ["missing"], "default": 7},
+        {"op": "keys", "doc": "s", "path": ["meta"]},
+        {"op": "delete", "doc": "s", "path": ["meta", "n"]},
+        {"op": "delete", "doc": "s", "path": ["meta", "n"]},
+    ])
+    assert results == [None, None, 0, 1, "A", 7, ["scanner", "n"], True, False]
+    assert store.docs["s"] == {"tokens": {"0xa": {"symbol": "A"}}, "meta": {"scanner": "x"},
+                               "alerts": ["first", "second"]}
+
+
+def test_failed_batch_is_undone(store):
+    store.execute([{"op": "set", "doc": "s", "path": ["meta"], "value": {"a": 1}}])
+    version = store.versions["s"]
+    with pytest.raises(sd.OpError):
+        store.execute([{"op": "set", "doc": "s", "path": ["meta", "b"], "value": 2},
+                       {"op": "append", "doc": "s", "path": ["meta"], "value": 3}])
+    assert store.docs["s"] == {"meta": {"a": 1}}
+    assert store.versions["s"] == version
+
+
+def test_check_rejects_stale_version(store):
+    store.execute([{"op": "set", "doc": "s", "path": ["n"], "value": 1}])
+    version = store.execute([{"op": "version", "doc": "s"}])[0]
+    store.execute([{"op": "set", "doc": "s", "path": ["n"], "value": 2}])
+    with pytest.raises(sd.StateConflict):
+        store.execute([{"op": "check", "doc": "s", "version": version},
+                       {"op": "set", "doc": "s", "path": ["n"], "value": 3}])
+    assert store.docs["s"]["n"] == 2
+
+
+def test_journal_replay_after_crash(tmp_path, store):
+    (tmp_path / "s.json").write_text(json.dumps({"tokens": {}, "list": [1, 2, 3]}, indent=2))
+    store.execute([{"op": "merge", "doc": "s", "path": ["tokens"], "value": {"0xa": 1}},
+                   {"op": "delete", "doc": "s", "path": ["list", 0]},
+                   {"op": "append", "doc": "s", "path": ["list"], "value": 4}])
+    # No snapshot: a new store only has the file and the journal
+    recovered = sd.StateStore(tmp_path)
+    recovered.recover()
+    assert recovered.docs["s"] == {"tokens": {"0xa": 1}, "list": [2, 3, 4]}
+    assert not (tmp_path / "s.journal").exists()
+    # Replaying the same journal twice gives the same document
+    assert json.loads((tmp_path / "s.json").read_text()) == recovered.docs["s"]
+
+
+def test_snapshot_keeps_indent(tmp_path, store):
+    (tmp_path / "pretty.json").write_text(json.dumps({"a": 1}, indent=2))
+    (tmp_path / "compact.json").write_text(json.dumps({"a": 1}, separators=(",", ":")))
+    for doc in ("pretty", "compact"):
+        store.execute([{"op": "set", "doc": doc, "path": ["b"], "value": 2}])
+    store.snapshot_all()
+    assert (tmp_path / "pretty.json").read_text() == json.dumps({"a": 1, "b": 2}, indent=2)
+    assert (tmp_path / "compact.json").read_text() == '{"a":1,"b":2}'
+
+
+def test_external_write_is_rebased_not_overwritten(tmp_path, store):
+    path = tmp_path / "s.json"
+    path.write_text(json.dumps({"a": 1}, indent=2))
+    store.execute([{"op": "set", "doc": "s", "path": ["daemon"], "value": True}])
+    path.write_text(json.dumps({"a": 1, "external": True, "extra": [1]}, indent=2))
+    store.snapshot_all()
+    assert json.loads(path.read_text()) == {"a": 1, "external": True, "extra": [1], "daemon": True}
+    # Reads also pick up a changed file
+    path.write_text(json.dumps({"fresh": 1}, indent=2))
+    assert store.execute([{"op": "get", "doc": "s", "path": ["fresh"]}]) == [1]
+
+
+def test_save_fresh_doc_then_merge_through_daemon(tmp_path, daemon):
+    state = StateFile(tmp_path / "lurker_state.json")
+    assert state.save({"tokens": {}, "meta": {"stats": {}}})
+    state.update(lambda s: s["tokens"].update({"0xa": {"symbol": "A"}}))
+    assert sd.mutate(tmp_path / "lurker_state.json",
+                     [{"op": "merge", "path": ["meta"], "value": {"scanner": "x"}}]) == [None]
+    assert state.load() == {"tokens": {"0xa": {"symbol": "A"}}, "meta": {"stats": {}, "scanner": "x"}}
+    assert daemon.docs["lurker_state"]["meta"]["scanner"] == "x"
+    daemon.snapshot_all()
+    assert json.loads((tmp_path / "lurker_state.json").read_text())["meta"]["scanner"] == "x"
+
+
+def test_whole_set_replaces_corrupt_file(tmp_path, daemon):
+    (tmp_path / "bad.json").write_text("<<<<<<< HEAD\n")
+    state = StateFile(tmp_path / "bad.json")
+    assert state.load(default={"d": 1}) == {"d": 1}
+    assert state.save({"ok": True})
+    state.update(lambda s: s.update(more=1))
+    assert state.load() == {"ok": True, "more": 1}
+    assert daemon.docs["bad"] == {"ok": True, "more": 1}
+
+
+def test_file_fallback_without_daemon(tmp_path, monkeypatch):
+    monkeypatch.setattr(sd, "STATE_DIR", tmp_path)
+    monkeypatch.setattr(sd, "SOCKET_FILE", tmp_path / "none.sock")
+    path = tmp_path / "s.json"
+    sd.mutate(path, [{"op": "merge", "path": ["meta"], "value": {"a": 1}}])
+    sd.mutate(path, [{"op": "append", "path": ["list"], "value": "x"}])
+    assert json.loads(path.read_text()) == {"meta": {"a": 1}, "list": ["x"]}
+
+
+def test_hung_daemon_falls_back_to_file(tmp_path, monkeypatch):
+    sock_path = tmp_path / "state_daemon.sock"
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(sock_path))
+    listener.listen(8)
+    accepted = []
+    threading.Thread(target=lambda: accepted.append(listener.accept()), daemon=True).start()
+    monkeypatch.setattr(sd, "STATE_DIR", tmp_path)
+    monkeypatch.setattr(sd, "SOCKET_FILE", sock_path)
+    monkeypatch.setattr(sd, "TIMEOUT", 0.2)
+    monkeypatch.setattr(sd, "_client", None)
+    monkeypatch.setattr(sd, "_down_until", 0.0)
+    try:
+        state = StateFile(tmp_path / "s.json")
+        assert state.save({"a": 1})  # Accepted but never answered
+        assert accepted
+        state.update(lambda s: s.update(b=2))
+        assert state.load() == {"a": 1, "b": 2}
+        assert json.loads((tmp_path / "s.json").read_text()) == {"a": 1, "b": 2}
+    finally:
+        listener.close()
+
+
+def test_stale_socket_falls_back_to_file(tmp_path, monkeypatch):
+    sock_path = tmp_path / "state_daemon.sock"
+    sock_path.write_text("")  # Left behind, nothing listening
+    monkeypatch.setattr(sd, "STATE_DIR", tmp_path)
+    monkeypatch.setattr(sd, "SOCKET_FILE", sock_path)
+    monkeypatch.setattr(sd, "_client", None)
+    monkeypatch.setattr(sd, "_down_until", 0.0)
+    state = StateFile(tmp_path / "s.json")
+    assert state.save({"a": 1})
+    assert state.load() == {"a": 1}
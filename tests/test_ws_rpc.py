@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+import scanner_onchain
+from rpc_standin import BlockStore, start_server
+from ws_rpc import WsClosed, WsRpc
+
+FACTORY = "0x" + "fa" * 20
+TOPIC = "0x" + "11" * 32
+
+
+def make_log(num):
+    return {"address": FACTORY, "topics": [TOPIC], "data": "0x", "blockNumber": hex(num),
+            "logIndex": "0x0", "transactionHash": "0x%064x" % num, "blockHash": "0x%064x" % (num + 1)}
+
+
+@pytest.fixture
+def standin():
+    blocks = {n: {"number": hex(n), "hash": "0x%064x" % (n + 1), "transactions": []} for n in range(100, 400)}
+    store = BlockStore(blocks, block_time=0.05, logs=[make_log(n) for n in range(100, 400)])
+    servers = []
+
+    def start(drop_after=None):
+        server, url = start_server(store, ws_drop_after=drop_after)
+        servers.append(server)
+        return "ws" + url[4:]
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def notifications(ws, sub_id, count, timeout=5):
+    found, deadline = [], time.time() + timeout
+    while len(found) < count and time.time() < deadline:
+        note = ws.next_notification(timeout=0.5)
+        if note and note[0] == sub_id:
+            found.append(int(note[1]["blockNumber"], 16))
+    return found
+
+
+def test_subscription_receives_logs(standin):
+    ws = WsRpc(standin()).connect()
+    assert ws.call("eth_chainId") == "0x2105"
+    sub_id = ws.subscribe("logs", {"address": [FACTORY], "topics": [[TOPIC]]})
+    blocks = notifications(ws, sub_id, 3)
+    assert len(blocks) == 3 and blocks == sorted(blocks)
+    ws.close()
+
+
+def test_reconnect_and_resubscribe_after_drop(standin):
+    url = standin(drop_after=0.5)
+    ws = WsRpc(url).connect()
+    first_sub = ws.subscribe("logs", {"address": FACTORY})
+    with pytest.raises(WsClosed):
+        while True:
+            ws.next_notification(timeout=1)
+    assert ws.sock is None
+    # A new connection has no subscriptions until it subscribes again
+    ws.connect()
+    second_sub = ws.subscribe("logs", {"address": FACTORY})
+    assert second_sub != first_sub
+    assert len(notifications(ws, second_sub, 2)) == 2
+    ws.close()
+
+
+class StopStream(BaseException):
+    pass
+
+
+def test_stream_survives_errors_and_reconnects(standin, monkeypatch):
+    url = standin(drop_after=0.3)
+    calls = {"scan": 0, "handled": 0}
+    sleeps = []
+
+    def scan(mode):
+        calls["scan"] += 1
+        if calls["scan"] == 2:
+            raise KeyError("unexpected feed shape")
+
+    def handle(logs, rpc):
+        calls["handled"] += len(logs)
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 4:
+            raise StopStream()
+
+    monkeypatch.setattr(scanner_onchain, "get_rpc", lambda: None)
+    monkeypatch.setattr(scanner_onchain, "scan", scan)
+    monkeypatch.setattr(scanner_onchain, "handle_stream_logs", handle)
+    monkeypatch.setattr(scanner_onchain, "factory_filter", lambda: {"address": FACTORY})
+    monkeypatch.setattr(scanner_onchain.time, "sleep", sleep)
+    with pytest.raises(StopStream):
+        scanner_onchain.stream(url)
+    # Every pass (drop or error) reconnects and backfills; a good connect resets the backoff
+    assert calls["scan"] == 4
+    assert sleeps == [1, 1, 1, 1]
+    assert calls["handled"] > 0